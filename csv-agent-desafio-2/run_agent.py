@@ -1,53 +1,119 @@
+import time
+
+# Início da inicialização, para medir o tempo até a primeira pergunta
+startup_started = time.perf_counter()
+
 import os
-from pathlib import Path
+from functools import lru_cache
+from threading import Lock, Thread
 from dotenv import load_dotenv
-from langchain_community.utilities import SQLDatabase
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import tool
 
 
-from langchain_anthropic import ChatAnthropic
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 
-from tools.unzip_files import unzip_all_files_from_data_and_export_csvs
-from tools.load_and_treat_data import load_csvs_into_duckdb
+from tools.aggregates import route_query
+from tools.answer_formatting import format_result_locally
+from tools.description_index import SEARCH_MACRO
+from tools.ingestion import DUCKDB_FILE, PARQUET_CACHE_DIR, ingest_data
+from tools.load_and_treat_data import get_data_version
+from tools.query_cache import SqlQueryCache, schema_fingerprint
+from tools.result_cache import QueryResultCache
+from tools.result_shaping import shape_query_result
+from tools.schema import COLUMNS, describe_columns
+from tools.schema_pruning import select_relevant_columns
+from tools.sql_guard import (
+    QueryRejected, apply_resource_limits, preflight_query, query_timeout
+)
+from tools.tracing import add_to_current_span, tracer
 from operator import itemgetter
 
 # Carregando variáveis de ambiente
 load_dotenv()
 anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
 
-# Encontrando caminho das pastas do arquivo .zip e
-# definindo um caminho futuro para os .csv's. 
-data_dir = Path("data")
-unzipped_dir = Path("unzipped_data")
-zip_file = next(data_dir.glob("*.zip"))
-
-# Descompacta os arquivos, caso necessário
-unzip_all_files_from_data_and_export_csvs()
-
 # Carrega os arquivos no banco físico .duckdb 
 # (já unidos, como uma única tablea)
-duckdb_file = "meubanco.duckdb"
+duckdb_file = DUCKDB_FILE
+
+# Cache .parquet (particionado por ano/mês de emissão) ao lado do .duckdb
+parquet_cache_dir = PARQUET_CACHE_DIR
+
+# Modo somente leitura (servidor HTTP, ver run_server.py): a carga já foi
+# feita por um processo escritor e o banco é aberto apenas para leitura,
+# com várias conexões em paralelo
+read_only = os.getenv("AGENT_DB_READ_ONLY") == "1"
+pool_size = int(os.getenv("AGENT_DB_POOL_SIZE", "5"))
+
+# Engine do SQLAlchemy e cache de queries SQL (que fica no próprio .duckdb).
+# Só são criados na primeira vez em que o banco é usado (ver init_database):
+# importar o módulo não carrega dados nem abre o banco.
+engine = None
+sql_query_cache = None
+_database_lock = Lock()
+
+
+def init_database():
+    """Loads new or changed data (unless read-only), then creates the
+    connection pool and the SQL query cache. Runs only once; later calls
+    return right away."""
+    global engine, sql_query_cache
+    with _database_lock:
+        if engine is not None:
+            return
+
+        # Carrega os .zip's novos ou alterados, o cache .parquet e as tabelas
+        # de resumo (com o banco aberto para escrita só durante a carga)
+        if not read_only:
+            ingest_data(duckdb_file, parquet_cache_dir)
+
+        # Cria uma engine do SQLAlchemy com um conjunto (pool de conexões)
+        # para o DuckDB (`duckdb_engine`)
+        # Evita abrir conexões diretas com o duckdb_engine com conexões
+        # reutilizáveis
+        new_engine = create_engine(
+            f"duckdb:///{duckdb_file}",
+            connect_args={"read_only": read_only},
+            pool_size=pool_size, max_overflow=0,
+        )
+
+        # Utiliza uma das conexões da pool de conexões para limitar memória e
+        # threads usadas pelas queries do agente
+        with new_engine.connect() as connection:
+            # Obtém a conexão DBAPI (duckdb.DuckDBPyConnection) esperada pela
+            # função
+            apply_resource_limits(connection.connection)
+
+        # A conexão é automaticamente devolvida a pool saindo do bloco de
+        # código "with"
+
+        # Cache persistente pergunta -> query SQL (no próprio .duckdb).
+        # Perguntas repetidas não passam pela LLM; o cache é invalidado
+        # quando a descrição do esquema no prompt muda.
+        sql_query_cache = SqlQueryCache(
+            new_engine, schema_fingerprint(schema_description, table_description),
+            read_only=read_only
+        )
+        engine = new_engine
 
-# Cria uma engine do SQLAlchemy com um conjunto (pool de conexões) para o 
-# DuckDB (`duckdb_engine`)
-# Evita abrir conexões diretas com o duckdb_engine com conexões reutilizáveis
-engine = create_engine(f"duckdb:///{duckdb_file}")
 
-# Carrega os dados através da pool de conexões da engine
+def get_engine():
+    """Returns the SQLAlchemy engine, creating it on first use."""
+    init_database()
+    return engine
 
-# Utiliza uma das conexões da pool de conexões para carregar os arquivos 
-with engine.connect() as connection:
-    # Obtém a conexão DBAPI (duckdb.DuckDBPyConnection) esperada pela função
-    raw_duckdb_conn = connection.connection 
-    # Carrega os arquivos .csv da pasta unzipped_data no banco
-    load_csvs_into_duckdb(raw_duckdb_conn)
 
-# A conexão é automaticamente devolvida a pool saindo do bloco de código 
-# "with"
+def get_sql_query_cache() -> SqlQueryCache:
+    """Returns the question -> SQL query cache, creating it on first use."""
+    init_database()
+    return sql_query_cache
+
+
+# Cache em memória dos resultados das queries, versionado pela carga dos
+# dados (uma recarga torna os resultados antigos inalcançáveis)
+query_result_cache = QueryResultCache()
 
 
 # Cria uma ferramenta de execução de queries pelo agente do LangChain no banco
@@ -58,15 +124,35 @@ def execute_sql_query(query: str) -> str:
     Input should be a well-formed SQL query string.
     Example: SELECT COUNT(*) FROM "notas_fiscais_info";
     """
-    try:
-        # Utiliza uma das conexões da pool para executar a query 
-        with engine.connect() as connection:
-            result = connection.execute(text(query)).fetchall()
-            if not result:
-                return "No results found for the query."
-            return str(result)
-    except Exception as e:
-        return f"Error executing SQL query: {e}"
+    with tracer.span("execute_sql_query") as span:
+        try:
+            # Utiliza uma das conexões da pool para executar a query 
+            with get_engine().connect() as connection:
+                data_version = get_data_version(connection.connection)
+                cached_result = query_result_cache.get(query, data_version)
+                span["cache_hits"] = int(cached_result is not None)
+                if cached_result is not None:
+                    return cached_result
+
+                # Verificação prévia: somente leitura e custo estimado
+                # (EXPLAIN); resultados enormes sem LIMIT recebem um LIMIT
+                checked_query, note = preflight_query(connection.connection, query)
+
+                # Busca em lotes até o orçamento de linhas/caracteres;
+                # resultados maiores viram um resumo (contagem, estatísticas e
+                # amostra). A query é interrompida se passar do tempo limite.
+                with query_timeout(connection.connection):
+                    result = shape_query_result(connection, checked_query)
+                if note:
+                    result = f"{note}\n{result}"
+                query_result_cache.put(query, data_version, result)
+                return result
+        except QueryRejected as e:
+            span["error"] = f"rejected: {e}"
+            return f"Error executing SQL query: rejected by the pre-flight check: {e}"
+        except Exception as e:
+            span["error"] = str(e)
+            return f"Error executing SQL query: {e}"
 
 # Cria uma função para exibir a query executada e também a passar para o
 # modelo
@@ -76,92 +162,198 @@ def print_query(sql_query: str) -> str:
     return sql_query
 
 
+# Redireciona queries de agregação elegíveis para a menor tabela de resumo
+# que as responde (com o mesmo resultado); as demais seguem sem alteração
+def route_sql_query(sql_query: str) -> str:
+    """Rewrites eligible aggregate queries onto a precomputed summary table."""
+    with tracer.span("route_sql_query") as span:
+        with get_engine().connect() as connection:
+            routed_query = route_query(connection.connection, sql_query)
+        span["routed"] = int(routed_query != sql_query)
+    if routed_query != sql_query:
+        print(f"(query redirecionada para tabela de resumo)\n```sql\n{routed_query}\n```\n")
+    return routed_query
+
+
 # Integração com o LangChain 
 # (utilizando o modelo Claude Haiku 3.5 e a chave de api privada)
-llm = ChatAnthropic(
-    model="claude-3-5-haiku-latest", temperature=0, 
-    anthropic_api_key=anthropic_api_key
-)
+@lru_cache(maxsize=1)
+def get_llm():
+    """Creates the Anthropic chat model on first use."""
+    # Importado aqui: o langchain_anthropic é a dependência mais lenta de
+    # importar, e o cliente só é necessário quando chega a primeira pergunta
+    from langchain_anthropic import ChatAnthropic
+
+    return ChatAnthropic(
+        model="claude-3-5-haiku-latest", temperature=0, 
+        anthropic_api_key=anthropic_api_key
+    )
+
+
+class LlmUsageHandler(BaseCallbackHandler):
+    """Adds the token usage of each LLM call to the current tracing span."""
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                if usage:
+                    add_to_current_span(
+                        input_tokens=usage.get("input_tokens", 0),
+                        output_tokens=usage.get("output_tokens", 0),
+                    )
+
+
+# Passado nas chamadas das chains da LLM para registrar os tokens no span
+llm_usage_handler = LlmUsageHandler()
 
 # --- ENGENHARIA DE PROMPT - ENRIQUECENDO O CONTEXTO ---
 # Aqui são descritas informações da tabela, como o nome das colunas e suas 
 # respectivas descrições e um próprio descritivo da tabela. 
-db_info = SQLDatabase(engine=engine)
+# (as colunas vêm do contrato de colunas em tools/schema.py, o mesmo que
+# define os tipos da carga, sem refletir o banco a cada inicialização)
 table_name = "notas_fiscais_info"
-full_table_info = db_info.get_table_info(table_names=[table_name])
-
-schema_description = f"""Table Name: "{table_name}"
-Purpose: This table contains detailed information about electronic invoices (Notas Fiscais), including header data and individual line items. Use it to answer all questions related to invoices, their items, values, dates, and parties involved.
-
-Available Columns and their Descriptions:
-- "CFOP": Código Fiscal de Operações e Prestações (Tax Code for Operations and Services) - Indicates the nature of the transaction.
-- "CHAVE DE ACESSO": Chave de Acesso (Access Key) - The unique 44-digit identifier for the electronic invoice; acts as the primary key.
-- "CNPJ DESTINATÁRIO": CNPJ do Destinatário (Recipient's CNPJ) - Brazilian corporate taxpayer ID of the invoice recipient.
-- "CONSUMIDOR FINAL": Consumidor Final (Final Consumer) - Indicates if the recipient is the end consumer (Yes/No).
-- "CPF/CNPJ Emitente": CPF/CNPJ do Emitente (Issuer's CPF/CNPJ) - Brazilian individual or corporate taxpayer ID of the invoice issuer.
-- "CÓDIGO NCM/SH": Código NCM/SH (NCM/SH Code) - Mercosur Common Nomenclature / Harmonized System code for products/services.
-- "DATA EMISSÃO": Data de Emissão (Issuance Date) - The date the invoice was created. Format: YYYY-MM-DD.
-- "DATA/HORA EVENTO MAIS RECENTE": Data/Hora Evento Mais Recente (Most Recent Event Date/Time) - Timestamp of the last significant event related to the invoice (e.g., cancellation, correction).
-- "DESCRIÇÃO DO PRODUTO/SERVIÇO": Descrição do Produto/Serviço (Product/Service Description) - Detailed description of the item or service on the invoice line.
-- "DESTINO DA OPERAÇÃO": Destino da Operação (Operation Destination) - Indicates if the transaction is internal (within state), inter-state, or external.
-- "EVENTO MAIS RECENTE": Evento Mais Recente (Most Recent Event) - Describes the type of the last significant event related to the invoice.
-- "INDICADOR IE DESTINATÁRIO": Indicador IE Destinatário (Recipient's State Registration Indicator) - Shows if the recipient contributes ICMS and has a State Registration.
-- "INSCRIÇÃO ESTADUAL EMITENTE": Inscrição Estadual Emitente (Issuer's State Registration Number) - Unique tax ID within the state for ICMS purposes.
-- "MODELO": Modelo (Invoice Model) - Identifies the type of tax document (e.g., 55 for NF-e).
-- "MUNICÍPIO EMITENTE": Município Emitente (Issuer's Municipality) - The city where the invoice was issued.
-- "NATUREZA DA OPERAÇÃO": Natureza da Operação (Nature of Operation) - Descriptive text indicating the purpose of the transaction (e.g., "Venda de mercadoria").
-- "NCM/SH (TIPO DE PRODUTO)": NCM/SH (Tipo de Produto) - Another reference to the product classification code.
-- "NOME DESTINATÁRIO": Nome Destinatário (Recipient's Name) - The name of the individual or company receiving the invoice.
-- "NÚMERO": Número (Invoice Number) - The sequential fiscal number of the invoice.
-- "NÚMERO PRODUTO": Número Produto (Product Number) - An internal code or identifier for the specific product/service item.
-- "PRESENÇA DO COMPRADOR": Presença do Comprador (Buyer Presence Indicator) - Describes the buyer's presence during the transaction (e.g., in-person, internet).
-- "QUANTIDADE": Quantidade (Quantity) - The quantity of the specific product/service item sold.
-- "RAZÃO SOCIAL EMITENTE": Razão Social Emitente (Issuer's Corporate Name) - The full legal name of the company that issued the invoice.
-- "SÉRIE": Série (Invoice Series) - A sub-identifier for the invoice, allowing for multiple numbering sequences.
-- "UF DESTINATÁRIO": UF Destinatário (Recipient's State) - The Brazilian state (e.g., 'SP', 'RJ') of the recipient.
-- "UF EMITENTE": UF Emitente (Issuer's State) - The Brazilian state (e.g., 'SC', 'PR') where the invoice was issued.
-- "UNIDADE": Unidade (Unit of Measure) - The unit in which the product/service quantity is measured (e.g., "UN" for unit, "KG" for kilogram).
-- "VALOR NOTA FISCAL": Valor Nota Fiscal (Invoice Total Value) - The overall total monetary value of the entire invoice.
-- "VALOR TOTAL": Valor Total (Item Total Value) - The total monetary value for a specific line item (Quantity * Unit Value).
-- "VALOR UNITÁRIO": Valor Unitário (Unit Value) - The monetary value per unit of the specific product/service item.
+
+schema_tables_description = f"""Tables:
+- "notas_fiscais_cabecalho": One row per invoice, with the invoice header data only (the columns marked [header] below).
+- "notas_fiscais_itens": One row per invoice line item, with the columns marked [item] below. Linked to "notas_fiscais_cabecalho" by "CHAVE DE ACESSO" and "PERÍODO".
+- "{table_name}": View joining both tables, with every column below. The header columns are repeated on every item row of the same invoice.
+- "notas_fiscais_cabecalho_parquet", "notas_fiscais_itens_parquet", "notas_fiscais_info_parquet": Same data as the tables above, read from Parquet files partitioned by issuance year/month, with the extra columns marked [parquet only].
+- "{SEARCH_MACRO}('term')": Table macro returning one column, "DESCRIÇÃO DO PRODUTO/SERVIÇO", with every distinct product description that contains the term, ignoring case and accents. It is backed by a trigram index, so it is much faster than ILIKE over the items.
+Purpose: These tables contain detailed information about electronic invoices (Notas Fiscais), including header data and individual line items. Use them to answer all questions related to invoices, their items, values, dates, and parties involved.
 """
 
+
+def build_schema_description(column_names: list[str] | None = None) -> str:
+    """Database schema for the SQL generation prompt: the tables and the
+    given columns (every column when column_names is None)."""
+    return (
+        f"{schema_tables_description}\n"
+        "Available Columns and their Descriptions:\n"
+        f"{describe_columns(column_names)}\n"
+    )
+
+
+# Esquema completo: usado quando a pergunta não indica nenhuma coluna (ou a
+# seleção falha) e na impressão digital do cache de queries
+schema_description = build_schema_description()
+
 table_description = (
-    "The 'notas_fiscais_info' table contains comprehensive data for electronic invoices (Notas Fiscais). "
-    "It combines information from invoice headers and individual line items. "
+    "The 'notas_fiscais_info' view contains comprehensive data for electronic invoices (Notas Fiscais). "
+    "It combines information from invoice headers ('notas_fiscais_cabecalho') and individual line items ('notas_fiscais_itens'). "
     "This includes financial amounts, issuance dates, event timestamps, "
     "customer details, and specific product descriptions along with their values. "
-    "You should use this table to answer all questions related to invoices and their items."
+    "Questions that only involve header columns are cheaper and safer on 'notas_fiscais_cabecalho', "
+    "which has exactly one row per invoice."
 )
 
-# Cria o prompt final estruturado para gerar queries SQL a partir de 
+# Mensagens do prompt final estruturado para gerar queries SQL a partir de 
 # perguntas em linguagem natural, seguindo regras rígidas para consultar 
-# apenas a tabela notas_fiscais_info.
-sql_query_generation_prompt = ChatPromptTemplate.from_messages([
+# apenas as tabelas de notas fiscais (preferindo a tabela estreita de
+# cabeçalhos quando a pergunta não envolve itens). O esquema entra por
+# pergunta, só com as colunas relevantes (ver generate_sql_query).
+sql_query_generation_messages = [
     ("system",
      "You are an expert SQL query generator for a DuckDB database. "
-     "Your task is to convert natural language questions into accurate SQL queries for the 'notas_fiscais_info' table. "
+     "Your task is to convert natural language questions into accurate SQL queries for the invoice tables. "
      "Strictly adhere to the following rules:\n"
      "1. Enclose column names with spaces or special characters in DOUBLE QUOTES (\"). Example: `\"CHAVE DE ACESSO\"`.\n"
      "2. Use `COUNT(DISTINCT column_name)` for counting unique items.\n"
      "3. Do NOT include any explanations or extra text, just the SQL query.\n"
-     "4. Only generate queries for the 'notas_fiscais_info' table.\n"
-     "5. Most importantly: only use the columns present in Database Schema to generate the queries and respect number 1.\n\n"
+     "4. Only generate queries for the 'notas_fiscais_cabecalho', 'notas_fiscais_itens' and 'notas_fiscais_info' tables. "
+     "If the question only needs columns marked [header], query 'notas_fiscais_cabecalho'; use 'notas_fiscais_info' only when columns marked [item] are needed.\n"
+     "5. Most importantly: only use the columns present in Database Schema to generate the queries and respect number 1.\n"
+     "6. Never SUM or AVG \"VALOR NOTA FISCAL\" over 'notas_fiscais_info' (it is repeated on every item row); use 'notas_fiscais_cabecalho' instead.\n"
+     "7. When the question is bounded by issuance month or year (e.g. 'notas de março'), query the '_parquet' version of the table "
+     "('notas_fiscais_cabecalho_parquet', 'notas_fiscais_itens_parquet' or 'notas_fiscais_info_parquet') and filter on "
+     "\"ANO EMISSÃO\" and \"MÊS EMISSÃO\" (integers), so only the matching monthly partitions are read.\n"
+     "8. To filter by product description (e.g. 'notas de parafusos'), do NOT use LIKE/ILIKE on \"DESCRIÇÃO DO PRODUTO/SERVIÇO\"; use "
+     f"`\"DESCRIÇÃO DO PRODUTO/SERVIÇO\" IN (SELECT \"DESCRIÇÃO DO PRODUTO/SERVIÇO\" FROM {SEARCH_MACRO}('parafuso'))` instead, "
+     "with the search term in the singular and without accents.\n\n"
      "##\n\n"
-     f"Database Schema:\n{schema_description}\n"
+     "Database Schema:\n{schema_description}\n"
      "##\n\n"
      f"Table Context:\n{table_description}\n"
     ),
      ("human", "{question}\nSQL Query:")
-])
+]
+
+
+@lru_cache(maxsize=1)
+def get_sql_query_generator_chain():
+    """Builds the SQL generation chain on first use."""
+    # Importados aqui: os templates de prompt carregam boa parte do
+    # langchain_core, dispensável até a primeira pergunta
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    # Constrói uma sequência (RunnableSequence) que recebe uma pergunta, gera
+    # um prompt formatado, o envia para a LLM e retorna a query SQL como texto
+    # puro com o StrOutputParser.
+    sql_query_generation_prompt = ChatPromptTemplate.from_messages(
+        sql_query_generation_messages
+    )
+    return sql_query_generation_prompt | get_llm() | StrOutputParser()
 
-# Constrói uma sequência (RunnableSequence) que recebe uma pergunta, gera um 
-# prompt formatado, o envia para a LLM e retorna a query SQL como texto puro 
-# com o StrOutputParser.
-sql_query_generator_chain = sql_query_generation_prompt | llm | StrOutputParser()
+
+def prompt_schema_for(question: str) -> tuple[str, int]:
+    """Schema description with only the columns relevant to the question,
+    and how many columns it has. Falls back to the full schema when no
+    column is recognized or the selection fails."""
+    try:
+        column_names = select_relevant_columns(question)
+    except Exception as e:
+        print(f"⚠️ Seleção de colunas falhou, usando o esquema completo: {e}")
+        column_names = None
+    if column_names is None:
+        return schema_description, len(COLUMNS)
+    return build_schema_description(column_names), len(column_names)
+
+
+def generate_sql_query(x: dict) -> dict:
+    """Returns the SQL query for the question, from the cache when possible
+    (falling back to the LLM), whether it came from the cache and the input
+    tokens spent generating it."""
+    with tracer.span("sql_query_generator_chain") as span:
+        cached_query = get_sql_query_cache().get(x["question"])
+        span["cache_hits"] = int(cached_query is not None)
+        if cached_query is not None:
+            print("(query SQL obtida do cache)")
+            return {
+                "sql_query": cached_query, "sql_from_cache": True,
+                "generation_input_tokens": 0,
+            }
+
+        # Prompt reduzido às colunas relevantes para a pergunta
+        prompt_schema, span["schema_columns"] = prompt_schema_for(x["question"])
+        sql_query = get_sql_query_generator_chain().invoke(
+            {**x, "schema_description": prompt_schema},
+            config={"callbacks": [llm_usage_handler]},
+        )
+        input_tokens = span.get("input_tokens", 0)
+        print(
+            f"(prompt com {span['schema_columns']} de {len(COLUMNS)} colunas, "
+            f"{input_tokens} tokens de entrada)"
+        )
+        return {
+            "sql_query": sql_query, "sql_from_cache": False,
+            "generation_input_tokens": input_tokens,
+        }
+
+
+def execute_and_cache_sql_query(x: dict) -> str:
+    """Executes the SQL query and keeps the question -> query pair in the
+    cache only if it ran successfully."""
+    query_result = execute_sql_query.invoke(x["sql_query_to_execute"])
+    if query_result.startswith("Error executing SQL query"):
+        get_sql_query_cache().discard(x["question"])
+    elif not x["sql_from_cache"]:
+        get_sql_query_cache().put(x["question"], x["sql_query"])
+    return query_result
 
 # --- DIRECIONAMENTO DOS RESULTADOS FINAIS (RESPOSTA FINAL ESPERADA) ---
-result_analysis_prompt = ChatPromptTemplate.from_messages([
+result_analysis_messages = [
     ("system",
      "You are a helpful financial data analyst. Your task is to analyze SQL query results "
      "and explain them in clear, concise natural language in Brazilian Portuguese. "
@@ -173,56 +365,166 @@ result_analysis_prompt = ChatPromptTemplate.from_messages([
      "5. Consider the original question and the query result to provide a complete and relevant answer."
     ),
     ("human", "Original Question: {question}\nSQL Query Result: {query_result}\n\nAnalysis:")
-])
+]
+
+
+@lru_cache(maxsize=1)
+def get_result_analyst_chain():
+    """Builds the result analysis chain on first use."""
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    # Define um prompt para o modelo atuar como analista financeiro,
+    # explicando os resultados das queries SQL em português claro e sem
+    # incluir código.
+    # Cria uma chain que envia essas instruções e o resultado da query ao LLM
+    # e usa um parser para extrair apenas o texto da análise final.
+    # O resultado é uma explicação direta e formatada em texto do resultado
+    # da execução da query no banco.
+    result_analysis_prompt = ChatPromptTemplate.from_messages(result_analysis_messages)
+    return result_analysis_prompt | get_llm() | StrOutputParser()
+
+
+# Função que recebe cada trecho da resposta assim que ele chega (o modo
+# interativo imprime no console); None nos modos em lote e servidor
+answer_token_callback = None
+
+
+def analyze_query_result(x: dict) -> str:
+    """Explains the query result in natural language. Empty, scalar and
+    small tabular results are formatted locally (no LLM call); the others go
+    through the 2nd LLM call, streamed to answer_token_callback when set."""
+    with tracer.span("result_analyst_chain") as span:
+        started = time.perf_counter()
+        local_answer = format_result_locally(x["query_result"])
+        span["fast_path"] = int(local_answer is not None)
+        if local_answer is not None:
+            if answer_token_callback is not None:
+                answer_token_callback(local_answer)
+            return local_answer
+
+        config = {"callbacks": [llm_usage_handler]}
+        if answer_token_callback is None:
+            return get_result_analyst_chain().invoke(x, config=config)
+
+        chunks = []
+        for chunk in get_result_analyst_chain().stream(x, config=config):
+            if not chunks:
+                span["first_token_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            chunks.append(chunk)
+            answer_token_callback(chunk)
+        return "".join(chunks)
 
-# Define um prompt para o modelo atuar como analista financeiro, explicando 
-# os resultados das queries SQL em português claro e sem incluir código.
-# Cria uma chain que envia essas instruções e o resultado da query ao LLM e 
-# usa um parser para extrair apenas o texto da análise final.
-# O resultado é uma explicação direta e formatada em texto do resultado da 
-# execução da query no banco.
-result_analyst_chain = result_analysis_prompt | llm | StrOutputParser()
 
 # --- CONSTRUINDO A SEQUÊNCIA (CHAIN) FINAL DO AGENTE UTILIZANDO LCEL (LangChain Expression Language) ---
-full_chain = (
-    RunnablePassthrough.assign(
-        # Gera a query com a LLM (1a chamada):
-        sql_query=sql_query_generator_chain
-    )
+# agent_chain devolve o dicionário completo (pergunta, query, resultado e
+# resposta), usado pelo modo em lote (run_batch.py); full_chain devolve
+# apenas a resposta final. As chains que chamam a LLM só são montadas na
+# primeira pergunta (ou em segundo plano, logo após a inicialização).
+agent_steps = (
+    # Gera a query com a LLM (1a chamada), ou a obtém do cache:
+    RunnableLambda(lambda x: {**x, **generate_sql_query(x)})
     .assign(
         # Isola a query gerada pelo modelo em um formato viável para execução
-        # no banco
-        sql_query_to_execute=lambda x: print_query(x["sql_query"])
+        # no banco (redirecionada para uma tabela de resumo quando possível)
+        sql_query_to_execute=lambda x: route_sql_query(print_query(x["sql_query"]))
     )
     .assign(
-        # Executa a query no banco e salva o resultado em query_result.
-        query_result=lambda x: execute_sql_query.invoke(
-            x["sql_query_to_execute"]
-        )
+        # Executa a query no banco e salva o resultado em query_result
+        # (guardando a query no cache se ela funcionou).
+        query_result=execute_and_cache_sql_query
     )
     .assign(
         # Interpreta o resultado final e traz a resposta em linguagem natural
         # (2a chamada da LLM):
-        final_answer=result_analyst_chain
+        final_answer=analyze_query_result
     )
-    # Corrected: Use itemgetter to retrieve the desired key from the final dictionary output
-    | itemgetter("final_answer")
 )
 
-# Rodando o sistema com o script (idealizado para funcionar em linha de comando)
-print("Bem-vindo ao assistente de análise de Notas Fiscais!")
-print("Por favor, faça suas perguntas sobre os dados das notas fiscais.")
-
-while True:
-    pergunta = input("Faça uma pergunta (ou 'sair' para encerrar): ")
-    if pergunta.lower() in ['sair', 'exit', 'quit']:
-        # Garante que a engine seja desabalitada para derrubar todas as
-        # conexões
-        engine.dispose()
-        break
-    try:
-        response = full_chain.invoke({"question": pergunta})
-        print(f"Resposta: {response}\n")
-    except Exception as e:
-        print(f"Ocorreu um erro: {e}")
-        print("Por favor, tente novamente ou reformule sua pergunta.")
\ No newline at end of file
+
+def run_agent_steps(x: dict) -> dict:
+    """Runs every step for one question inside a single trace, so each
+    stage's span (generation, routing, execution, analysis) shares its
+    trace_id."""
+    with tracer.span("full_chain"):
+        return agent_steps.invoke(x)
+
+
+# Cada etapa é cronometrada (tools/tracing.py): os spans vão para o .jsonl e
+# as métricas por etapa, para o arquivo/endpoint no formato do Prometheus
+agent_chain = RunnableLambda(run_agent_steps)
+
+# Corrected: Use itemgetter to retrieve the desired key from the final dictionary output
+full_chain = agent_chain | itemgetter("final_answer")
+
+
+def warm_up_chains():
+    """Builds the LLM client and chains ahead of the first question."""
+    get_sql_query_generator_chain()
+    get_result_analyst_chain()
+
+
+def print_cache_stats():
+    """Prints the hit/miss counters of the SQL and result caches."""
+    stats = get_sql_query_cache().stats()
+    print(
+        f"Cache de queries SQL: {stats['hits']} acerto(s), "
+        f"{stats['misses']} falha(s), {stats['entries']} pergunta(s) guardada(s)."
+    )
+    stats = query_result_cache.stats()
+    print(
+        f"Cache de resultados: {stats['hits']} acerto(s), "
+        f"{stats['misses']} falha(s), {stats['bytes'] / 1024:.0f} KiB em uso."
+    )
+
+
+def main():
+    """Interactive question loop (command line)."""
+    print("Bem-vindo ao assistente de análise de Notas Fiscais!")
+    print("Por favor, faça suas perguntas sobre os dados das notas fiscais.")
+
+    # Carrega os dados e abre o banco antes da primeira pergunta
+    init_database()
+
+    # Monta as chains da LLM em segundo plano enquanto a primeira pergunta é
+    # digitada
+    Thread(target=warm_up_chains, daemon=True).start()
+    print(f"⏱️ Pronto em {time.perf_counter() - startup_started:.2f}s")
+
+    # A resposta é impressa conforme os trechos chegam da LLM
+    global answer_token_callback
+    printed_tokens = []
+
+    def print_answer_token(token: str):
+        if not printed_tokens:
+            print("Resposta: ", end="")
+        printed_tokens.append(token)
+        print(token, end="", flush=True)
+
+    answer_token_callback = print_answer_token
+
+    while True:
+        printed_tokens.clear()
+        pergunta = input("Faça uma pergunta (ou 'sair' para encerrar): ")
+        if pergunta.lower() in ['sair', 'exit', 'quit']:
+            print_cache_stats()
+            tracer.write_metrics()
+            # Garante que a engine seja desabalitada para derrubar todas as
+            # conexões
+            get_engine().dispose()
+            break
+        try:
+            response = full_chain.invoke({"question": pergunta})
+            if printed_tokens:
+                print("\n")
+            else:
+                print(f"Resposta: {response}\n")
+        except Exception as e:
+            print(f"Ocorreu um erro: {e}")
+            print("Por favor, tente novamente ou reformule sua pergunta.")
+
+
+# Rodando o sistema com o script (idealizado para funcionar em linha de
+# comando). Importar o módulo (ex.: run_batch.py) não inicia o loop.
+if __name__ == "__main__":
+    main()
\ No newline at end of file
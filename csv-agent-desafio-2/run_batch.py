@@ -0,0 +1,138 @@
+import argparse
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from langchain_core.runnables import RunnableLambda
+
+
+# Quantidade padrão de perguntas processadas ao mesmo tempo (cada uma faz até
+# duas chamadas à LLM)
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+def read_questions(lines) -> list[dict]:
+    """
+    Lê as perguntas em JSONL, uma por linha: {"question": "...", "id": ...}.
+    O "id" é opcional (por padrão, o número da linha). Linhas vazias são
+    ignoradas.
+
+    Args:
+    lines(Iterable[str]): Linhas do arquivo (ou do stdin).
+    """
+    questions = []
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        if not record.get("question"):
+            raise ValueError(f"Linha {line_number} sem o campo 'question'")
+        record.setdefault("id", line_number)
+        questions.append(record)
+    return questions
+
+
+def answer_question(agent_chain, record: dict) -> dict:
+    """
+    Roda uma pergunta pela chain do agente e devolve a linha de saída, com a
+    resposta, a query gerada e o tempo gasto. Erros viram o campo "error" em
+    vez de interromper o lote.
+
+    Args:
+    agent_chain(Runnable): Chain que devolve o dicionário completo do agente.
+    record(dict): Pergunta lida do JSONL.
+    """
+    start = time.perf_counter()
+    output = {"id": record["id"], "question": record["question"]}
+    try:
+        state = agent_chain.invoke({"question": record["question"]})
+        output.update({
+            "sql_query": state.get("sql_query"),
+            "sql_from_cache": state.get("sql_from_cache"),
+            "generation_input_tokens": state.get("generation_input_tokens"),
+            "answer": state.get("final_answer"),
+            "error": None,
+        })
+    except Exception as e:
+        output.update({
+            "sql_query": None, "sql_from_cache": None,
+            "generation_input_tokens": None, "answer": None, "error": str(e),
+        })
+    output["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+    return output
+
+
+def run_batch(agent_chain, questions: list[dict], output_file, max_concurrency: int):
+    """
+    Processa as perguntas concorrentemente (no máximo max_concurrency ao mesmo
+    tempo) e grava cada resposta em JSONL assim que ela fica pronta.
+
+    Args:
+    agent_chain(Runnable): Chain que devolve o dicionário completo do agente.
+    questions(list[dict]): Perguntas lidas do JSONL.
+    output_file(TextIO): Arquivo (ou stdout) de saída.
+    max_concurrency(int): Limite de perguntas em andamento ao mesmo tempo.
+    """
+    answer_chain = RunnableLambda(lambda record: answer_question(agent_chain, record))
+    config = {"max_concurrency": max_concurrency}
+
+    for _, output in answer_chain.batch_as_completed(questions, config=config):
+        output_file.write(json.dumps(output, ensure_ascii=False, default=str) + "\n")
+        output_file.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Responde perguntas em lote (JSONL) sem o modo interativo."
+    )
+    parser.add_argument(
+        "input", nargs="?", default="-",
+        help="Arquivo .jsonl com as perguntas ('-' para ler do stdin)."
+    )
+    parser.add_argument(
+        "-o", "--output", default="-",
+        help="Arquivo .jsonl de saída ('-' para escrever no stdout)."
+    )
+    parser.add_argument(
+        "-c", "--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+        help="Quantidade máxima de perguntas processadas ao mesmo tempo."
+    )
+    args = parser.parse_args()
+
+    if args.input == "-":
+        questions = read_questions(sys.stdin)
+    else:
+        with open(args.input, encoding="utf-8") as input_file:
+            questions = read_questions(input_file)
+
+    # As mensagens do agente (carga dos dados, queries geradas) vão para o
+    # stderr, deixando o stdout só com o JSONL de saída
+    results_stdout = sys.stdout
+    with redirect_stdout(sys.stderr):
+        import run_agent
+
+        # Carrega os dados antes das perguntas (fora do tempo medido)
+        run_agent.init_database()
+
+        start = time.perf_counter()
+        if args.output == "-":
+            run_batch(run_agent.agent_chain, questions, results_stdout, args.max_concurrency)
+        else:
+            with open(Path(args.output), "w", encoding="utf-8") as output_file:
+                run_batch(run_agent.agent_chain, questions, output_file, args.max_concurrency)
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"✔️ {len(questions)} pergunta(s) respondida(s) em {elapsed:.1f}s "
+            f"(concorrência máxima: {args.max_concurrency})"
+        )
+        run_agent.print_cache_stats()
+        run_agent.tracer.write_metrics()
+        run_agent.get_engine().dispose()
+
+
+if __name__ == "__main__":
+    main()
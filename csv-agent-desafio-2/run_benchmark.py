@@ -0,0 +1,276 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import duckdb
+
+from tools.synthetic_data import (
+    REAL_INVOICES_PER_MONTH, REAL_ITEMS_PER_INVOICE, generate_synthetic_nfes
+)
+
+
+# Volumes medidos, em múltiplos do mês real (100 notas, 565 itens)
+BENCHMARK_PROFILES = {
+    "10x": {"invoices_per_month": 10 * REAL_INVOICES_PER_MONTH, "months": 3},
+    "100x": {"invoices_per_month": 100 * REAL_INVOICES_PER_MONTH, "months": 3},
+}
+
+# Queries representativas do que o agente costuma gerar
+BENCHMARK_QUERIES = {
+    "contagem_notas": 'SELECT COUNT(*) FROM notas_fiscais_cabecalho',
+    "valor_por_uf": 'SELECT "UF EMITENTE", SUM("VALOR NOTA FISCAL") FROM notas_fiscais_cabecalho GROUP BY 1 ORDER BY 2 DESC',
+    "top_emitentes": 'SELECT "RAZÃO SOCIAL EMITENTE", SUM("VALOR NOTA FISCAL") AS total FROM notas_fiscais_cabecalho GROUP BY 1 ORDER BY total DESC LIMIT 5',
+    "itens_por_cfop": 'SELECT "CFOP", COUNT(*) FROM notas_fiscais_info GROUP BY 1 ORDER BY 2 DESC',
+    "produto_mais_vendido": 'SELECT "DESCRIÇÃO DO PRODUTO/SERVIÇO", SUM("QUANTIDADE") AS q FROM notas_fiscais_itens GROUP BY 1 ORDER BY q DESC LIMIT 1',
+    "notas_por_dia": 'SELECT CAST("DATA EMISSÃO" AS DATE) AS dia, COUNT(*) FROM notas_fiscais_cabecalho GROUP BY dia ORDER BY dia',
+    "busca_descricao": "SELECT COUNT(DISTINCT \"CHAVE DE ACESSO\") FROM notas_fiscais_info WHERE \"DESCRIÇÃO DO PRODUTO/SERVIÇO\" ILIKE '%parafuso%'",
+    "busca_descricao_indice": "SELECT COUNT(DISTINCT \"CHAVE DE ACESSO\") FROM notas_fiscais_info WHERE \"DESCRIÇÃO DO PRODUTO/SERVIÇO\" IN (SELECT \"DESCRIÇÃO DO PRODUTO/SERVIÇO\" FROM buscar_descricoes('parafuso'))",
+    "notas_acima_de_100_mil": 'SELECT "CHAVE DE ACESSO", "VALOR NOTA FISCAL" FROM notas_fiscais_cabecalho WHERE "VALOR NOTA FISCAL" > 100000',
+}
+
+# Execuções de cada query (vale a mediana)
+QUERY_REPEATS = 5
+
+# Linha de base gravada com --update-baseline
+BASELINE_FILE = Path(__file__).resolve().parent / "benchmarks" / "baseline.json"
+
+# Uma métrica é regressão se passar da linha de base em mais que a tolerância
+# (e, nos tempos, em mais que REGRESSION_MIN_SECONDS, para ignorar ruído)
+DEFAULT_TOLERANCE = 0.5
+REGRESSION_MIN_SECONDS = 0.02
+
+
+def peak_rss_mb() -> float | None:
+    """
+    Pico de memória residente (MB) do processo atual e dos processos filhos
+    já finalizados. None onde o módulo resource não existe (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss vem em bytes no macOS e em KB no Linux
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _ingest_worker(loader_name: str, source_dir: str, duckdb_file: str) -> dict:
+    """
+    Carga medida em um processo novo, para que o pico de memória seja só o
+    dela.
+    """
+    from tools.load_and_treat_data import load_csvs_into_duckdb, load_zips_into_duckdb
+
+    conn = duckdb.connect(duckdb_file)
+    start = time.perf_counter()
+    if loader_name == "load_zips_into_duckdb":
+        load_zips_into_duckdb(conn, zip_dir=Path(source_dir))
+    else:
+        load_csvs_into_duckdb(conn, csv_dir=Path(source_dir))
+    elapsed = time.perf_counter() - start
+    conn.close()
+    rss = peak_rss_mb()
+    return {"seconds": round(elapsed, 4), "peak_rss_mb": rss and round(rss, 1)}
+
+
+def measure_ingest(loader_name: str, source_dir: Path, duckdb_file: Path) -> dict:
+    """
+    Mede o tempo e o pico de memória de uma carga completa em um banco novo.
+
+    Args:
+    loader_name(str): "load_zips_into_duckdb" ou "load_csvs_into_duckdb".
+    source_dir(Path): Pasta com os .zip's ou .csv's.
+    duckdb_file(Path): Banco .duckdb criado pela carga.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(
+            _ingest_worker, loader_name, str(source_dir), str(duckdb_file)
+        ).result()
+
+
+def measure_queries(duckdb_file: Path, repeats: int = QUERY_REPEATS) -> dict:
+    """
+    Latência mediana (segundos) de cada query de BENCHMARK_QUERIES.
+    """
+    conn = duckdb.connect(str(duckdb_file), read_only=True)
+    latencies = {}
+    try:
+        for name, query in BENCHMARK_QUERIES.items():
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                conn.execute(query).fetchall()
+                timings.append(time.perf_counter() - start)
+            latencies[name] = round(statistics.median(timings), 6)
+    finally:
+        conn.close()
+    return latencies
+
+
+def run_profile(profile: dict, work_dir: Path) -> dict:
+    """
+    Gera os dados sintéticos de um perfil e mede as duas cargas e as queries.
+    """
+    zip_dir, csv_dir = work_dir / "zips", work_dir / "csvs"
+    generate_synthetic_nfes(zip_dir, items_per_invoice=REAL_ITEMS_PER_INVOICE, **profile)
+    generate_synthetic_nfes(
+        csv_dir, items_per_invoice=REAL_ITEMS_PER_INVOICE, compress=False, **profile
+    )
+
+    results = {
+        "load_zips_into_duckdb": measure_ingest(
+            "load_zips_into_duckdb", zip_dir, work_dir / "zips.duckdb"
+        ),
+        "load_csvs_into_duckdb": measure_ingest(
+            "load_csvs_into_duckdb", csv_dir, work_dir / "csvs.duckdb"
+        ),
+    }
+    results["queries"] = measure_queries(work_dir / "zips.duckdb")
+    return results
+
+
+def current_environment() -> dict:
+    """
+    Máquina e versão do DuckDB em que o benchmark está rodando, no formato
+    gravado na linha de base.
+    """
+    return {
+        "machine": f"{platform.system()} {platform.machine()}, Python {platform.python_version()}",
+        "duckdb": duckdb.__version__,
+    }
+
+
+def environment_mismatches(baseline: dict) -> list[str]:
+    """
+    Diferenças entre o ambiente da linha de base e o atual (tempos medidos em
+    outra máquina ou versão do DuckDB não são comparáveis).
+    """
+    return [
+        f"{key}: {baseline.get(key)} na linha de base, {value} agora"
+        for key, value in current_environment().items()
+        if baseline.get(key) != value
+    ]
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Compara os resultados com a linha de base e descreve as métricas que
+    pioraram além da tolerância.
+    """
+    regressions = []
+
+    def check(label, current, reference, is_seconds):
+        if current is None or reference is None:
+            return
+        limit = reference * (1 + tolerance)
+        if is_seconds:
+            limit = max(limit, reference + REGRESSION_MIN_SECONDS)
+        if current > limit:
+            unit = "s" if is_seconds else " MB"
+            regressions.append(
+                f"{label}: {current:.3f}{unit} (linha de base {reference:.3f}{unit})"
+            )
+
+    for profile, measured in results.items():
+        reference = baseline.get("profiles", {}).get(profile)
+        if reference is None:
+            continue
+        for loader in ("load_zips_into_duckdb", "load_csvs_into_duckdb"):
+            if loader in reference:
+                check(f"{profile} {loader} tempo", measured[loader]["seconds"],
+                      reference[loader]["seconds"], True)
+                check(f"{profile} {loader} memória", measured[loader]["peak_rss_mb"],
+                      reference[loader]["peak_rss_mb"], False)
+        for query, seconds in measured["queries"].items():
+            check(f"{profile} query {query}", seconds,
+                  reference.get("queries", {}).get(query), True)
+
+    return regressions
+
+
+def print_results(results: dict):
+    for profile, measured in results.items():
+        print(f"\n📦 Perfil {profile}")
+        for loader in ("load_zips_into_duckdb", "load_csvs_into_duckdb"):
+            rss = measured[loader]["peak_rss_mb"]
+            rss_text = f"{rss:.0f} MB" if rss is not None else "n/d"
+            print(f"  {loader}: {measured[loader]['seconds']:.2f}s, pico de memória {rss_text}")
+        for query, seconds in measured["queries"].items():
+            print(f"  query {query}: {seconds * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark da carga e das queries com notas fiscais sintéticas."
+    )
+    parser.add_argument(
+        "--profiles", nargs="+", choices=list(BENCHMARK_PROFILES),
+        default=list(BENCHMARK_PROFILES),
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument(
+        "--update-baseline", action="store_true",
+        help="Grava os resultados como a nova linha de base."
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE,
+        help="Piora relativa aceita antes de acusar regressão (0.5 = 50%%)."
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.profiles:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results[name] = run_profile(BENCHMARK_PROFILES[name], Path(work_dir))
+    print_results(results)
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({
+            **current_environment(),
+            "profiles": results,
+        }, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"\n✔️ Linha de base gravada em {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print("\n⚠️ Sem linha de base para comparar (use --update-baseline).")
+        return
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    mismatches = environment_mismatches(baseline)
+    regressions = find_regressions(results, baseline, args.tolerance)
+
+    if mismatches:
+        # Outra máquina: as diferenças são só informativas, não falham o
+        # benchmark
+        print("\n⚠️ Linha de base gravada em outro ambiente (use --update-baseline nesta máquina):")
+        for mismatch in mismatches:
+            print(f"  - {mismatch}")
+        if regressions:
+            print("⚠️ Diferenças em relação à linha de base (não comparáveis):")
+            for regression in regressions:
+                print(f"  - {regression}")
+        return
+
+    if regressions:
+        print("\n⚠️ Regressões em relação à linha de base:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print("\n✔️ Sem regressões em relação à linha de base.")
+
+
+if __name__ == "__main__":
+    main()
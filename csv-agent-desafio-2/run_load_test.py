@@ -0,0 +1,154 @@
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.runnables import RunnableLambda
+
+from run_server import (
+    DEFAULT_POOL_SIZE, create_server, ingest_in_writer_process, load_agent
+)
+from tools.ingestion import DUCKDB_FILE, PARQUET_CACHE_DIR
+from tools.result_cache import QueryResultCache
+
+
+# Perguntas do teste e a query que a LLM simulada "gera" para cada uma
+STUB_QUERIES = {
+    "Quantas notas fiscais existem?":
+        'SELECT COUNT(*) FROM notas_fiscais_cabecalho',
+    "Qual o valor total das notas por UF emitente?":
+        'SELECT "UF EMITENTE", SUM("VALOR NOTA FISCAL") FROM notas_fiscais_cabecalho GROUP BY 1 ORDER BY 2 DESC',
+    "Quais os 5 maiores emitentes em valor?":
+        'SELECT "RAZÃO SOCIAL EMITENTE", SUM("VALOR NOTA FISCAL") AS total FROM notas_fiscais_cabecalho GROUP BY 1 ORDER BY total DESC LIMIT 5',
+    "Quantos itens por CFOP?":
+        'SELECT "CFOP", COUNT(*) FROM notas_fiscais_info GROUP BY 1 ORDER BY 2 DESC',
+    "Qual o produto mais vendido em quantidade?":
+        'SELECT "DESCRIÇÃO DO PRODUTO/SERVIÇO", SUM("QUANTIDADE") AS q FROM notas_fiscais_itens GROUP BY 1 ORDER BY q DESC LIMIT 1',
+    "Quantas notas por dia de emissão?":
+        'SELECT CAST("DATA EMISSÃO" AS DATE) AS dia, COUNT(*) FROM notas_fiscais_cabecalho GROUP BY dia ORDER BY dia',
+    "Qual o valor médio dos itens por NCM?":
+        'SELECT "NCM/SH (TIPO DE PRODUTO)", AVG("VALOR TOTAL") FROM notas_fiscais_info GROUP BY 1 ORDER BY 2 DESC LIMIT 10',
+    "Quais notas têm valor acima de 100 mil?":
+        'SELECT "CHAVE DE ACESSO", "VALOR NOTA FISCAL" FROM notas_fiscais_cabecalho WHERE "VALOR NOTA FISCAL" > 100000',
+}
+
+
+def make_stub_llm(latency_seconds: float):
+    """
+    LLM simulada: devolve a query de STUB_QUERIES na geração de SQL e um texto
+    fixo na análise, após latency_seconds (imitando a latência da API).
+    """
+    def respond(prompt_value) -> str:
+        time.sleep(latency_seconds)
+        human_message = prompt_value.to_messages()[-1].content
+        if human_message.endswith("SQL Query:"):
+            question = human_message.removesuffix("\nSQL Query:")
+            return STUB_QUERIES.get(question, "SELECT 1")
+        return "Resposta simulada."
+
+    return RunnableLambda(respond)
+
+
+def ask(url: str, question: str) -> tuple[float, bool]:
+    """
+    Envia uma pergunta ao serviço e devolve (latência em segundos, sucesso).
+    """
+    request = urllib.request.Request(
+        url, data=json.dumps({"question": question}).encode("utf-8"),
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            ok = response.status == 200
+            response.read()
+    except OSError:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Teste de carga do serviço HTTP com uma LLM simulada."
+    )
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.05,
+        help="Latência simulada de cada chamada à LLM (segundos)."
+    )
+    parser.add_argument("--skip-ingestion", action="store_true")
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help=(
+            "Desativa os caches de queries SQL e de resultados, para medir o "
+            "caminho completo (LLM simulada + DuckDB) em toda requisição."
+        )
+    )
+    args = parser.parse_args()
+
+    if not args.skip_ingestion:
+        ingest_in_writer_process(DUCKDB_FILE, PARQUET_CACHE_DIR)
+
+    agent = load_agent(args.pool_size)
+    # As chains são montadas na primeira pergunta, já com a LLM simulada
+    stub_llm = make_stub_llm(args.llm_latency)
+    agent.get_llm = lambda: stub_llm
+
+    if args.no_cache:
+        # As perguntas se repetem a cada len(STUB_QUERIES) requisições: sem
+        # desativar os caches, quase tudo seria servido por eles. As queries
+        # geradas continuam sendo gravadas, como em uma falha de cache real
+        agent.get_sql_query_cache().enabled = False
+        agent.query_result_cache = QueryResultCache(max_bytes=0)
+
+    # Porta 0: o sistema escolhe uma porta livre
+    server = create_server(agent, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/ask"
+
+    questions = list(STUB_QUERIES)
+    workload = [questions[i % len(questions)] for i in range(args.requests)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(lambda question: ask(url, question), workload))
+    elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    server.server_close()
+    agent.tracer.write_metrics()
+    agent.get_engine().dispose()
+
+    sql_cache_stats = agent.get_sql_query_cache().stats()
+    result_cache_stats = agent.query_result_cache.stats()
+
+    latencies = [latency for latency, ok in results if ok]
+    errors = sum(1 for _, ok in results if not ok)
+    print(f"Requisições: {len(results)} ({errors} erro(s)) em {elapsed:.2f}s")
+    print(f"Vazão: {len(results) / elapsed:.1f} req/s (concorrência {args.concurrency}, pool {args.pool_size})")
+    if latencies:
+        print(
+            f"Latência: p50 {statistics.median(latencies) * 1000:.0f} ms, "
+            f"p95 {percentile(latencies, 0.95) * 1000:.0f} ms, "
+            f"máx {max(latencies) * 1000:.0f} ms"
+        )
+    print(
+        f"Acertos de cache: {sql_cache_stats['hit_rate']:.0%} das queries SQL, "
+        f"{result_cache_stats['hit_rate']:.0%} dos resultados"
+        + (" (caches desativados)" if args.no_cache else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+import duckdb
+
+import tools.load_and_treat_data as load_and_treat_data
+from tools.load_and_treat_data import (
+    CABECALHO_TABLE, ITENS_TABLE, STAGING_DIR, load_zips_into_duckdb, sql_string
+)
+
+
+# .zip de exemplo copiado para PERIODS períodos, para que a carga em pool
+# tenha mais de uma tarefa
+SAMPLE_ZIP = Path(__file__).resolve().parent / "data" / "202401_NFs.zip"
+SAMPLE_PERIOD = "202401"
+PERIODS = ("202401", "202402", "202403")
+
+
+def write_sample_zips(zip_dir: Path):
+    """
+    Grava um .zip por período de PERIODS, com os membros do .zip de exemplo
+    renomeados para o período.
+    """
+    with zipfile.ZipFile(SAMPLE_ZIP) as sample:
+        for period in PERIODS:
+            with zipfile.ZipFile(zip_dir / f"{period}_NFs.zip", "w") as target:
+                for name in sample.namelist():
+                    target.writestr(name.replace(SAMPLE_PERIOD, period), sample.read(name))
+
+
+def load(db_file: Path, zip_dir: Path, mode: str, max_workers: int) -> list:
+    """
+    Carrega os .zip's em um banco novo e devolve os tamanhos pedidos a
+    _staging_dir durante a carga (lista vazia: nada foi gravado em .parquet's
+    temporários).
+    """
+    staging_calls = []
+    staging_dir = load_and_treat_data._staging_dir
+
+    def recording_staging_dir(expected_bytes):
+        staging_calls.append(expected_bytes)
+        return staging_dir(expected_bytes)
+
+    load_and_treat_data._staging_dir = recording_staging_dir
+    try:
+        with duckdb.connect(str(db_file)) as conn:
+            load_zips_into_duckdb(
+                conn, mode=mode, max_workers=max_workers, zip_dir=zip_dir
+            )
+    finally:
+        load_and_treat_data._staging_dir = staging_dir
+    return staging_calls
+
+
+def different_rows(reference: Path, other: Path) -> dict[str, int]:
+    """
+    Linhas que aparecem em só um dos bancos, por tabela.
+    """
+    with duckdb.connect(str(reference), read_only=True) as conn:
+        conn.execute(f"ATTACH {sql_string(str(other))} AS other (READ_ONLY)")
+        return {
+            table_name: conn.execute(f"""
+                SELECT count(*) FROM (
+                    (SELECT * FROM {table_name} EXCEPT ALL SELECT * FROM other.{table_name})
+                    UNION ALL
+                    (SELECT * FROM other.{table_name} EXCEPT ALL SELECT * FROM {table_name})
+                )
+            """).fetchone()[0]
+            for table_name in (CABECALHO_TABLE, ITENS_TABLE)
+        }
+
+
+def check_loader(work_dir: Path) -> list[str]:
+    """
+    Carrega os mesmos .zip's sem pool (nos modos duckdb e pandas) e em pool e
+    confere que só a carga em pool grava .parquet's temporários e que as
+    tabelas ficam iguais. Devolve os problemas encontrados (lista vazia: tudo
+    certo).
+    """
+    zip_dir = work_dir / "zips"
+    zip_dir.mkdir()
+    write_sample_zips(zip_dir)
+
+    failures = []
+    reference = work_dir / "pool.duckdb"
+    if not load(reference, zip_dir, "duckdb", max_workers=len(PERIODS)):
+        failures.append("carga em pool não passou por _staging_dir")
+
+    for mode in ("duckdb", "pandas"):
+        db_file = work_dir / f"sem_pool_{mode}.duckdb"
+        if load(db_file, zip_dir, mode, max_workers=1):
+            failures.append(f"carga sem pool ({mode}) gravou .parquet's temporários")
+        for table_name, count in different_rows(reference, db_file).items():
+            if count:
+                failures.append(
+                    f"carga sem pool ({mode}): {count} linha(s) diferente(s) "
+                    f"em {table_name}"
+                )
+    return failures
+
+
+def check_staging_dir() -> list[str]:
+    """
+    Confere a escolha da pasta dos .parquet's temporários: STAGING_DIR só
+    quando existe e tem espaço livre; senão, a pasta temporária padrão.
+    """
+    failures = []
+    if load_and_treat_data._staging_dir(2 ** 62) is not None:
+        failures.append(f"{STAGING_DIR} escolhido sem espaço livre")
+
+    expected = STAGING_DIR if Path(STAGING_DIR).is_dir() else None
+    if load_and_treat_data._staging_dir(1) != expected:
+        failures.append(f"pasta com espaço livre não escolhida (esperado: {expected})")
+    return failures
+
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        failures = check_loader(Path(work_dir)) + check_staging_dir()
+
+    if failures:
+        print(f"⚠️ {len(failures)} problema(s) na carga:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    print(
+        f"✔️ Carga: {len(PERIODS)} períodos iguais com e sem pool, .parquet's "
+        f"temporários só em pool"
+    )
+
+
+if __name__ == "__main__":
+    main()
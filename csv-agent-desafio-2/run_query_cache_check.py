@@ -0,0 +1,88 @@
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+from tools.query_cache import SQL_CACHE_TABLE, SqlQueryCache
+
+
+# Threads e consultas por thread (mesmo volume em que os acertos
+# concorrentes na mesma pergunta falhavam com "Conflict on update")
+THREADS = 8
+GETS_PER_THREAD = 30
+
+
+def check_concurrent_gets(engine) -> list[str]:
+    """
+    Várias threads consultam a mesma pergunta ao mesmo tempo (como no modo
+    em lote com perguntas repetidas), enquanto outra grava e descarta
+    perguntas. Devolve os problemas encontrados (lista vazia: tudo certo).
+    """
+    cache = SqlQueryCache(engine, "check")
+    cache.put("Quantas notas existem?", "SELECT COUNT(*) FROM notas_fiscais_cabecalho")
+
+    def get_repeatedly(_):
+        return [cache.get("Quantas notas existem?") for _ in range(GETS_PER_THREAD)]
+
+    def write_repeatedly(_):
+        for index in range(GETS_PER_THREAD):
+            cache.put(f"pergunta {index}", "SELECT 1")
+            cache.discard(f"pergunta {index}")
+        return []
+
+    failures = []
+    with ThreadPoolExecutor(max_workers=THREADS + 1) as executor:
+        futures = [executor.submit(get_repeatedly, index) for index in range(THREADS)]
+        futures.append(executor.submit(write_repeatedly, THREADS))
+        for future in futures:
+            try:
+                results = future.result()
+            except Exception as e:
+                failures.append(f"exceção em uma thread: {e}")
+                continue
+            if any(result is None for result in results):
+                failures.append("consulta sem a query guardada")
+
+    expected = THREADS * GETS_PER_THREAD
+    stats = cache.stats()
+    if stats["hits"] != expected or stats["misses"] != 0:
+        failures.append(
+            f"contadores: {stats['hits']} acerto(s) e {stats['misses']} falha(s) "
+            f"(esperado: {expected} e 0)"
+        )
+    with engine.connect() as connection:
+        hits = connection.execute(
+            text(f"SELECT hits FROM {SQL_CACHE_TABLE} WHERE question = :question"),
+            {"question": "Quantas notas existem?"},
+        ).scalar()
+    if hits != expected:
+        failures.append(f"hits gravados: {hits} (esperado: {expected})")
+    return failures
+
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        engine = create_engine(
+            f"duckdb:///{Path(work_dir) / 'cache.duckdb'}",
+            pool_size=THREADS + 1, max_overflow=0,
+        )
+        try:
+            failures = check_concurrent_gets(engine)
+        finally:
+            engine.dispose()
+
+    if failures:
+        print(f"⚠️ {len(failures)} problema(s) no cache de queries SQL:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    print(
+        f"✔️ Cache de queries SQL: {THREADS} threads x {GETS_PER_THREAD} "
+        f"consultas concorrentes, sem erros"
+    )
+
+
+if __name__ == "__main__":
+    main()
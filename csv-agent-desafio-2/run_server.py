@@ -0,0 +1,162 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tools.ingestion import DUCKDB_FILE, PARQUET_CACHE_DIR, ingest_data
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# Conexões somente leitura abertas com o banco (queries em paralelo)
+DEFAULT_POOL_SIZE = 8
+
+
+def ingest_in_writer_process(duckdb_file: str, parquet_cache_dir):
+    """
+    Faz a carga dos dados em um processo separado, o único que abre o banco
+    para escrita. Ao terminar, o processo libera o arquivo e o servidor pode
+    abri-lo somente para leitura.
+    """
+    writer = multiprocessing.get_context("spawn").Process(
+        target=ingest_data, args=(duckdb_file, parquet_cache_dir)
+    )
+    writer.start()
+    writer.join()
+    if writer.exitcode != 0:
+        raise RuntimeError(f"A carga dos dados falhou (código {writer.exitcode})")
+
+
+def load_agent(pool_size: int = DEFAULT_POOL_SIZE):
+    """
+    Importa o agente (run_agent.py) em modo somente leitura, com um pool de
+    pool_size conexões ao banco.
+    """
+    os.environ["AGENT_DB_READ_ONLY"] = "1"
+    os.environ["AGENT_DB_POOL_SIZE"] = str(pool_size)
+    import run_agent
+
+    # Abre o banco (somente leitura) antes de aceitar requisições
+    run_agent.init_database()
+    return run_agent
+
+
+def create_server(agent, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """
+    Cria o servidor HTTP (uma thread por requisição) que expõe o agente:
+
+    - POST /ask com {"question": "..."} devolve a query SQL gerada e a
+      resposta.
+    - GET /health devolve o estado do serviço e dos caches.
+    - GET /metrics devolve as métricas por etapa no formato do Prometheus.
+
+    Args:
+    agent(module): Módulo run_agent já carregado (ver load_agent).
+    host(str): Endereço de escuta.
+    port(int): Porta de escuta.
+    """
+
+    class AgentRequestHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                payload = agent.tracer.metrics_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+            if self.path != "/health":
+                self._send_json(404, {"error": "not found"})
+                return
+            self._send_json(200, {
+                "status": "ok",
+                "sql_cache": agent.get_sql_query_cache().stats(),
+                "result_cache": agent.query_result_cache.stats(),
+            })
+
+        def do_POST(self):
+            if self.path != "/ask":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                question = json.loads(self.rfile.read(length) or b"{}").get("question")
+            except (ValueError, AttributeError):
+                question = None
+            if not question:
+                self._send_json(400, {"error": "send a JSON body with a 'question' field"})
+                return
+
+            start = time.perf_counter()
+            try:
+                state = agent.agent_chain.invoke({"question": question})
+            except Exception as e:
+                self._send_json(500, {"question": question, "error": str(e)})
+                return
+
+            self._send_json(200, {
+                "question": question,
+                "sql_query": state.get("sql_query"),
+                "sql_from_cache": state.get("sql_from_cache"),
+                "generation_input_tokens": state.get("generation_input_tokens"),
+                "answer": state.get("final_answer"),
+                "elapsed_seconds": round(time.perf_counter() - start, 3),
+            })
+
+        def _send_json(self, status: int, body: dict):
+            payload = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            # Sem um log por requisição no terminal
+            pass
+
+    server = ThreadingHTTPServer((host, port), AgentRequestHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serviço HTTP do agente de notas fiscais (várias pessoas ao mesmo tempo)."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+        help="Quantidade de conexões somente leitura com o banco."
+    )
+    parser.add_argument(
+        "--skip-ingestion", action="store_true",
+        help="Não roda a carga antes de iniciar (banco já atualizado)."
+    )
+    args = parser.parse_args()
+
+    if not args.skip_ingestion:
+        ingest_in_writer_process(DUCKDB_FILE, PARQUET_CACHE_DIR)
+
+    agent = load_agent(args.pool_size)
+    server = create_server(agent, args.host, args.port)
+    print(f"✔️ Servidor disponível em http://{args.host}:{args.port} (POST /ask)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        agent.tracer.write_metrics()
+        agent.get_engine().dispose()
+
+
+if __name__ == "__main__":
+    main()
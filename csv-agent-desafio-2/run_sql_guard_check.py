@@ -0,0 +1,94 @@
+import sys
+
+import duckdb
+
+from run_benchmark import BENCHMARK_QUERIES
+from tools.description_index import refresh_description_index
+from tools.load_and_treat_data import (
+    ITENS_TABLE, create_notas_fiscais_tables, create_notas_fiscais_view
+)
+from tools.sql_guard import QueryRejected, preflight_query
+
+
+# Queries que a verificação prévia precisa recusar: escrita, leitura de
+# arquivos por função de tabela e por caminho no FROM (replacement scan)
+REJECTED_QUERIES = {
+    "caminho_entre_aspas": "SELECT * FROM '/etc/passwd'",
+    "caminho_entre_aspas_duplas": 'SELECT * FROM "/etc/passwd"',
+    "caminho_windows": "SELECT * FROM 'C:\\dados\\notas.csv'",
+    "arquivo_relativo": "SELECT * FROM 'notas.csv'",
+    "arquivo_em_subquery": (
+        'SELECT COUNT(*) FROM notas_fiscais_cabecalho '
+        "WHERE \"CHAVE DE ACESSO\" IN (SELECT * FROM 'chaves.parquet')"
+    ),
+    "arquivo_em_cte": "WITH x AS (SELECT * FROM '/etc/passwd') SELECT * FROM x",
+    "arquivo_em_join": (
+        "SELECT * FROM notas_fiscais_cabecalho AS c "
+        "JOIN 'data/extra.csv' AS e ON c.\"CHAVE DE ACESSO\" = e.chave"
+    ),
+    "funcao_read_csv": "SELECT * FROM read_csv('/etc/passwd')",
+    "tabela_inexistente": "SELECT * FROM tabela_que_nao_existe",
+    "escrita": "DELETE FROM notas_fiscais_cabecalho",
+    "copy": "COPY notas_fiscais_cabecalho TO '/tmp/notas.csv'",
+}
+
+# Queries legítimas, que precisam continuar passando
+ACCEPTED_QUERIES = {
+    **BENCHMARK_QUERIES,
+    "cte": (
+        'WITH por_uf AS (SELECT "UF EMITENTE" AS uf, COUNT(*) AS n '
+        'FROM notas_fiscais_cabecalho GROUP BY 1) SELECT * FROM por_uf'
+    ),
+    "schema_qualificado": "SELECT COUNT(*) FROM main.notas_fiscais_itens",
+    "range": "SELECT * FROM range(10)",
+}
+
+
+def check_sql_guard(conn: duckdb.DuckDBPyConnection) -> list[str]:
+    """
+    Passa as queries de REJECTED_QUERIES e ACCEPTED_QUERIES pela verificação
+    prévia e devolve as que tiveram o resultado errado (lista vazia: tudo
+    certo).
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Banco com as tabelas de notas fiscais.
+    """
+    failures = []
+    for name, query in REJECTED_QUERIES.items():
+        try:
+            preflight_query(conn, query)
+            failures.append(f"{name}: aceita, mas deveria ser recusada")
+        except QueryRejected:
+            pass
+        except Exception as e:
+            # Passou pela verificação e só falhou no DuckDB
+            failures.append(f"{name}: não recusada pela verificação ({e})")
+    for name, query in ACCEPTED_QUERIES.items():
+        try:
+            preflight_query(conn, query)
+        except Exception as e:
+            failures.append(f"{name}: recusada ({e})")
+    return failures
+
+
+def main():
+    # Banco em memória só com as tabelas, a view e a macro de busca (vazias)
+    conn = duckdb.connect()
+    create_notas_fiscais_tables(conn)
+    create_notas_fiscais_view(conn)
+    refresh_description_index(conn, ITENS_TABLE)
+
+    failures = check_sql_guard(conn)
+    if failures:
+        print(f"⚠️ {len(failures)} query(s) com resultado errado na verificação prévia:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    print(
+        f"✔️ Verificação prévia: {len(REJECTED_QUERIES)} query(s) recusada(s) e "
+        f"{len(ACCEPTED_QUERIES)} aceita(s), como esperado"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,515 @@
+import copy
+import json
+import re
+from dataclasses import dataclass
+
+import duckdb
+
+from tools.load_and_treat_data import (
+    CABECALHO_TABLE, NOTAS_FISCAIS_VIEW, PARQUET_VIEW_SUFFIX, PERIOD_COLUMN,
+    mark_periods_current, sql_string
+)
+
+
+# Coluna de data das notas. Nas tabelas de resumo ela é truncada no dia, então
+# só pode ser usada em funções que não olham o horário (ver _is_day_safe).
+DATE_COLUMN = "DATA EMISSÃO"
+
+# Dimensões derivadas da data de emissão, calculadas na carga dos resumos
+# (os mesmos nomes expostos pelas views *_parquet)
+DERIVED_DIMENSIONS = {
+    "ANO EMISSÃO": f'year("{DATE_COLUMN}")',
+    "MÊS EMISSÃO": f'month("{DATE_COLUMN}")',
+    DATE_COLUMN: f"date_trunc('day', \"{DATE_COLUMN}\")",
+}
+
+# Funções de data cujo resultado não depende do horário
+DAY_SAFE_FUNCTIONS = {
+    "year", "month", "day", "dayofmonth", "quarter", "week", "weekofyear",
+    "yearweek", "dayofweek", "isodow", "dayofyear", "dayname", "monthname",
+    "last_day",
+}
+DAY_SAFE_PARTS = {"day", "week", "month", "quarter", "year"}
+DAY_SAFE_STRFTIME = re.compile(r"^(?:[^%]|%[YymdBbjaAUWe%])*$")
+
+HEADER_SOURCES = (CABECALHO_TABLE, f"{CABECALHO_TABLE}{PARQUET_VIEW_SUFFIX}")
+INFO_SOURCES = (NOTAS_FISCAIS_VIEW, f"{NOTAS_FISCAIS_VIEW}{PARQUET_VIEW_SUFFIX}")
+
+
+@dataclass(frozen=True)
+class Measure:
+    """
+    Medida pré-agregada de uma tabela de resumo.
+
+    Args:
+    column(str): Nome da coluna na tabela de resumo.
+    build_sql(str): Agregação usada para calcular a coluna na carga.
+    aggregate(tuple): Agregação da query original que ela responde
+        (função, coluna, distinct).
+    reaggregate_sql(str): Expressão que substitui a agregação original.
+    sources(tuple[str, ...] | None): Tabelas/views de origem em que a
+        substituição é exata (None: todas as do resumo).
+    """
+    column: str
+    build_sql: str
+    aggregate: tuple
+    reaggregate_sql: str
+    sources: tuple[str, ...] | None = None
+
+
+@dataclass(frozen=True)
+class SummaryTable:
+    """
+    Tabela de resumo: o conteúdo de base_table agregado pelas dimensões.
+
+    Args:
+    name(str): Nome da tabela de resumo no banco.
+    base_table(str): Tabela/view de onde os dados são agregados.
+    dimensions(tuple[str, ...]): Colunas de agrupamento.
+    measures(tuple[Measure, ...]): Medidas pré-agregadas.
+    sources(tuple[str, ...]): Tabelas/views cujas queries o resumo responde.
+    """
+    name: str
+    base_table: str
+    dimensions: tuple[str, ...]
+    measures: tuple[Measure, ...]
+    sources: tuple[str, ...]
+
+
+def _count_measure(sources=None) -> Measure:
+    return Measure(
+        "QTD LINHAS", "count(*)", ("count_star", None, False),
+        'CAST(coalesce(sum("QTD LINHAS"), 0) AS BIGINT)', sources
+    )
+
+
+def _value_measures(column: str, sources=None) -> tuple[Measure, ...]:
+    # Somar as somas parciais é exato (os valores são decimais); mínimo e
+    # máximo se reagregam com eles mesmos
+    return (
+        Measure(f"SOMA {column}", f'sum("{column}")', ("sum", column, False),
+                f'sum("SOMA {column}")', sources),
+        Measure(f"MIN {column}", f'min("{column}")', ("min", column, False),
+                f'min("MIN {column}")', sources),
+        Measure(f"MAX {column}", f'max("{column}")', ("max", column, False),
+                f'max("MAX {column}")', sources),
+    )
+
+
+# Medidas por nota (cabeçalho). Em notas_fiscais_info o cabeçalho se repete em
+# cada item, então lá só a contagem de notas distintas é equivalente.
+HEADER_MEASURES = (
+    _count_measure(HEADER_SOURCES),
+    Measure(
+        "QTD NOTAS", 'count(DISTINCT "CHAVE DE ACESSO")',
+        ("count", "CHAVE DE ACESSO", True),
+        'CAST(coalesce(sum("QTD NOTAS"), 0) AS BIGINT)'
+    ),
+    *_value_measures("VALOR NOTA FISCAL", HEADER_SOURCES),
+)
+
+# Medidas por item (linhas de notas_fiscais_info)
+ITEM_MEASURES = (
+    _count_measure(),
+    *_value_measures("QUANTIDADE"),
+    *_value_measures("VALOR UNITÁRIO"),
+    *_value_measures("VALOR TOTAL"),
+)
+
+PERIOD_DIMENSIONS = (PERIOD_COLUMN, "ANO EMISSÃO", "MÊS EMISSÃO")
+
+# Resumos disponíveis. Todos incluem o PERÍODO, o que permite atualizá-los
+# período a período quando novos arquivos são carregados.
+SUMMARY_TABLES = (
+    SummaryTable(
+        "resumo_notas_dia_uf", CABECALHO_TABLE,
+        (*PERIOD_DIMENSIONS, DATE_COLUMN, "UF EMITENTE", "UF DESTINATÁRIO"),
+        HEADER_MEASURES, HEADER_SOURCES + INFO_SOURCES,
+    ),
+    SummaryTable(
+        "resumo_notas_emitente_mes", CABECALHO_TABLE,
+        (*PERIOD_DIMENSIONS, "UF EMITENTE", "MUNICÍPIO EMITENTE",
+         "CPF/CNPJ Emitente", "RAZÃO SOCIAL EMITENTE", "UF DESTINATÁRIO"),
+        HEADER_MEASURES, HEADER_SOURCES + INFO_SOURCES,
+    ),
+    SummaryTable(
+        "resumo_itens_dia_uf_cfop", NOTAS_FISCAIS_VIEW,
+        (*PERIOD_DIMENSIONS, DATE_COLUMN, "UF EMITENTE", "UF DESTINATÁRIO",
+         "CFOP"),
+        ITEM_MEASURES, INFO_SOURCES,
+    ),
+    SummaryTable(
+        "resumo_itens_ncm_mes", NOTAS_FISCAIS_VIEW,
+        (*PERIOD_DIMENSIONS, "UF EMITENTE", "UF DESTINATÁRIO", "CFOP",
+         "CÓDIGO NCM/SH", "NCM/SH (TIPO DE PRODUTO)"),
+        ITEM_MEASURES, INFO_SOURCES,
+    ),
+)
+
+# Agregações que, aplicadas a dimensões, dão o mesmo resultado no resumo
+DIMENSION_AGGREGATES = {"min", "max", "first", "any_value", "arbitrary"}
+
+# Nome das tabelas de resumo no registro de versão por período (ver
+# stale_periods em tools/load_and_treat_data.py)
+SUMMARY_TARGET = "resumos"
+
+
+def refresh_summary_tables(
+        conn: duckdb.DuckDBPyConnection,
+        periods: list[str] | None = None
+    ):
+    """
+    Cria/atualiza as tabelas de resumo (SUMMARY_TABLES).
+
+    Apenas os períodos recarregados são recalculados; resumos que ainda não
+    existem (ou cuja definição mudou) são criados por completo. A versão dos
+    períodos recalculados é registrada na mesma transação, então uma
+    atualização interrompida é refeita na próxima ingestão.
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    periods(list[str] | None): Períodos a recalcular (normalmente
+        stale_periods(conn, SUMMARY_TARGET)). None recalcula todos os
+        resumos; lista vazia só cria os que ainda não existem.
+    """
+    refreshed = []
+
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        for summary in SUMMARY_TABLES:
+            select_sql = _summary_select_sql(summary)
+
+            if periods is None or not _summary_is_current(conn, summary):
+                conn.execute(f"CREATE OR REPLACE TABLE {summary.name} AS {select_sql}")
+            elif periods:
+                periods_sql = ", ".join(sql_string(period) for period in periods)
+                conn.execute(f"""
+                    DELETE FROM {summary.name}
+                    WHERE "{PERIOD_COLUMN}" IN ({periods_sql})
+                """)
+                conn.execute(f"""
+                    INSERT INTO {summary.name} BY NAME
+                    {_summary_select_sql(summary, periods_sql)}
+                """)
+            else:
+                continue
+            refreshed.append(summary.name)
+        mark_periods_current(conn, SUMMARY_TARGET, periods)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    if refreshed:
+        print(f"✔️ Tabelas de resumo atualizadas: {', '.join(refreshed)}")
+
+
+def route_query(conn: duckdb.DuckDBPyConnection, sql_query: str) -> str:
+    """
+    Reescreve uma query de agregação sobre as notas para a menor tabela de
+    resumo capaz de respondê-la com o mesmo resultado. Queries não elegíveis
+    (joins, subqueries, janelas, colunas fora do resumo, agregações sem
+    equivalente...) são devolvidas sem alteração.
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    sql_query(str): Query gerada pela LLM.
+
+    Returns:
+    str: Query a ser executada (reescrita ou a original).
+    """
+    try:
+        parsed = json.loads(
+            conn.execute("SELECT json_serialize_sql(?)", [sql_query]).fetchone()[0]
+        )
+    except duckdb.Error:
+        return sql_query
+
+    if parsed.get("error") or len(parsed.get("statements", [])) != 1:
+        return sql_query
+
+    node = parsed["statements"][0]["node"]
+    if not _is_simple_aggregate(node):
+        return sql_query
+
+    source = node["from_table"]["table_name"]
+    candidates = [
+        summary for summary in SUMMARY_TABLES if source in summary.sources
+    ]
+    if not candidates:
+        return sql_query
+
+    sizes = _table_sizes(conn, [summary.name for summary in candidates])
+    for summary in sorted(candidates, key=lambda s: sizes.get(s.name, float("inf"))):
+        if summary.name not in sizes:
+            continue
+        rewritten = _rewrite_for_summary(conn, parsed, summary, source)
+        if rewritten is not None:
+            return rewritten
+
+    return sql_query
+
+
+def _summary_select_sql(summary: SummaryTable, periods_sql: str | None = None) -> str:
+    """
+    Consulta que calcula o resumo (de todos os períodos ou só dos informados).
+    """
+    dimensions = ", ".join(
+        f'{DERIVED_DIMENSIONS.get(column, f"{chr(34)}{column}{chr(34)}")} AS "{column}"'
+        for column in summary.dimensions
+    )
+    measures = ", ".join(
+        f'{measure.build_sql} AS "{measure.column}"' for measure in summary.measures
+    )
+    where = f'WHERE "{PERIOD_COLUMN}" IN ({periods_sql})' if periods_sql else ""
+    return f"""
+        SELECT {dimensions}, {measures}
+        FROM {summary.base_table}
+        {where}
+        GROUP BY ALL
+    """
+
+
+def _summary_is_current(conn: duckdb.DuckDBPyConnection, summary: SummaryTable) -> bool:
+    """
+    Verifica se o resumo existe no banco com as colunas e os tipos da
+    definição atual (os tipos mudam junto com os das tabelas de origem).
+    """
+    columns = conn.execute("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_name = ? ORDER BY ordinal_position
+    """, [summary.name]).fetchall()
+    expected = [
+        (row[0], row[1])
+        for row in conn.execute(f"DESCRIBE {_summary_select_sql(summary)}").fetchall()
+    ]
+    return columns == expected
+
+
+def _table_sizes(conn: duckdb.DuckDBPyConnection, table_names: list[str]) -> dict:
+    """
+    Quantidade (estimada) de linhas das tabelas existentes.
+    """
+    placeholders = ", ".join("?" for _ in table_names)
+    return dict(conn.execute(f"""
+        SELECT table_name, estimated_size FROM duckdb_tables()
+        WHERE table_name IN ({placeholders})
+    """, table_names).fetchall())
+
+
+def _is_simple_aggregate(node: dict) -> bool:
+    """
+    Verifica a forma da query: um único SELECT de agregação sobre uma única
+    tabela, sem CTEs, amostragem ou QUALIFY.
+    """
+    if node.get("type") != "SELECT_NODE":
+        return False
+    if node.get("cte_map", {}).get("map") or node.get("sample") or node.get("qualify"):
+        return False
+    from_table = node.get("from_table") or {}
+    if from_table.get("type") != "BASE_TABLE" or from_table.get("sample"):
+        return False
+    if from_table.get("schema_name") not in ("", "main") or from_table.get("at_clause"):
+        return False
+    if any(
+        modifier.get("type") not in ("ORDER_MODIFIER", "LIMIT_MODIFIER", "DISTINCT_MODIFIER")
+        for modifier in node.get("modifiers", [])
+    ):
+        return False
+    # Sem GROUP BY nem agregação, a query lê linhas individuais
+    return bool(node.get("group_expressions")) or _has_aggregate(node["select_list"])
+
+
+def _has_aggregate(value) -> bool:
+    if isinstance(value, dict):
+        if value.get("class") == "FUNCTION" and (
+            value.get("function_name") in {"count_star", "count", "sum"}
+            | DIMENSION_AGGREGATES
+        ):
+            return True
+        return any(_has_aggregate(child) for child in value.values())
+    if isinstance(value, list):
+        return any(_has_aggregate(child) for child in value)
+    return False
+
+
+def _rewrite_for_summary(
+        conn: duckdb.DuckDBPyConnection,
+        parsed: dict,
+        summary: SummaryTable,
+        source: str
+    ) -> str | None:
+    """
+    Reescreve a query para o resumo, ou None se o resumo não puder
+    respondê-la.
+    """
+    parsed = copy.deepcopy(parsed)
+    node = parsed["statements"][0]["node"]
+    from_table = node["from_table"]
+    qualifiers = {from_table["alias"] or source, source}
+    aliases = {
+        expression.get("alias") for expression in node["select_list"]
+        if expression.get("alias")
+    }
+    measures = {
+        measure.aggregate: measure for measure in summary.measures
+        if measure.sources is None or source in measure.sources
+    }
+    context = _RewriteContext(conn, summary, qualifiers, aliases, measures)
+
+    for key in ("select_list", "where_clause", "group_expressions", "having", "modifiers"):
+        if key in node and node[key] is not None:
+            node[key] = context.rewrite(
+                node[key],
+                allow_aliases=key in ("group_expressions", "having", "modifiers")
+            )
+            if context.failed:
+                return None
+
+    # Mantém o nome original como alias, para que colunas qualificadas com o
+    # nome da tabela continuem válidas
+    from_table["alias"] = from_table["alias"] or source
+    from_table["table_name"] = summary.name
+
+    return conn.execute(
+        "SELECT json_deserialize_sql(?)", [json.dumps(parsed)]
+    ).fetchone()[0]
+
+
+class _RewriteContext:
+    """
+    Percorre a árvore da query trocando as agregações pelas medidas do resumo
+    e verificando se todas as colunas usadas existem nele.
+    """
+
+    def __init__(self, conn, summary, qualifiers, aliases, measures):
+        self.conn = conn
+        self.summary = summary
+        self.qualifiers = qualifiers
+        self.aliases = aliases
+        self.measures = measures
+        self.failed = False
+
+    def rewrite(self, value, allow_aliases=False, day_safe=False):
+        if self.failed:
+            return value
+        if isinstance(value, list):
+            return [self.rewrite(item, allow_aliases, day_safe) for item in value]
+        if not isinstance(value, dict):
+            return value
+
+        expression_class = value.get("class")
+        if expression_class in ("SUBQUERY", "WINDOW", "STAR", "LAMBDA"):
+            self.failed = True
+            return value
+        if expression_class == "COLUMN_REF":
+            self._check_column(value, allow_aliases, day_safe)
+            return value
+        if expression_class == "FUNCTION":
+            return self._rewrite_function(value, allow_aliases)
+
+        # Só a coluna convertida diretamente para DATE pode ser a data
+        # truncada; em qualquer outra expressão o horário importa
+        day_safe = (
+            expression_class == "CAST"
+            and value.get("cast_type", {}).get("id") == "DATE"
+        )
+        return {
+            key: self.rewrite(item, allow_aliases, day_safe)
+            if isinstance(item, (dict, list)) else item
+            for key, item in value.items()
+        }
+
+    def _check_column(self, column_ref: dict, allow_aliases: bool, day_safe: bool):
+        names = column_ref["column_names"]
+        if len(names) > 2 or (len(names) == 2 and names[0] not in self.qualifiers):
+            self.failed = True
+            return
+        name = names[-1]
+        if len(names) == 1 and allow_aliases and name in self.aliases:
+            return
+        if name not in self.summary.dimensions:
+            self.failed = True
+        elif name == DATE_COLUMN and not day_safe:
+            self.failed = True
+
+    def _rewrite_function(self, function: dict, allow_aliases: bool):
+        name = function["function_name"].lower()
+        children = function.get("children", [])
+
+        if function.get("filter") or function.get("order_bys", {}).get("orders"):
+            self.failed = True
+            return function
+
+        aggregate = None
+        if name == "count_star":
+            aggregate = ("count_star", None, False)
+        elif name in ("count", "sum", "min", "max") and len(children) == 1 \
+                and children[0].get("class") == "COLUMN_REF":
+            aggregate = (name, children[0]["column_names"][-1], function["distinct"])
+
+        if aggregate in self.measures:
+            column = children[0] if children else None
+            if column is not None and len(column["column_names"]) == 2 \
+                    and column["column_names"][0] not in self.qualifiers:
+                self.failed = True
+                return function
+            return self._measure_expression(self.measures[aggregate], function.get("alias", ""))
+
+        if name in DIMENSION_AGGREGATES or (name == "count" and function["distinct"]):
+            # Agregação sobre dimensões: o resumo tem os mesmos valores
+            return {**function, "children": self.rewrite(children, allow_aliases)}
+        if name in _aggregate_function_names(self.conn):
+            # Demais agregações (avg, count de linhas, listas...) dependem das
+            # linhas individuais
+            self.failed = True
+            return function
+
+        day_safe = _is_day_safe(name, children)
+        return {
+            **function,
+            "children": [
+                self.rewrite(child, allow_aliases, day_safe) for child in children
+            ],
+        }
+
+    def _measure_expression(self, measure: Measure, alias: str) -> dict:
+        parsed = json.loads(self.conn.execute(
+            "SELECT json_serialize_sql(?)", [f"SELECT {measure.reaggregate_sql}"]
+        ).fetchone()[0])
+        expression = parsed["statements"][0]["node"]["select_list"][0]
+        expression["alias"] = alias
+        return expression
+
+
+_AGGREGATE_FUNCTIONS = set()
+
+
+def _aggregate_function_names(conn: duckdb.DuckDBPyConnection) -> set[str]:
+    """
+    Nomes das funções de agregação do DuckDB (consultados uma única vez).
+    """
+    if not _AGGREGATE_FUNCTIONS:
+        _AGGREGATE_FUNCTIONS.update(
+            row[0] for row in conn.execute("""
+                SELECT DISTINCT function_name FROM duckdb_functions()
+                WHERE function_type = 'aggregate'
+            """).fetchall()
+        )
+    return _AGGREGATE_FUNCTIONS
+
+
+def _is_day_safe(function_name: str, children: list) -> bool:
+    """
+    Verifica se a função aplicada à data de emissão ignora o horário (e pode,
+    portanto, ser calculada sobre a data truncada no dia).
+    """
+    if function_name in DAY_SAFE_FUNCTIONS:
+        return True
+    if function_name in ("date_trunc", "datetrunc") and children:
+        part = children[0].get("value", {}).get("value")
+        return isinstance(part, str) and part.lower() in DAY_SAFE_PARTS
+    if function_name == "strftime" and len(children) == 2:
+        fmt = children[1].get("value", {}).get("value")
+        return isinstance(fmt, str) and bool(DAY_SAFE_STRFTIME.match(fmt))
+    return False
@@ -0,0 +1,195 @@
+import re
+import unicodedata
+from datetime import date, datetime, time
+
+from tools.result_shaping import NO_RESULTS_MESSAGE
+from tools.schema import COLUMNS_BY_NAME
+
+
+# Tamanho máximo do resultado respondido sem a LLM: acima disso, a explicação
+# fica com o result_analyst_chain
+FAST_PATH_MAX_ROWS = 10
+FAST_PATH_MAX_COLUMNS = 3
+
+NO_RESULTS_ANSWER = "Nenhum resultado encontrado para os critérios informados."
+
+# Trechos do nome da coluna (sem acentos, em minúsculas) que indicam valores
+# em reais, a não ser que a coluna seja uma contagem (ex.: count("VALOR TOTAL"))
+CURRENCY_HINTS = ("valor", "preco", "faturamento", "receita", "ticket")
+COUNT_HINTS = ("count", "quantidade", "qtd")
+
+# Palavras inteiras do apelido da coluna que indicam códigos e datas em
+# números inteiros, escritos sem separador de milhar (ex.: CFOP 5102, ano
+# 2024). Comparadas palavra a palavra: "mesmo" não é "mes"
+CODE_WORDS = {
+    "ano", "mes", "cfop", "ncm", "codigo", "numero", "serie", "periodo",
+    "cnpj", "cpf", "chave",
+}
+
+# Palavras de apelidos de agregações, que nunca são códigos (ex.:
+# total_cfop, numero_de_notas)
+AGGREGATE_WORDS = {
+    "total", "soma", "media", "contagem", "count", "quantidade", "qtd", "sum",
+    "avg", "notas", "itens",
+}
+
+# "numero de ..." é uma contagem, não o número de um documento
+COUNT_PREPOSITIONS = {"de", "da", "do", "dos", "das"}
+
+# Expressões sem apelido que são partes de datas (as demais expressões, como
+# count(DISTINCT "CHAVE DE ACESSO"), são números comuns)
+CODE_EXPRESSIONS = re.compile(r'^(?:year|month)\(')
+
+
+def format_result_locally(query_result: str) -> str | None:
+    """
+    Monta a resposta sem a LLM quando o resultado é vazio, um único valor ou
+    uma tabela pequena, com números, datas e valores em reais no formato
+    brasileiro. Devolve None quando a resposta precisa da LLM (resultado
+    resumido, com erro, grande ou com valores sem formatação conhecida).
+
+    Ex.: [(1234.56,)] na coluna sum("VALOR NOTA FISCAL") -> "Resultado: R$ 1.234,56."
+
+    Args:
+    query_result(str): Resultado de execute_sql_query (ShapedResult quando a
+    query rodou; texto comum nos erros).
+    """
+    rows = getattr(query_result, "rows", None)
+    columns = getattr(query_result, "columns", None)
+    if query_result == NO_RESULTS_MESSAGE and rows is not None:
+        return NO_RESULTS_ANSWER
+    if not rows or len(rows) > FAST_PATH_MAX_ROWS or len(columns) > FAST_PATH_MAX_COLUMNS:
+        return None
+
+    formatted_rows = []
+    for row in rows:
+        values = [format_value(value, column) for value, column in zip(row, columns)]
+        if None in values:
+            return None
+        formatted_rows.append(values)
+
+    labels = [_label(column, len(columns)) for column in columns]
+
+    # Uma linha: "coluna: valor", uma por coluna
+    if len(formatted_rows) == 1:
+        return "\n".join(
+            f"{label}: {value}." for label, value in zip(labels, formatted_rows[0])
+        )
+
+    # Várias linhas: lista com a primeira coluna como chave quando há duas
+    lines = [f"{len(formatted_rows)} resultados ({', '.join(labels)}):"]
+    for values in formatted_rows:
+        if len(values) == 2:
+            lines.append(f"- {values[0]}: {values[1]}")
+        else:
+            lines.append(f"- {' | '.join(values)}")
+    return "\n".join(lines)
+
+
+def format_value(value, column: str) -> str | None:
+    """
+    Valor no formato brasileiro, de acordo com o tipo e o nome da coluna.
+    None para tipos sem formatação conhecida (ex.: listas).
+
+    Args:
+    value(Any): Valor vindo do banco (decimais já como float).
+    column(str): Nome da coluna no resultado.
+    """
+    if value is None:
+        return "sem valor"
+    if isinstance(value, bool):
+        return "sim" if value else "não"
+    if isinstance(value, (int, float)):
+        name = _normalize(column)
+        if (any(hint in name for hint in CURRENCY_HINTS)
+                and not any(hint in name for hint in COUNT_HINTS)):
+            return format_currency(value)
+        if isinstance(value, int) and _is_code_column(column, name):
+            return str(value)
+        return format_number(value)
+    if isinstance(value, datetime):
+        if value.time() == time(0, 0):
+            return value.strftime("%d/%m/%Y")
+        return value.strftime("%d/%m/%Y %H:%M:%S")
+    if isinstance(value, date):
+        return value.strftime("%d/%m/%Y")
+    if isinstance(value, str):
+        return value
+    return None
+
+
+def format_number(value: int | float) -> str:
+    """
+    Número com separador de milhar "." e decimal "," (até duas casas; mais
+    casas só para valores menores que 0,01).
+
+    Ex.: 1234567.891 -> "1.234.567,89"; 12.0 -> "12"
+    """
+    if isinstance(value, int) or value.is_integer():
+        return _swap_separators(f"{int(value):,}")
+    decimals = 2 if abs(value) >= 0.01 else 6
+    text = _swap_separators(f"{value:,.{decimals}f}")
+    return text.rstrip("0").rstrip(",")
+
+
+def format_currency(value: int | float) -> str:
+    """
+    Valor em reais com duas casas decimais.
+
+    Ex.: -1234.5 -> "-R$ 1.234,50"
+    """
+    text = f"R$ {_swap_separators(f'{abs(value):,.2f}')}"
+    return f"-{text}" if value < 0 else text
+
+
+def _swap_separators(text: str) -> str:
+    """
+    Troca os separadores do formato americano (1,234.5) pelos do brasileiro
+    (1.234,5).
+    """
+    return text.replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def _is_code_column(column: str, normalized_name: str) -> bool:
+    """
+    Colunas inteiras que são códigos ou partes de datas: as inteiras do
+    contrato de colunas (SÉRIE, NÚMERO, CFOP, ANO/MÊS EMISSÃO), year(...) e
+    month(...) e os apelidos com alguma palavra de CODE_WORDS. Outras
+    expressões e apelidos de agregações nunca são códigos.
+
+    Ex.: "cfop" e year("DATA EMISSÃO") são códigos; numero_de_notas,
+    total_mesmo_emitente e count(DISTINCT "CHAVE DE ACESSO") não.
+    """
+    spec = COLUMNS_BY_NAME.get(column)
+    if spec is not None:
+        return spec.dtype in ("SMALLINT", "INTEGER", "BIGINT")
+    if "(" in column:
+        return CODE_EXPRESSIONS.match(normalized_name) is not None
+
+    words = re.findall(r"[a-z0-9]+", normalized_name)
+    if AGGREGATE_WORDS.intersection(words):
+        return False
+    for word, next_word in zip(words, words[1:] + [None]):
+        if word == "numero" and next_word in COUNT_PREPOSITIONS:
+            return False
+    return bool(CODE_WORDS.intersection(words))
+
+
+def _label(column: str, column_count: int) -> str:
+    """
+    Rótulo da coluna na resposta: uma expressão sem apelido (ex.:
+    count_star()) sozinha no resultado vira "Resultado"; apelidos em
+    minúsculas (ex.: total_notas) viram "Total notas".
+    """
+    if "(" in column:
+        return "Resultado" if column_count == 1 else column
+    return column.replace("_", " ").capitalize() if column.islower() else column
+
+
+def _normalize(text: str) -> str:
+    """
+    Texto sem acentos e em minúsculas, para procurar as dicas no nome da
+    coluna.
+    """
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in text if not unicodedata.combining(char)).lower()
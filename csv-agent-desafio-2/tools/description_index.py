@@ -0,0 +1,143 @@
+import duckdb
+
+
+DESCRIPTION_COLUMN = "DESCRIÇÃO DO PRODUTO/SERVIÇO"
+
+# Descrições distintas dos itens (com o texto normalizado) e o índice de
+# trigramas do texto normalizado de cada uma
+DESCRIPTIONS_TABLE = "descricoes_produtos"
+TRIGRAMS_TABLE = "indice_descricoes_trigramas"
+
+# Macro de tabela usada pelas queries geradas para buscar descrições:
+# SELECT ... FROM buscar_descricoes('parafuso')
+SEARCH_MACRO = "buscar_descricoes"
+
+
+def normalize_text_sql(expression: str) -> str:
+    """
+    Expressão SQL que normaliza um texto para a busca: sem acentos, em
+    minúsculas e com qualquer sequência de símbolos trocada por um espaço.
+    Usada tanto na construção do índice quanto no termo buscado.
+
+    Ex.: 'Parafuso Sext. 1/2"' -> "parafuso sext 1 2"
+    """
+    return (
+        f"trim(regexp_replace(lower(strip_accents({expression})), "
+        f"'[^a-z0-9]+', ' ', 'g'))"
+    )
+
+
+def refresh_description_index(conn: duckdb.DuckDBPyConnection, items_table: str):
+    """
+    Cria/atualiza o índice de busca das descrições de produtos: a tabela de
+    descrições distintas, o índice de trigramas e a macro buscar_descricoes.
+
+    Só as descrições novas são normalizadas e indexadas; as que não aparecem
+    mais em nenhum item (períodos recarregados) saem do índice. Tudo é feito
+    em SQL, com funções nativas do DuckDB (sem extensões).
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    items_table(str): Tabela de itens com a coluna de descrição.
+    """
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {DESCRIPTIONS_TABLE} (
+            descricao_id BIGINT PRIMARY KEY,
+            descricao VARCHAR,
+            descricao_normalizada VARCHAR
+        )
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TRIGRAMS_TABLE} (
+            trigrama VARCHAR,
+            descricao_id BIGINT
+        )
+    """)
+
+    # Descrições que não existem mais nos itens
+    conn.execute(f"""
+        DELETE FROM {DESCRIPTIONS_TABLE} AS d
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {items_table} AS i
+            WHERE i."{DESCRIPTION_COLUMN}" = d.descricao
+        )
+    """)
+    conn.execute(f"""
+        DELETE FROM {TRIGRAMS_TABLE}
+        WHERE descricao_id NOT IN (SELECT descricao_id FROM {DESCRIPTIONS_TABLE})
+    """)
+
+    # Descrições novas, numeradas a partir do maior id já usado
+    new_ids_start = conn.execute(
+        f"SELECT COALESCE(MAX(descricao_id), 0) FROM {DESCRIPTIONS_TABLE}"
+    ).fetchone()[0]
+    conn.execute(f"""
+        INSERT INTO {DESCRIPTIONS_TABLE}
+        SELECT
+            {new_ids_start} + row_number() OVER (ORDER BY descricao),
+            descricao,
+            {normalize_text_sql("descricao")}
+        FROM (
+            SELECT DISTINCT "{DESCRIPTION_COLUMN}" AS descricao
+            FROM {items_table}
+            WHERE "{DESCRIPTION_COLUMN}" IS NOT NULL
+        ) AS novas
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {DESCRIPTIONS_TABLE} AS d WHERE d.descricao = novas.descricao
+        )
+    """)
+
+    # Trigramas (sem repetição) do texto normalizado de cada descrição nova
+    conn.execute(f"""
+        INSERT INTO {TRIGRAMS_TABLE}
+        SELECT DISTINCT substr(descricao_normalizada, posicao, 3), descricao_id
+        FROM (
+            SELECT
+                descricao_id, descricao_normalizada,
+                unnest(range(1, length(descricao_normalizada) - 1)) AS posicao
+            FROM {DESCRIPTIONS_TABLE}
+            WHERE descricao_id > {new_ids_start}
+        )
+    """)
+
+    create_search_macro(conn)
+
+
+def create_search_macro(conn: duckdb.DuckDBPyConnection):
+    """
+    (Re)cria a macro buscar_descricoes(termo): devolve as descrições distintas
+    que contêm o termo, sem diferenciar maiúsculas nem acentos.
+
+    As candidatas são as descrições com todos os trigramas do termo
+    (consulta no índice); a confirmação final (contains) é feita só nelas.
+    Termos com menos de 3 caracteres percorrem a tabela de descrições
+    distintas.
+    """
+    normalized_term = normalize_text_sql("termo")
+    conn.execute(f"""
+        CREATE OR REPLACE MACRO {SEARCH_MACRO}(termo) AS TABLE
+        WITH termo_normalizado AS (
+            SELECT {normalized_term} AS termo_busca
+        ),
+        trigramas_termo AS (
+            SELECT DISTINCT substr(termo_busca, posicao, 3) AS trigrama
+            FROM (
+                SELECT termo_busca, unnest(range(1, length(termo_busca) - 1)) AS posicao
+                FROM termo_normalizado
+            )
+        ),
+        candidatas AS (
+            SELECT t.descricao_id
+            FROM {TRIGRAMS_TABLE} AS t
+            JOIN trigramas_termo USING (trigrama)
+            GROUP BY t.descricao_id
+            HAVING COUNT(*) = (SELECT COUNT(*) FROM trigramas_termo)
+        )
+        SELECT d.descricao AS "{DESCRIPTION_COLUMN}"
+        FROM {DESCRIPTIONS_TABLE} AS d, termo_normalizado
+        WHERE (
+                length(termo_busca) < 3
+                OR d.descricao_id IN (SELECT descricao_id FROM candidatas)
+            )
+            AND contains(d.descricao_normalizada, termo_busca)
+    """)
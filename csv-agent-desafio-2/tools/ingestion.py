@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import duckdb
+
+from tools.aggregates import SUMMARY_TARGET, refresh_summary_tables
+from tools.load_and_treat_data import load_zips_into_duckdb, stale_periods
+from tools.parquet_cache import PARQUET_CACHE_TARGET, export_parquet_cache
+from tools.tracing import tracer
+
+
+# Banco físico .duckdb do agente e seu cache .parquet (particionado por
+# ano/mês de emissão), ao lado do .duckdb
+DUCKDB_FILE = "meubanco.duckdb"
+PARQUET_CACHE_DIR = Path(DUCKDB_FILE).resolve().parent / "parquet_cache"
+
+
+@tracer.traced()
+def ingest_data(duckdb_file: str, parquet_cache_dir: Path) -> list[str]:
+    """
+    Etapa de escrita: carrega os .zip's novos ou alterados no banco e atualiza
+    o cache .parquet e as tabelas de resumo. Abre o banco em modo de escrita
+    só durante a carga, para que depois ele possa ser aberto somente para
+    leitura (inclusive por outros processos).
+
+    Args:
+    duckdb_file(str): Caminho do banco .duckdb.
+    parquet_cache_dir(Path): Pasta do cache .parquet.
+
+    Returns:
+    list[str]: Períodos carregados nesta execução.
+    """
+    conn = duckdb.connect(duckdb_file)
+    try:
+        # Carrega os .csv's direto dos .zip's da pasta data no banco, sem
+        # descompactá-los (somente os novos ou alterados desde a última
+        # execução, segundo o manifesto)
+        loaded_periods = load_zips_into_duckdb(conn)
+        # Atualiza o cache .parquet apenas nas partições dos períodos em que
+        # ele está atrás do banco: os recarregados agora e os de execuções
+        # interrompidas antes da exportação
+        periods = stale_periods(conn, PARQUET_CACHE_TARGET)
+        with tracer.span("export_parquet_cache", periods=len(periods)):
+            export_parquet_cache(conn, parquet_cache_dir, periods)
+        # Atualiza as tabelas de resumo (agregações por UF, CFOP, NCM,
+        # emitente e dia) apenas nos períodos em que elas estão atrás da
+        # carga: os recarregados agora e os de execuções interrompidas antes
+        # da atualização
+        periods = stale_periods(conn, SUMMARY_TARGET)
+        with tracer.span("refresh_summary_tables", periods=len(periods)):
+            refresh_summary_tables(conn, periods)
+    finally:
+        conn.close()
+
+    return loaded_periods
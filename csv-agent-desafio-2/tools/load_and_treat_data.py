@@ -1,65 +1,976 @@
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
 import duckdb
 import pandas as pd
-from pathlib import Path
+
+from tools.description_index import DESCRIPTIONS_TABLE, refresh_description_index
+from tools.manifest import (
+    FileFingerprint, record_files, split_changed_files,
+    split_changed_fingerprints
+)
+from tools.schema import (
+    CABECALHO_FILE, COLUMNS, COLUMNS_BY_NAME, HEADER, ITEM, ITENS_FILE, PERIOD_COLUMN,
+    csv_columns, pandas_dtypes, table_columns
+)
+from tools.tracing import tracer
+from tools.unzip_files import (
+    ZIP_CHUNK_ROWS, list_csv_members, member_fingerprint, open_member,
+    read_member_in_chunks
+)
+
+
+# Tipos explícitos das colunas de cada arquivo, definidos no contrato de
+# colunas (tools/schema.py). Evita a inferência de tipos (que perde zeros à
+# esquerda de CNPJs/NCMs e converte a chave de acesso de 44 dígitos em
+# número) e permite que o leitor do DuckDB trabalhe em paralelo sem precisar
+# amostrar o arquivo antes.
+# As colunas de data são lidas como texto e convertidas depois, para que
+# valores inválidos virem NULL (mesmo comportamento do errors="coerce").
+CABECALHO_COLUMNS = csv_columns(CABECALHO_FILE)
+ITENS_COLUMNS = csv_columns(ITENS_FILE)
+
+TIMESTAMP_COLUMNS = [
+    column.name for column in COLUMNS
+    if column.dtype == "TIMESTAMP" and column.tables
+]
+
+# Formatos alternativos aceitos nas colunas de data, além do ISO
+TIMESTAMP_FORMATS = ["%d/%m/%Y %H:%M:%S", "%d/%m/%Y"]
+
+# Pasta preferida para os .parquet's trocados entre os processos da carga: o
+# tmpfs em memória do Linux, para que os dados não passem pelo disco. Só é
+# usada se existir e tiver espaço livre (ver _staging_dir); senão, fica a
+# pasta temporária padrão
+STAGING_DIR = "/dev/shm"
+
+
+# Colunas exclusivas do arquivo de itens (as demais já vêm do cabeçalho)
+ITEM_ONLY_COLUMNS = [
+    column for column in ITENS_COLUMNS if column not in CABECALHO_COLUMNS
+]
+
+# Cabeçalhos e itens ficam em tabelas separadas (uma linha por nota e uma por
+# item), ligadas pela chave de acesso. notas_fiscais_info é uma view que
+# reconstrói o formato antigo, com o cabeçalho repetido em cada item.
+CABECALHO_TABLE = "notas_fiscais_cabecalho"
+ITENS_TABLE = "notas_fiscais_itens"
+NOTAS_FISCAIS_VIEW = "notas_fiscais_info"
+
+# Colunas e tipos de gravação de cada tabela (ENUMs, decimais exatos...)
+TABLE_SCHEMAS = {
+    CABECALHO_TABLE: table_columns(HEADER),
+    ITENS_TABLE: table_columns(ITEM),
+}
+
+# Sufixo das views que leem o cache .parquet (ver tools/parquet_cache.py)
+PARQUET_VIEW_SUFFIX = "_parquet"
+
+# Prefixo de período no nome dos arquivos (ex.: 202401_NFs_Cabecalho.csv)
+PERIOD_PATTERN = re.compile(r"(\d{6})")
+
+LOAD_MODES = ("duckdb", "pandas")
+
+# Tabela com o número de versão dos dados, incrementado a cada carga. Caches
+# de resultado usam esse número para nunca servir dados de antes da carga.
+DATA_VERSION_TABLE = "_versao_dados"
+
+# Versão dos dados em que cada período foi carregado e em que cada derivado
+# (tabelas de resumo, cache .parquet) foi atualizado para ele. Um derivado
+# atrás da carga é atualizado na próxima ingestão, mesmo que a execução
+# anterior tenha sido interrompida entre a carga e a atualização.
+PERIOD_VERSION_TABLE = "_versao_periodos"
+DERIVED_VERSION_TABLE = "_versao_derivados"
+
+
+@dataclass(frozen=True)
+class CsvSource:
+    """
+    Um .csv de origem: arquivo solto no disco ou membro de um .zip.
+    """
+    name: str
+    path: Path
+    in_zip: bool = False
+
+    @property
+    def manifest_key(self) -> str:
+        """
+        Identificador da origem no manifesto (o mesmo usado pelas funções de
+        impressão digital).
+        """
+        return f"{self.path.name}/{self.name}" if self.in_zip else self.name
 
 
-def load_csvs_into_duckdb(conn: duckdb.DuckDBPyConnection):
+@tracer.traced()
+def load_csvs_into_duckdb(
+        conn: duckdb.DuckDBPyConnection,
+        mode: str = "duckdb",
+        force: bool = False,
+        max_workers: int | None = None,
+        csv_dir: Path | None = None
+    ) -> list[str]:
+    """
+    Carrega os arquivos Cabecalho/Itens da pasta unzipped_data nas tabelas
+    notas_fiscais_cabecalho e notas_fiscais_itens (e na view
+    notas_fiscais_info, que une as duas).
+
+    Os arquivos são agrupados em pares pelo período do nome (AAAAMM) e cada
+    par é processado em um processo separado. A carga só acontece para os
+    períodos com algum arquivo novo ou alterado desde a última execução
+    (comparando tamanho, data de modificação e hash com o manifesto salvo no
+    próprio banco); os demais períodos são mantidos.
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    mode(str): "duckdb" para o leitor nativo (paralelo, com o join feito em
+        SQL) ou "pandas" para o caminho antigo, mantido como alternativa.
+    force(bool): Recarrega todos os períodos mesmo sem alterações.
+    max_workers(int | None): Quantidade máxima de processos (padrão: número
+        de núcleos).
+    csv_dir(Path | None): Pasta dos .csv's (padrão: data/unzipped_data).
+
+    Returns:
+    list[str]: Períodos (re)carregados nesta execução.
+    """
     # Caminho da raíz do projeto:
     abs_path = (
-        Path(__file__).resolve().parent 
+        Path(__file__).resolve().parent
         if '__file__' in globals() else Path().resolve()
     )
 
     # Caminho global dos arquivos descompactados:
-    path = abs_path.parent / "data" / "unzipped_data"
+    path = csv_dir or abs_path.parent / "data" / "unzipped_data"
 
     # Lista dos caminhos de cada arquivo .csv:
-    files_path = list(path.glob("*.csv"))
+    files_path = sorted(path.glob("*.csv"))
 
-    # Iterando pela lista de caminhos de cada arquivo:
-    for file_path in files_path:
+    # Verificando quais arquivos mudaram desde a última carga
+    changed, unchanged = split_changed_files(conn, files_path)
 
-        if "Cabecalho" in file_path.name:
+    return _load_sources(
+        conn,
+        [CsvSource(file_path.name, file_path) for file_path in files_path],
+        changed, unchanged, mode, force, max_workers
+    )
 
-            df_cabecalho = pd.read_csv(file_path, sep=',', decimal='.')
 
-            df_cabecalho['DATA EMISSÃO'] = pd.to_datetime(
-                df_cabecalho["DATA EMISSÃO"], format="mixed", errors="coerce"
-            )
-            df_cabecalho['DATA/HORA EVENTO MAIS RECENTE'] = pd.to_datetime(
-                df_cabecalho["DATA/HORA EVENTO MAIS RECENTE"], format="mixed", errors="coerce"
-            )
+@tracer.traced()
+def load_zips_into_duckdb(
+        conn: duckdb.DuckDBPyConnection,
+        mode: str = "duckdb",
+        force: bool = False,
+        max_workers: int | None = None,
+        chunk_rows: int = ZIP_CHUNK_ROWS,
+        zip_dir: Path | None = None
+    ) -> list[str]:
+    """
+    Carrega os .csv's dos arquivos .zip da pasta data direto nas tabelas de
+    notas fiscais, sem descompactá-los para o disco.
+
+    Cada membro é lido em blocos e enviado a uma tabela temporária; o join e a
+    conversão de tipos são feitos em SQL. Os membros já carregados ficam
+    registrados no manifesto, então apenas períodos novos ou alterados são
+    lidos, um por processo.
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    mode(str): "duckdb" ou "pandas", como em load_csvs_into_duckdb.
+    force(bool): Recarrega todos os períodos mesmo sem alterações.
+    max_workers(int | None): Quantidade máxima de processos (padrão: número
+        de núcleos).
+    chunk_rows(int): Quantidade de linhas lidas por bloco de cada membro.
+    zip_dir(Path | None): Pasta dos .zip's (padrão: data).
+
+    Returns:
+    list[str]: Períodos (re)carregados nesta execução.
+    """
+    # Caminho da raíz do projeto:
+    abs_path = (
+        Path(__file__).resolve().parent
+        if '__file__' in globals() else Path().resolve()
+    )
+
+    # Caminho dos .zip's:
+    zip_files = sorted((zip_dir or abs_path.parent / "data").glob("*.zip"))
+
+    if not zip_files:
+        print("⚠️ Nenhum arquivo ZIP encontrado.")
+        return []
+
+    sources, fingerprints = [], []
+    for zip_file in zip_files:
+        for member in list_csv_members(zip_file):
+            sources.append(CsvSource(member.filename, zip_file, in_zip=True))
+            fingerprints.append(member_fingerprint(zip_file, member))
+
+    changed, unchanged = split_changed_fingerprints(conn, fingerprints)
+
+    return _load_sources(
+        conn, sources, changed, unchanged, mode, force, max_workers, chunk_rows
+    )
+
 
-        elif "Itens" in file_path.name:
+def pair_sources_by_period(
+        sources: list[CsvSource]
+    ) -> dict[str, tuple[CsvSource, CsvSource]]:
+    """
+    Agrupa os .csv's em pares (Cabecalho, Itens) pelo período do nome.
 
-            df_itens = pd.read_csv(file_path, sep=',', decimal='.')
-        
+    Args:
+    sources(list[CsvSource]): .csv's de origem.
+
+    Returns:
+    dict: {período: (cabeçalho, itens)}, ordenado por período.
+    """
+    pairs = {}
+
+    for source in sources:
+        file_name = Path(source.name).name
+        if "Cabecalho" in file_name:
+            position = 0
+        elif "Itens" in file_name:
+            position = 1
         else:
             raise FileNotFoundError(
                 "Os arquivos encontrados não possuem as palavras chave: "
                 "Cabecalho ou Itens em sua descrição"
             )
 
-    list_of_desired_item_columns = list(
-        set(
-            sorted(df_itens.columns.unique().tolist())
+        match = PERIOD_PATTERN.search(file_name)
+        period = match.group(1) if match else re.sub(
+            r"[_-]?(Cabecalho|Itens).*$", "", file_name
+        )
+
+        pair = pairs.setdefault(period, [None, None])
+        if pair[position] is not None:
+            raise ValueError(
+                f"Mais de um arquivo de {'Cabecalho' if position == 0 else 'Itens'} "
+                f"para o período {period}: {pair[position].name} e {source.name}"
+            )
+        pair[position] = source
+
+    for period, (cabecalho, itens) in pairs.items():
+        if cabecalho is None or itens is None:
+            raise FileNotFoundError(
+                "É necessário um arquivo de Cabecalho e um de Itens para "
+                f"carregar as notas fiscais do período {period}"
+            )
+
+    return {period: tuple(pairs[period]) for period in sorted(pairs)}
+
+
+def _load_sources(
+        conn: duckdb.DuckDBPyConnection,
+        sources: list[CsvSource],
+        changed: list[FileFingerprint],
+        unchanged: list[FileFingerprint],
+        mode: str,
+        force: bool,
+        max_workers: int | None,
+        chunk_rows: int = ZIP_CHUNK_ROWS
+    ) -> list[str]:
+    """
+    Carrega, período a período, os pares de .csv's que mudaram, substituindo
+    as linhas do período nas tabelas de cabeçalhos e itens, em uma transação
+    por período.
+
+    Com um único processo, cada par é lido direto na conexão do banco. Com
+    mais, cada par é lido em um processo separado, que grava cabeçalhos e
+    itens em .parquet's temporários (ver _staging_dir); o processo principal
+    (único com acesso de escrita ao banco) apenas insere esses arquivos.
+    """
+    if mode not in LOAD_MODES:
+        raise ValueError(
+            f"Modo de carga desconhecido: {mode!r} (use 'duckdb' ou 'pandas')"
+        )
+
+    pairs = pair_sources_by_period(sources)
+    fingerprints = {fp.source: fp for fp in changed + unchanged}
+    changed_keys = {fp.source for fp in changed}
+
+    # Bancos no formato antigo (tabela única, sem período) são recriados
+    if _needs_rebuild(conn):
+        _drop_storage(conn)
+        force = True
+
+    pending = {
+        period: pair for period, pair in pairs.items()
+        if force or any(source.manifest_key in changed_keys for source in pair)
+    }
+
+    if not pending:
+        record_files(conn, unchanged)
+        # Bancos carregados antes do índice de descrições ganham o índice
+        if not _table_exists(conn, DESCRIPTIONS_TABLE):
+            _refresh_description_index(conn)
+        print("✔️ Nenhum arquivo novo ou alterado, tabela mantida.")
+        return []
+
+    workers = max(1, min(len(pending), max_workers or os.cpu_count() or 1))
+    # Divide os núcleos entre os processos para não disputarem CPU
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    if workers == 1:
+        # Sem pool não há o que trocar entre processos: o par é lido em
+        # tabelas temporárias da própria conexão, sem .parquet's
+        for period, (cabecalho, itens) in pending.items():
+            stage_tables = _stage_pair(conn, mode, period, cabecalho, itens, chunk_rows)
+            try:
+                _commit_period(conn, period, {
+                    table_name: f"SELECT * FROM {stage_table}"
+                    for table_name, stage_table in stage_tables.items()
+                }, [fingerprints[source.manifest_key] for source in pairs[period]])
+            finally:
+                for stage_table in stage_tables.values():
+                    conn.execute(f"DROP TABLE IF EXISTS {stage_table}")
+    else:
+        # Tamanho descompactado dos .csv's: um limite folgado para os
+        # .parquet's que podem estar na pasta ao mesmo tempo
+        expected_bytes = sum(
+            fingerprints[source.manifest_key].size
+            for pair in pending.values() for source in pair
+        )
+        with tempfile.TemporaryDirectory(
+            prefix="notas_fiscais_", dir=_staging_dir(expected_bytes)
+        ) as tmp_dir:
+            tasks = [
+                (mode, period, cabecalho, itens, tmp_dir, threads, chunk_rows)
+                for period, (cabecalho, itens) in pending.items()
+            ]
+
+            for period, parquet_paths in _run_parse_tasks(tasks, workers):
+                try:
+                    _commit_period(conn, period, {
+                        table_name: (
+                            f"SELECT * FROM read_parquet({sql_string(parquet_path)})"
+                        )
+                        for table_name, parquet_path in parquet_paths.items()
+                    }, [fingerprints[source.manifest_key] for source in pairs[period]])
+                finally:
+                    for parquet_path in parquet_paths.values():
+                        Path(parquet_path).unlink(missing_ok=True)
+
+    # Índice de busca das descrições de produtos (só as descrições novas)
+    _refresh_description_index(conn)
+
+    # Sugestão: print de schema
+    print(f"✔️ Tabela criada com sucesso! ({len(pending)} período(s) carregado(s))")
+
+    return list(pending)
+
+
+def _commit_period(
+        conn: duckdb.DuckDBPyConnection,
+        period: str,
+        selects: dict[str, str],
+        fingerprints: list[FileFingerprint]
+    ):
+    """
+    Substitui as linhas do período pelas consultas de selects ({tabela:
+    SELECT com as linhas novas}) e registra os arquivos no manifesto.
+
+    A carga e o manifesto são gravados na mesma transação: se a carga falhar,
+    os arquivos do período continuam pendentes.
+    """
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        for table_name, select_sql in selects.items():
+            _replace_period(conn, table_name, period, select_sql)
+        create_notas_fiscais_view(conn)
+        record_files(conn, fingerprints)
+        record_period_versions(conn, [period], bump_data_version(conn))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    print(f"📦 Período {period} carregado")
+
+
+def _staging_dir(expected_bytes: int) -> str | None:
+    """
+    Pasta dos .parquet's temporários da carga em pool: STAGING_DIR, se existir
+    e tiver pelo menos expected_bytes livres (o /dev/shm de um contêiner
+    Docker tem só 64 MB por padrão); senão None, a pasta temporária padrão.
+    """
+    if not Path(STAGING_DIR).is_dir():
+        return None
+    if shutil.disk_usage(STAGING_DIR).free < expected_bytes:
+        print(
+            f"⚠️ Pouco espaço livre em {STAGING_DIR}, usando a pasta "
+            f"temporária padrão"
+        )
+        return None
+    return STAGING_DIR
+
+
+def _refresh_description_index(conn: duckdb.DuckDBPyConnection):
+    """
+    Atualiza o índice de trigramas das descrições de produtos (ver
+    tools/description_index.py) em uma transação.
+    """
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        with tracer.span("refresh_description_index"):
+            refresh_description_index(conn, ITENS_TABLE)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def get_data_version(conn: duckdb.DuckDBPyConnection) -> int:
+    """
+    Versão atual dos dados (0 se nenhuma carga foi feita ainda).
+    """
+    if not _table_exists(conn, DATA_VERSION_TABLE):
+        return 0
+    row = conn.execute(f"SELECT version FROM {DATA_VERSION_TABLE}").fetchone()
+    return row[0] if row else 0
+
+
+def bump_data_version(conn: duckdb.DuckDBPyConnection) -> int:
+    """
+    Incrementa a versão dos dados. Deve ser chamada em toda alteração das
+    tabelas de notas fiscais, de preferência na mesma transação.
+    """
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {DATA_VERSION_TABLE} (
+            version BIGINT, updated_at TIMESTAMP
+        )
+    """)
+    version = get_data_version(conn) + 1
+    conn.execute(f"DELETE FROM {DATA_VERSION_TABLE}")
+    conn.execute(
+        f"INSERT INTO {DATA_VERSION_TABLE} VALUES (?, current_localtimestamp())",
+        [version],
+    )
+    return version
+
+
+def record_period_versions(
+        conn: duckdb.DuckDBPyConnection,
+        periods: list[str],
+        version: int
+    ):
+    """
+    Registra a versão dos dados em que os períodos foram carregados. Deve ser
+    chamada na mesma transação da carga, logo após bump_data_version.
+    """
+    _ensure_version_tables(conn)
+    if not periods:
+        return
+    periods_sql = ", ".join(sql_string(period) for period in periods)
+    conn.execute(f"DELETE FROM {PERIOD_VERSION_TABLE} WHERE period IN ({periods_sql})")
+    conn.execute(f"""
+        INSERT INTO {PERIOD_VERSION_TABLE}
+        SELECT unnest([{periods_sql}]), {int(version)}
+    """)
+
+
+def stale_periods(conn: duckdb.DuckDBPyConnection, target: str) -> list[str]:
+    """
+    Períodos em que o derivado (target) está atrás da carga: carregados em
+    uma versão mais nova que a da última atualização do derivado, nunca
+    atualizados nele, ou que deixaram de existir nas tabelas mas ainda
+    constam como atualizados.
+
+    Bancos carregados antes do registro por período contam como versão 0,
+    então cada derivado é atualizado por completo uma única vez.
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    target(str): Nome do derivado (ex.: "resumos", "cache_parquet").
+
+    Returns:
+    list[str]: Períodos a atualizar no derivado, em ordem.
+    """
+    _ensure_version_tables(conn)
+    if not _table_exists(conn, CABECALHO_TABLE):
+        return []
+
+    rows = conn.execute(f"""
+        WITH loaded AS (
+            SELECT p.period, coalesce(v.version, 0) AS version
+            FROM (
+                SELECT DISTINCT "{PERIOD_COLUMN}" AS period FROM {CABECALHO_TABLE}
+            ) AS p
+            LEFT JOIN {PERIOD_VERSION_TABLE} AS v ON v.period = p.period
+        ),
+        derived AS (
+            SELECT period, version FROM {DERIVED_VERSION_TABLE} WHERE target = ?
+        )
+        SELECT period FROM loaded
+        LEFT JOIN derived USING (period)
+        WHERE derived.version IS NULL OR derived.version < loaded.version
+        UNION
+        SELECT period FROM derived
+        WHERE period NOT IN (SELECT period FROM loaded)
+        ORDER BY period
+    """, [target]).fetchall()
+    return [period for (period,) in rows]
+
+
+def mark_periods_current(
+        conn: duckdb.DuckDBPyConnection,
+        target: str,
+        periods: list[str] | None = None
+    ):
+    """
+    Registra que o derivado (target) foi atualizado com a versão atual dos
+    períodos. Deve ser chamada na mesma transação da atualização, quando o
+    derivado fica no banco.
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    target(str): Nome do derivado.
+    periods(list[str] | None): Períodos atualizados. None: todos (o derivado
+        foi recriado por completo).
+    """
+    _ensure_version_tables(conn)
+    if periods is not None and not periods:
+        return
+
+    if periods is None:
+        conn.execute(f"DELETE FROM {DERIVED_VERSION_TABLE} WHERE target = ?", [target])
+        where = ""
+    else:
+        periods_sql = ", ".join(sql_string(period) for period in periods)
+        conn.execute(
+            f"DELETE FROM {DERIVED_VERSION_TABLE} "
+            f"WHERE target = ? AND period IN ({periods_sql})",
+            [target],
+        )
+        where = f'WHERE "{PERIOD_COLUMN}" IN ({periods_sql})'
+
+    # Períodos que deixaram de existir nas tabelas ficam sem registro
+    if _table_exists(conn, CABECALHO_TABLE):
+        conn.execute(f"""
+            INSERT INTO {DERIVED_VERSION_TABLE}
+            SELECT ?, p.period, coalesce(v.version, 0)
+            FROM (
+                SELECT DISTINCT "{PERIOD_COLUMN}" AS period
+                FROM {CABECALHO_TABLE} {where}
+            ) AS p
+            LEFT JOIN {PERIOD_VERSION_TABLE} AS v ON v.period = p.period
+        """, [target])
+
+
+def _ensure_version_tables(conn: duckdb.DuckDBPyConnection):
+    """
+    Cria as tabelas de versão por período caso ainda não existam.
+    """
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {PERIOD_VERSION_TABLE} (
+            period VARCHAR, version BIGINT
+        )
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {DERIVED_VERSION_TABLE} (
+            target VARCHAR, period VARCHAR, version BIGINT
+        )
+    """)
+
+
+def _run_parse_tasks(tasks: list[tuple], workers: int):
+    """
+    Executa _parse_pair_to_parquet para cada tarefa em um pool de processos,
+    devolvendo (período, {tabela: .parquet}) conforme terminam.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_parse_pair_to_parquet, *task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _parse_pair_to_parquet(
+        mode: str,
+        period: str,
+        cabecalho: CsvSource,
+        itens: CsvSource,
+        output_dir: str,
+        threads: int,
+        chunk_rows: int
+    ) -> tuple[str, dict[str, str]]:
+    """
+    Lê um par Cabecalho/Itens em um banco em memória e grava cabeçalhos e
+    itens (com a coluna de período) em .parquet's. Roda dentro dos processos
+    do pool.
+    """
+    with duckdb.connect() as conn:
+        conn.execute(f"SET threads = {threads}")
+
+        output_paths = {}
+        stage_tables = _stage_pair(conn, mode, period, cabecalho, itens, chunk_rows)
+        for table_name, stage_table in stage_tables.items():
+            output_path = str(Path(output_dir) / f"{period}_{table_name}.parquet")
+            conn.execute(f"""
+                COPY {stage_table} TO {sql_string(output_path)} (FORMAT PARQUET)
+            """)
+            conn.execute(f"DROP TABLE {stage_table}")
+            output_paths[table_name] = output_path
+
+    return period, output_paths
+
+
+def _stage_pair(
+        conn: duckdb.DuckDBPyConnection,
+        mode: str,
+        period: str,
+        cabecalho: CsvSource,
+        itens: CsvSource,
+        chunk_rows: int
+    ) -> dict[str, str]:
+    """
+    Lê um par Cabecalho/Itens em tabelas temporárias da conexão, já com os
+    tipos do contrato de colunas, validadas por _check_contract e com a
+    coluna de período. Devolve {tabela: tabela temporária}.
+    """
+    if mode == "duckdb":
+        selects = {
+            CABECALHO_TABLE: _cabecalho_select_sql(
+                _relation_for_source(
+                    conn, cabecalho, CABECALHO_COLUMNS, "_stage_cabecalho",
+                    chunk_rows
+                )
+            ),
+            ITENS_TABLE: _itens_select_sql(
+                _relation_for_source(
+                    conn, itens, ITENS_COLUMNS, "_stage_itens", chunk_rows
+                )
+            ),
+        }
+    else:
+        # Lido com os dtypes do contrato (sem inferência); a conversão de
+        # tipos é a mesma do leitor nativo, em SQL
+        df_cabecalho, df_itens = _read_pair_with_pandas(cabecalho, itens)
+        conn.register("_df_cabecalho", df_cabecalho)
+        conn.register("_df_itens", df_itens)
+        selects = {
+            CABECALHO_TABLE: _cabecalho_select_sql(
+                _typed_relation_sql("_df_cabecalho", CABECALHO_COLUMNS)
+            ),
+            ITENS_TABLE: _itens_select_sql(
+                _typed_relation_sql("_df_itens", ITENS_COLUMNS)
+            ),
+        }
+
+    stage_tables = {}
+    for table_name, select_sql in selects.items():
+        stage_table = f"_checked_{table_name}"
+        conn.execute(f"""
+            CREATE OR REPLACE TEMP TABLE {stage_table} AS
+            SELECT *, {sql_string(period)} AS "{PERIOD_COLUMN}"
+            FROM ({select_sql})
+        """)
+        _check_contract(conn, stage_table, table_name, period)
+        stage_tables[table_name] = stage_table
+
+    # Os dados brutos não são mais necessários (na carga sem pool, a conexão
+    # é a do próprio banco)
+    if mode == "duckdb":
+        conn.execute("DROP TABLE IF EXISTS _stage_cabecalho")
+        conn.execute("DROP TABLE IF EXISTS _stage_itens")
+    else:
+        conn.unregister("_df_cabecalho")
+        conn.unregister("_df_itens")
+
+    return stage_tables
+
+
+def _check_contract(
+        conn: duckdb.DuckDBPyConnection,
+        stage_table: str,
+        table_name: str,
+        period: str
+    ):
+    """
+    Valida as linhas lidas contra o contrato de colunas (tools/schema.py):
+    valores fora do domínio de um ENUM ou textos de tamanho fixo com outro
+    tamanho interrompem a carga do período, com os valores encontrados.
+    """
+    for name in TABLE_SCHEMAS[table_name]:
+        column = COLUMNS_BY_NAME[name]
+        conditions = []
+        if column.values:
+            values_sql = ", ".join(sql_string(value) for value in column.values)
+            conditions.append(f'"{name}" NOT IN ({values_sql})')
+        if column.length:
+            conditions.append(f'length("{name}") <> {column.length}')
+        if not conditions:
+            continue
+
+        invalid = [
+            row[0] for row in conn.execute(f"""
+                SELECT DISTINCT "{name}" FROM {stage_table}
+                WHERE {" OR ".join(conditions)}
+                LIMIT 5
+            """).fetchall()
+        ]
+        if invalid:
+            raise ValueError(
+                f'Valores fora do contrato na coluna "{name}" ({table_name}, '
+                f"período {period}): {invalid}. Atualize tools/schema.py se "
+                f"forem valores válidos."
+            )
+
+
+def create_notas_fiscais_tables(
+        conn: duckdb.DuckDBPyConnection,
+        table_names: tuple[str, ...] = (CABECALHO_TABLE, ITENS_TABLE)
+    ):
+    """
+    (Re)cria tabelas de notas fiscais vazias com os tipos do contrato de
+    colunas (ENUMs, decimais exatos, chaves como texto).
+    """
+    for table_name in table_names:
+        column_defs = ", ".join(
+            f'"{column}" {dtype}'
+            for column, dtype in TABLE_SCHEMAS[table_name].items()
+        )
+        conn.execute(f"CREATE OR REPLACE TABLE {table_name} ({column_defs})")
+
+
+def _replace_period(
+        conn: duckdb.DuckDBPyConnection,
+        table_name: str,
+        period: str,
+        select_sql: str
+    ):
+    """
+    Substitui as linhas de um período em uma tabela pelas linhas da consulta
+    (um .parquet temporário ou uma tabela temporária da conexão).
+    """
+    if not _table_exists(conn, table_name):
+        create_notas_fiscais_tables(conn, (table_name,))
+
+    conn.execute(
+        f'DELETE FROM {table_name} WHERE "{PERIOD_COLUMN}" = ?', [period]
+    )
+    conn.execute(f"INSERT INTO {table_name} BY NAME {select_sql}")
+
+
+def create_notas_fiscais_view(conn: duckdb.DuckDBPyConnection):
+    """
+    (Re)cria a view notas_fiscais_info, que une cabeçalhos e itens no formato
+    da antiga tabela única (uma linha por item).
+    """
+    item_select = ", ".join(f'i."{column}"' for column in ITEM_ONLY_COLUMNS)
+
+    conn.execute(f"""
+        CREATE OR REPLACE VIEW {NOTAS_FISCAIS_VIEW} AS
+        SELECT c.*, {item_select}
+        FROM {CABECALHO_TABLE} AS c
+        LEFT JOIN {ITENS_TABLE} AS i
+            ON c."CHAVE DE ACESSO" = i."CHAVE DE ACESSO"
+            AND c."{PERIOD_COLUMN}" = i."{PERIOD_COLUMN}"
+    """)
+
+
+def _needs_rebuild(conn: duckdb.DuckDBPyConnection) -> bool:
+    """
+    Indica se o banco precisa ser recriado: sem as tabelas/view, ou em um
+    formato antigo (notas_fiscais_info como tabela física, tabelas sem a
+    coluna de período ou com tipos diferentes dos do contrato de colunas).
+    """
+    is_old_table = conn.execute(
+        "SELECT COUNT(*) FROM information_schema.tables "
+        "WHERE table_name = ? AND table_type = 'BASE TABLE'",
+        [NOTAS_FISCAIS_VIEW],
+    ).fetchone()[0] > 0
+
+    return (
+        is_old_table
+        or not _table_exists(conn, NOTAS_FISCAIS_VIEW)
+        or not all(
+            _column_exists(conn, table_name, PERIOD_COLUMN)
+            for table_name in (CABECALHO_TABLE, ITENS_TABLE)
         )
-        -set(
-            sorted(df_cabecalho.columns.unique().tolist())
+        or not all(
+            _column_types(conn, table_name) == expected
+            for table_name, expected in TABLE_SCHEMAS.items()
         )
     )
 
-    list_of_desired_item_columns.append("CHAVE DE ACESSO")
 
-    df_final = df_cabecalho.merge(
-        df_itens[list_of_desired_item_columns], 
-        on =["CHAVE DE ACESSO"], how="left"
+def _drop_storage(conn: duckdb.DuckDBPyConnection):
+    """
+    Remove a view e as tabelas de notas fiscais, em qualquer formato.
+    """
+    for table_name, table_type in conn.execute(
+        "SELECT table_name, table_type FROM information_schema.tables "
+        "WHERE table_name = ?",
+        [NOTAS_FISCAIS_VIEW],
+    ).fetchall():
+        kind = "VIEW" if table_type == "VIEW" else "TABLE"
+        conn.execute(f"DROP {kind} {table_name}")
+
+    conn.execute(f"DROP TABLE IF EXISTS {CABECALHO_TABLE}")
+    conn.execute(f"DROP TABLE IF EXISTS {ITENS_TABLE}")
+
+
+def _table_exists(conn: duckdb.DuckDBPyConnection, table_name: str) -> bool:
+    """
+    Verifica se uma tabela (ou view) existe no banco.
+    """
+    return conn.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?",
+        [table_name],
+    ).fetchone()[0] > 0
+
+
+def _column_exists(
+        conn: duckdb.DuckDBPyConnection, table_name: str, column_name: str
+    ) -> bool:
+    """
+    Verifica se uma coluna existe em uma tabela (ou view) do banco.
+    """
+    return conn.execute(
+        "SELECT COUNT(*) FROM information_schema.columns "
+        "WHERE table_name = ? AND column_name = ?",
+        [table_name, column_name],
+    ).fetchone()[0] > 0
+
+
+def _column_types(conn: duckdb.DuckDBPyConnection, table_name: str) -> dict:
+    """
+    {coluna: tipo} de uma tabela do banco.
+    """
+    return dict(conn.execute(
+        "SELECT column_name, data_type FROM duckdb_columns() WHERE table_name = ?",
+        [table_name],
+    ).fetchall())
+
+
+def _relation_for_source(
+        conn: duckdb.DuckDBPyConnection,
+        source: CsvSource,
+        columns: dict[str, str],
+        stage_table: str,
+        chunk_rows: int
+    ) -> str:
+    """
+    Relação SQL tipada com o conteúdo de um .csv: read_csv direto para
+    arquivos soltos, ou uma tabela temporária preenchida em blocos para
+    membros de .zip.
+    """
+    if not source.in_zip:
+        return _read_csv_sql(source.path, columns)
+
+    column_defs = ", ".join(f'"{column}" VARCHAR' for column in columns)
+    conn.execute(f"CREATE OR REPLACE TEMP TABLE {stage_table} ({column_defs})")
+
+    for chunk in read_member_in_chunks(source.path, source.name, chunk_rows):
+        conn.register("_zip_chunk", chunk)
+        conn.execute(f"INSERT INTO {stage_table} BY NAME SELECT * FROM _zip_chunk")
+        conn.unregister("_zip_chunk")
+
+    return _typed_relation_sql(stage_table, columns)
+
+
+def _typed_relation_sql(table_name: str, columns: dict[str, str]) -> str:
+    """
+    Subconsulta que converte as colunas de texto de uma tabela temporária para
+    os tipos explícitos de cada coluna.
+    """
+    select = ", ".join(
+        f'"{column}"' if dtype == "VARCHAR"
+        else f'CAST("{column}" AS {dtype}) AS "{column}"'
+        for column, dtype in columns.items()
     )
+    return f"(SELECT {select} FROM {table_name})"
 
-    # Criação persistente da tabela
-    conn.execute("DROP TABLE IF EXISTS notas_fiscais_info")
-    conn.register("notas_fiscais_info", df_final)
-    conn.execute("CREATE TABLE notas_fiscais_info AS SELECT * FROM notas_fiscais_info")
 
-    # Sugestão: print de schema
-    print("✔️ Tabela criada com sucesso!")
\ No newline at end of file
+def _cabecalho_select_sql(cabecalho_relation: str) -> str:
+    """
+    Consulta com os cabeçalhos no formato da tabela notas_fiscais_cabecalho
+    (datas já convertidas).
+
+    Args:
+    cabecalho_relation(str): Relação SQL (tabela, subconsulta ou read_csv) com
+        as colunas de CABECALHO_COLUMNS.
+    """
+    timestamp_replace = ", ".join(
+        f'{_parse_timestamp_sql(column, "c")} AS "{column}"'
+        for column in TIMESTAMP_COLUMNS
+    )
+    return f"SELECT c.* REPLACE ({timestamp_replace}) FROM {cabecalho_relation} AS c"
+
+
+def _itens_select_sql(itens_relation: str) -> str:
+    """
+    Consulta com os itens no formato da tabela notas_fiscais_itens: a chave de
+    acesso e apenas as colunas que não se repetem no cabeçalho.
+
+    Args:
+    itens_relation(str): Relação SQL com as colunas de ITENS_COLUMNS.
+    """
+    item_select = ", ".join(
+        f'i."{column}"' for column in ["CHAVE DE ACESSO", *ITEM_ONLY_COLUMNS]
+    )
+    return f"SELECT {item_select} FROM {itens_relation} AS i"
+
+
+def sql_string(value) -> str:
+    """
+    Escapa um valor como literal de texto SQL.
+    """
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _read_csv_sql(file_path: Path, columns: dict[str, str]) -> str:
+    """
+    Monta a chamada read_csv do DuckDB com o tipo explícito de cada coluna.
+    """
+    columns_struct = ", ".join(
+        f"{sql_string(name)}: {sql_string(dtype)}"
+        for name, dtype in columns.items()
+    )
+    return (
+        f"read_csv({sql_string(file_path.as_posix())}, header = true, "
+        f"delim = ',', quote = '\"', columns = {{{columns_struct}}})"
+    )
+
+
+def _parse_timestamp_sql(column: str, relation: str) -> str:
+    """
+    Converte uma coluna de texto em TIMESTAMP, retornando NULL para valores
+    que não estejam em nenhum dos formatos conhecidos.
+    """
+    formats = ", ".join(sql_string(fmt) for fmt in TIMESTAMP_FORMATS)
+    return (
+        f'COALESCE(TRY_CAST({relation}."{column}" AS TIMESTAMP), '
+        f'TRY_STRPTIME({relation}."{column}", [{formats}]))'
+    )
+
+
+def _read_source_with_pandas(source: CsvSource, file: str) -> pd.DataFrame:
+    """
+    Lê um .csv inteiro com o pandas, seja ele um arquivo solto ou um membro
+    de .zip, com os dtypes do contrato de colunas (texto ou category, sem
+    inferência).
+    """
+    dtypes = pandas_dtypes(file)
+    if not source.in_zip:
+        return pd.read_csv(source.path, sep=',', decimal='.', dtype=dtypes)
+
+    with open_member(source.path, source.name) as csv_file:
+        return pd.read_csv(csv_file, sep=',', decimal='.', dtype=dtypes)
+
+
+def _read_pair_with_pandas(
+        cabecalho: CsvSource, itens: CsvSource
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Caminho alternativo: lê os .csv's de cabeçalhos e itens com o pandas,
+    com os dtypes do contrato de colunas.
+    """
+    return (
+        _read_source_with_pandas(cabecalho, CABECALHO_FILE),
+        _read_source_with_pandas(itens, ITENS_FILE),
+    )
@@ -0,0 +1,155 @@
+import hashlib
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable
+
+import duckdb
+
+
+# Tabela (dentro do próprio .duckdb) com a impressão digital de cada arquivo
+# de origem já carregado no banco.
+MANIFEST_TABLE = "_manifesto_arquivos"
+
+# Tamanho dos blocos lidos ao calcular o hash dos arquivos
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    """
+    Impressão digital de um arquivo de origem: tamanho, data de modificação e
+    hash do conteúdo.
+    """
+    source: str
+    size: int
+    mtime_ns: int
+    content_hash: str | None = None
+
+
+def ensure_manifest_table(conn: duckdb.DuckDBPyConnection):
+    """
+    Cria a tabela de manifesto caso ela ainda não exista no banco.
+    """
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+            source VARCHAR PRIMARY KEY,
+            size BIGINT,
+            mtime_ns BIGINT,
+            content_hash VARCHAR,
+            recorded_at TIMESTAMP DEFAULT current_timestamp
+        )
+    """)
+
+
+def hash_file(file_path: Path) -> str:
+    """
+    Calcula o sha256 do conteúdo de um arquivo, lendo-o em blocos.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stat_fingerprint(file_path: Path) -> FileFingerprint:
+    """
+    Impressão digital barata (sem hash), obtida apenas com o stat do arquivo.
+    """
+    stat = file_path.stat()
+    return FileFingerprint(
+        source=file_path.name, size=stat.st_size, mtime_ns=stat.st_mtime_ns
+    )
+
+
+def split_changed_files(
+        conn: duckdb.DuckDBPyConnection, files_path: list[Path]
+    ) -> tuple[list[FileFingerprint], list[FileFingerprint]]:
+    """
+    Compara os arquivos com o manifesto e os separa em alterados (novos ou
+    modificados) e inalterados.
+
+    O hash só é calculado quando tamanho ou data de modificação diferem do
+    manifesto, então arquivos inalterados custam apenas um stat.
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    files_path(list[Path]): Caminhos dos arquivos de origem.
+
+    Returns:
+    tuple: (alterados, inalterados), ambos com o hash preenchido quando foi
+        necessário calculá-lo.
+    """
+    paths_by_source = {file_path.name: file_path for file_path in files_path}
+
+    return split_changed_fingerprints(
+        conn,
+        [stat_fingerprint(file_path) for file_path in files_path],
+        lambda fingerprint: hash_file(paths_by_source[fingerprint.source]),
+    )
+
+
+def split_changed_fingerprints(
+        conn: duckdb.DuckDBPyConnection,
+        fingerprints: list[FileFingerprint],
+        compute_hash: Callable[[FileFingerprint], str] | None = None
+    ) -> tuple[list[FileFingerprint], list[FileFingerprint]]:
+    """
+    Versão genérica de split_changed_files, para origens que não são arquivos
+    soltos no disco (ex.: membros de um .zip).
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    fingerprints(list[FileFingerprint]): Impressões digitais das origens.
+    compute_hash(Callable): Calcula o hash de uma origem quando tamanho ou
+        data de modificação diferem do manifesto. Dispensável quando as
+        impressões digitais já vêm com o hash preenchido.
+    """
+    ensure_manifest_table(conn)
+
+    known = {
+        source: (size, mtime_ns, content_hash)
+        for source, size, mtime_ns, content_hash in conn.execute(
+            f"SELECT source, size, mtime_ns, content_hash FROM {MANIFEST_TABLE}"
+        ).fetchall()
+    }
+
+    changed, unchanged = [], []
+    for fingerprint in fingerprints:
+        previous = known.get(fingerprint.source)
+
+        if previous and previous[:2] == (fingerprint.size, fingerprint.mtime_ns):
+            unchanged.append(replace(fingerprint, content_hash=previous[2]))
+            continue
+
+        if fingerprint.content_hash is None:
+            fingerprint = replace(
+                fingerprint, content_hash=compute_hash(fingerprint)
+            )
+        # Arquivo apenas "tocado" (mesmo conteúdo com outra data): não recarrega
+        if previous and previous[2] == fingerprint.content_hash:
+            unchanged.append(fingerprint)
+        else:
+            changed.append(fingerprint)
+
+    return changed, unchanged
+
+
+def record_files(
+        conn: duckdb.DuckDBPyConnection, fingerprints: list[FileFingerprint]
+    ):
+    """
+    Registra (ou atualiza) as impressões digitais no manifesto.
+    """
+    ensure_manifest_table(conn)
+    conn.executemany(
+        f"""
+        INSERT OR REPLACE INTO {MANIFEST_TABLE}
+            (source, size, mtime_ns, content_hash, recorded_at)
+        VALUES (?, ?, ?, ?, current_timestamp)
+        """,
+        [
+            [fp.source, fp.size, fp.mtime_ns, fp.content_hash]
+            for fp in fingerprints
+        ],
+    )
@@ -0,0 +1,287 @@
+import shutil
+from pathlib import Path
+
+import duckdb
+
+from tools.aggregates import refresh_summary_tables
+from tools.description_index import refresh_description_index
+from tools.load_and_treat_data import (
+    CABECALHO_TABLE, ITENS_TABLE, PARQUET_VIEW_SUFFIX, PERIOD_COLUMN,
+    bump_data_version, create_notas_fiscais_tables, create_notas_fiscais_view,
+    mark_periods_current, record_period_versions, sql_string
+)
+
+
+# Colunas de partição (ano/mês da DATA EMISSÃO de cada nota). Os nomes sem
+# espaços/acentos viram os nomes das pastas; nas views eles são expostos como
+# "ANO EMISSÃO" e "MÊS EMISSÃO".
+PARTITION_COLUMNS = {"ano_emissao": "ANO EMISSÃO", "mes_emissao": "MÊS EMISSÃO"}
+
+# Ordem das linhas dentro de cada partição
+SORT_COLUMNS = {CABECALHO_TABLE: "DATA EMISSÃO", ITENS_TABLE: "CHAVE DE ACESSO"}
+
+# Nome do cache no registro de versão por período (ver stale_periods em
+# tools/load_and_treat_data.py)
+PARQUET_CACHE_TARGET = "cache_parquet"
+
+def export_parquet_cache(
+        conn: duckdb.DuckDBPyConnection,
+        cache_dir: Path,
+        periods: list[str] | None = None
+    ):
+    """
+    Exporta cabeçalhos e itens para .parquet, particionados por ano/mês de
+    emissão (cache_dir/<tabela>/ano_emissao=AAAA/mes_emissao=M/), e cria as
+    views *_parquet que leem esse cache.
+
+    Apenas as partições afetadas pelos períodos informados são reescritas.
+    A versão desses períodos só é registrada depois da exportação, então uma
+    exportação interrompida é refeita na próxima ingestão.
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    cache_dir(Path): Pasta do cache (normalmente ao lado do .duckdb).
+    periods(list[str] | None): Períodos a exportar (normalmente
+        stale_periods(conn, PARQUET_CACHE_TARGET)). None reescreve o cache
+        inteiro; lista vazia só exporta se o cache ainda não existir.
+    """
+    cache_dir = Path(cache_dir).resolve()
+
+    if not _cache_exists(cache_dir):
+        periods = None
+    elif periods is not None and not periods:
+        create_parquet_views(conn, cache_dir)
+        return
+
+    for table_name in (CABECALHO_TABLE, ITENS_TABLE):
+        table_dir = cache_dir / table_name
+        partitioned_sql = _partitioned_select_sql(table_name)
+
+        if periods is None:
+            # Exportação completa: substitui a pasta inteira da tabela
+            shutil.rmtree(table_dir, ignore_errors=True)
+            where = ""
+        else:
+            partitions = _affected_partitions(conn, table_dir, table_name, periods)
+            if not partitions:
+                continue
+            for year, month in partitions:
+                shutil.rmtree(
+                    table_dir / f"ano_emissao={_partition_value(year)}"
+                    / f"mes_emissao={_partition_value(month)}",
+                    ignore_errors=True,
+                )
+            where = "WHERE " + " OR ".join(
+                f"(ano_emissao IS NOT DISTINCT FROM {_sql_value(year)} "
+                f"AND mes_emissao IS NOT DISTINCT FROM {_sql_value(month)})"
+                for year, month in partitions
+            )
+
+        table_dir.mkdir(parents=True, exist_ok=True)
+
+        # Ordenar deixa as estatísticas (min/max) de cada bloco do .parquet
+        # mais seletivas dentro da partição
+        conn.execute(f"""
+            COPY (
+                SELECT * FROM ({partitioned_sql}) {where}
+                ORDER BY "{SORT_COLUMNS[table_name]}"
+            ) TO {sql_string(table_dir.as_posix())} (
+                FORMAT PARQUET,
+                PARTITION_BY (ano_emissao, mes_emissao),
+                OVERWRITE_OR_IGNORE
+            )
+        """)
+
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        mark_periods_current(conn, PARQUET_CACHE_TARGET, periods)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    create_parquet_views(conn, cache_dir)
+    print(f"✔️ Cache .parquet atualizado em {cache_dir}")
+
+
+def create_parquet_views(conn: duckdb.DuckDBPyConnection, cache_dir: Path):
+    """
+    Cria as views notas_fiscais_cabecalho_parquet, notas_fiscais_itens_parquet
+    e notas_fiscais_info_parquet sobre o cache. Filtros em "ANO EMISSÃO" e
+    "MÊS EMISSÃO" fazem o DuckDB ler apenas as partições correspondentes.
+    """
+    cache_dir = Path(cache_dir).resolve()
+    if not _cache_exists(cache_dir):
+        return
+
+    for table_name in (CABECALHO_TABLE, ITENS_TABLE):
+        conn.execute(f"""
+            CREATE OR REPLACE VIEW {table_name}{PARQUET_VIEW_SUFFIX} AS
+            {_read_cache_sql(cache_dir, table_name, renamed=True)}
+        """)
+
+    cabecalho = f"{CABECALHO_TABLE}{PARQUET_VIEW_SUFFIX}"
+    itens = f"{ITENS_TABLE}{PARQUET_VIEW_SUFFIX}"
+    # As partições entram no join para que o filtro de ano/mês chegue também
+    # à leitura dos itens
+    conn.execute(f"""
+        CREATE OR REPLACE VIEW notas_fiscais_info{PARQUET_VIEW_SUFFIX} AS
+        SELECT c.*, i.* EXCLUDE (
+            "CHAVE DE ACESSO", "{PERIOD_COLUMN}", "ANO EMISSÃO", "MÊS EMISSÃO"
+        )
+        FROM {cabecalho} AS c
+        LEFT JOIN {itens} AS i
+            ON c."CHAVE DE ACESSO" = i."CHAVE DE ACESSO"
+            AND c."{PERIOD_COLUMN}" = i."{PERIOD_COLUMN}"
+            AND c."ANO EMISSÃO" IS NOT DISTINCT FROM i."ANO EMISSÃO"
+            AND c."MÊS EMISSÃO" IS NOT DISTINCT FROM i."MÊS EMISSÃO"
+    """)
+
+
+def restore_from_parquet_cache(conn: duckdb.DuckDBPyConnection, cache_dir: Path):
+    """
+    Recria as tabelas de cabeçalhos e itens (e a view notas_fiscais_info) a
+    partir do cache .parquet, sem precisar dos .zip's originais.
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    cache_dir(Path): Pasta do cache gerado por export_parquet_cache.
+    """
+    cache_dir = Path(cache_dir).resolve()
+    if not _cache_exists(cache_dir):
+        raise FileNotFoundError(f"Cache .parquet não encontrado em {cache_dir}")
+
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        # Tabelas com os tipos do contrato de colunas (o .parquet guarda os
+        # ENUMs como texto)
+        create_notas_fiscais_tables(conn)
+        for table_name in (CABECALHO_TABLE, ITENS_TABLE):
+            conn.execute(f"""
+                INSERT INTO {table_name} BY NAME
+                SELECT * EXCLUDE ({', '.join(PARTITION_COLUMNS)})
+                FROM ({_read_cache_sql(cache_dir, table_name, renamed=False)})
+            """)
+        create_notas_fiscais_view(conn)
+        # Os períodos restaurados já estão no cache, que não precisa ser
+        # exportado de novo
+        periods = [
+            period for (period,) in conn.execute(
+                f'SELECT DISTINCT "{PERIOD_COLUMN}" FROM {CABECALHO_TABLE}'
+            ).fetchall()
+        ]
+        record_period_versions(conn, periods, bump_data_version(conn))
+        mark_periods_current(conn, PARQUET_CACHE_TARGET)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    print(f"✔️ Tabelas restauradas a partir de {cache_dir}")
+    # Os resumos e o índice de descrições precisam refletir as tabelas
+    # restauradas
+    refresh_summary_tables(conn)
+    refresh_description_index(conn, ITENS_TABLE)
+
+
+def _cache_exists(cache_dir: Path) -> bool:
+    """
+    Verifica se as duas tabelas já têm arquivos .parquet no cache.
+    """
+    return all(
+        any((cache_dir / table_name).glob("**/*.parquet"))
+        for table_name in (CABECALHO_TABLE, ITENS_TABLE)
+    )
+
+
+def _partitioned_select_sql(table_name: str) -> str:
+    """
+    Consulta com as linhas da tabela e as colunas de partição (ano/mês de
+    emissão). Os itens ficam na mesma partição do cabeçalho da nota.
+    """
+    if table_name == CABECALHO_TABLE:
+        return f"""
+            SELECT *,
+                year("DATA EMISSÃO") AS ano_emissao,
+                month("DATA EMISSÃO") AS mes_emissao
+            FROM {CABECALHO_TABLE}
+        """
+
+    return f"""
+        SELECT i.*,
+            year(c."DATA EMISSÃO") AS ano_emissao,
+            month(c."DATA EMISSÃO") AS mes_emissao
+        FROM {ITENS_TABLE} AS i
+        LEFT JOIN {CABECALHO_TABLE} AS c
+            ON c."CHAVE DE ACESSO" = i."CHAVE DE ACESSO"
+            AND c."{PERIOD_COLUMN}" = i."{PERIOD_COLUMN}"
+    """
+
+
+def _read_cache_sql(cache_dir: Path, table_name: str, renamed: bool) -> str:
+    """
+    Consulta que lê o cache de uma tabela com as partições tipadas. Com
+    renamed=True, as colunas de partição recebem os nomes expostos ao agente.
+    """
+    glob = sql_string((cache_dir / table_name / "**" / "*.parquet").as_posix())
+    hive_types = ", ".join(
+        f"{sql_string(column)}: 'INTEGER'" for column in PARTITION_COLUMNS
+    )
+    read_sql = (
+        f"read_parquet({glob}, hive_partitioning = true, "
+        f"hive_types = {{{hive_types}}})"
+    )
+
+    if not renamed:
+        return f"SELECT * FROM {read_sql}"
+
+    renames = ", ".join(
+        f'{column} AS "{label}"' for column, label in PARTITION_COLUMNS.items()
+    )
+    return (
+        f"SELECT * EXCLUDE ({', '.join(PARTITION_COLUMNS)}), {renames} "
+        f"FROM {read_sql}"
+    )
+
+
+def _affected_partitions(
+        conn: duckdb.DuckDBPyConnection,
+        table_dir: Path,
+        table_name: str,
+        periods: list[str]
+    ) -> list[tuple]:
+    """
+    Partições (ano, mês) que contêm linhas dos períodos informados, seja no
+    banco (dados novos) ou no cache (dados antigos, que podem ter deixado de
+    existir).
+    """
+    periods_sql = ", ".join(sql_string(period) for period in periods)
+    queries = [
+        f"""
+            SELECT DISTINCT ano_emissao, mes_emissao
+            FROM ({_partitioned_select_sql(table_name)})
+            WHERE "{PERIOD_COLUMN}" IN ({periods_sql})
+        """
+    ]
+    if any(table_dir.glob("**/*.parquet")):
+        queries.append(f"""
+            SELECT DISTINCT ano_emissao, mes_emissao
+            FROM ({_read_cache_sql(table_dir.parent, table_name, renamed=False)})
+            WHERE "{PERIOD_COLUMN}" IN ({periods_sql})
+        """)
+
+    return conn.execute(" UNION ".join(queries)).fetchall()
+
+
+def _partition_value(value) -> str:
+    """
+    Nome da pasta de uma partição (o DuckDB grava nulos como NULL).
+    """
+    return "NULL" if value is None else str(value)
+
+
+def _sql_value(value) -> str:
+    """
+    Literal SQL de um valor de partição.
+    """
+    return "NULL" if value is None else str(int(value))
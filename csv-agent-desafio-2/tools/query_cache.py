@@ -0,0 +1,228 @@
+import hashlib
+import re
+import unicodedata
+from threading import Lock
+
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import DBAPIError
+
+
+# Tabela (dentro do próprio .duckdb) com as queries já geradas pela LLM
+SQL_CACHE_TABLE = "_cache_perguntas_sql"
+
+# Validade de uma query em cache e quantidade máxima de perguntas guardadas
+# (as menos usadas recentemente são descartadas primeiro)
+SQL_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+SQL_CACHE_MAX_ENTRIES = 1000
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normaliza uma pergunta para servir de chave do cache: sem acentos, em
+    minúsculas, com espaços simples e sem pontuação no final.
+
+    Ex.: "Quantas notas  de Março?" -> "quantas notas de marco"
+    """
+    question = unicodedata.normalize("NFKD", question)
+    question = "".join(char for char in question if not unicodedata.combining(char))
+    question = re.sub(r"\s+", " ", question.lower()).strip()
+    return question.rstrip("?!.;: ")
+
+
+def schema_fingerprint(*parts: str) -> str:
+    """
+    Hash dos textos que descrevem o esquema no prompt. Se qualquer um deles
+    mudar, as queries guardadas deixam de valer.
+    """
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+class SqlQueryCache:
+    """
+    Cache persistente (no .duckdb) de pergunta normalizada -> query SQL
+    gerada, para evitar a chamada à LLM em perguntas repetidas.
+
+    As entradas expiram após ttl_seconds, são descartadas por LRU acima de
+    max_entries e invalidadas quando o esquema descrito no prompt muda.
+
+    Com read_only=True (banco aberto somente para leitura), o cache só é
+    consultado: novas queries não são guardadas nem descartadas.
+
+    Pode ser usado por várias threads: as leituras não abrem transação de
+    escrita e as escritas (inclusive a atualização de last_used_at/hits nos
+    acertos) são serializadas por um lock, já que o DuckDB recusa
+    atualizações concorrentes da mesma linha.
+    """
+
+    def __init__(
+            self,
+            engine: Engine,
+            schema_hash: str,
+            ttl_seconds: int = SQL_CACHE_TTL_SECONDS,
+            max_entries: int = SQL_CACHE_MAX_ENTRIES,
+            read_only: bool = False
+        ):
+        self.engine = engine
+        self.schema_hash = schema_hash
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.read_only = read_only
+        self.hits = 0
+        self.misses = 0
+        # Protege os contadores acima
+        self._stats_lock = Lock()
+        # Serializa as escritas na tabela do cache
+        self._write_lock = Lock()
+
+        if read_only:
+            with self.engine.connect() as connection:
+                self.enabled = bool(connection.execute(
+                    text("SELECT 1 FROM information_schema.tables WHERE table_name = :name"),
+                    {"name": SQL_CACHE_TABLE},
+                ).fetchone())
+            return
+
+        self.enabled = True
+        with self.engine.begin() as connection:
+            connection.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {SQL_CACHE_TABLE} (
+                    question_key VARCHAR PRIMARY KEY,
+                    question VARCHAR,
+                    sql_query VARCHAR,
+                    schema_hash VARCHAR,
+                    created_at TIMESTAMP,
+                    last_used_at TIMESTAMP,
+                    hits BIGINT
+                )
+            """))
+            # Queries geradas para outro esquema não valem mais
+            connection.execute(
+                text(f"DELETE FROM {SQL_CACHE_TABLE} WHERE schema_hash <> :schema_hash"),
+                {"schema_hash": self.schema_hash},
+            )
+
+    def get(self, question: str) -> str | None:
+        """
+        Retorna a query guardada para a pergunta, ou None se não houver uma
+        válida.
+        """
+        if not self.enabled:
+            self._count(hit=False)
+            return None
+
+        params = {
+            "question_key": normalize_question(question),
+            "schema_hash": self.schema_hash,
+            "ttl_seconds": self.ttl_seconds,
+        }
+        # Leitura em uma conexão própria, sem escrita na mesma transação
+        with self.engine.connect() as connection:
+            row = connection.execute(text(f"""
+                SELECT sql_query FROM {SQL_CACHE_TABLE}
+                WHERE question_key = :question_key
+                    AND schema_hash = :schema_hash
+                    AND created_at >= current_localtimestamp()
+                        - to_seconds(CAST(:ttl_seconds AS BIGINT))
+            """), params).fetchone()
+
+        if row is None:
+            self._count(hit=False)
+            return None
+
+        if not self.read_only:
+            self._touch(params)
+
+        self._count(hit=True)
+        return row[0]
+
+    def put(self, question: str, sql_query: str):
+        """
+        Guarda a query gerada para a pergunta e descarta as entradas
+        expiradas ou excedentes.
+        """
+        if self.read_only:
+            return
+
+        with self._write_lock, self.engine.begin() as connection:
+            connection.execute(text(f"""
+                INSERT OR REPLACE INTO {SQL_CACHE_TABLE} VALUES (
+                    :question_key, :question, :sql_query, :schema_hash,
+                    current_localtimestamp(), current_localtimestamp(), 0
+                )
+            """), {
+                "question_key": normalize_question(question),
+                "question": question,
+                "sql_query": sql_query,
+                "schema_hash": self.schema_hash,
+            })
+            connection.execute(text(f"""
+                DELETE FROM {SQL_CACHE_TABLE}
+                WHERE created_at < current_localtimestamp()
+                        - to_seconds(CAST(:ttl_seconds AS BIGINT))
+                    OR question_key NOT IN (
+                        SELECT question_key FROM {SQL_CACHE_TABLE}
+                        ORDER BY last_used_at DESC
+                        LIMIT :max_entries
+                    )
+            """), {"ttl_seconds": self.ttl_seconds, "max_entries": self.max_entries})
+
+    def discard(self, question: str):
+        """
+        Remove a pergunta do cache (ex.: a query guardada falhou ao executar).
+        """
+        if self.read_only:
+            return
+
+        with self._write_lock, self.engine.begin() as connection:
+            connection.execute(
+                text(f"DELETE FROM {SQL_CACHE_TABLE} WHERE question_key = :question_key"),
+                {"question_key": normalize_question(question)},
+            )
+
+    def stats(self) -> dict:
+        """
+        Contadores de acertos/falhas desta execução e tamanho atual do cache.
+        """
+        entries = 0
+        if self.enabled:
+            with self.engine.connect() as connection:
+                entries = connection.execute(
+                    text(f"SELECT COUNT(*) FROM {SQL_CACHE_TABLE}")
+                ).scalar()
+
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def _touch(self, params: dict):
+        """
+        Atualiza last_used_at e hits da pergunta (usados no descarte por
+        LRU). É só informativo: um conflito com outro processo que escreve
+        no banco é ignorado, sem afetar a resposta do cache.
+        """
+        with self._write_lock:
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(text(f"""
+                        UPDATE {SQL_CACHE_TABLE}
+                        SET last_used_at = current_localtimestamp(), hits = hits + 1
+                        WHERE question_key = :question_key
+                    """), params)
+            except DBAPIError:
+                pass
+
+    def _count(self, hit: bool):
+        """
+        Soma um acerto ou uma falha aos contadores desta execução.
+        """
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
@@ -0,0 +1,115 @@
+import sys
+from collections import OrderedDict
+from threading import Lock
+
+
+# Memória máxima ocupada pelos resultados guardados (em bytes)
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def canonicalize_sql(sql_query: str) -> str:
+    """
+    Forma canônica de uma query para servir de chave do cache: sem
+    comentários "--", sem ";" final e com espaços simples fora de textos
+    entre aspas (o conteúdo das aspas é mantido exatamente como está).
+    """
+    parts, quote, pending_space = [], None, False
+    index = 0
+
+    while index < len(sql_query):
+        char = sql_query[index]
+
+        if quote:
+            parts.append(char)
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            if pending_space and parts:
+                parts.append(" ")
+            pending_space = False
+            parts.append(char)
+            quote = char
+        elif sql_query.startswith("--", index):
+            # Comentário até o fim da linha
+            newline = sql_query.find("\n", index)
+            index = len(sql_query) if newline == -1 else newline
+            pending_space = True
+            continue
+        elif char.isspace():
+            pending_space = True
+        else:
+            if pending_space and parts:
+                parts.append(" ")
+            pending_space = False
+            parts.append(char)
+
+        index += 1
+
+    return "".join(parts).rstrip("; ")
+
+
+class QueryResultCache:
+    """
+    Cache em memória (LRU limitado por bytes) dos resultados de queries.
+
+    A chave inclui a versão dos dados, incrementada a cada carga: após uma
+    recarga, os resultados antigos simplesmente deixam de ser encontrados e
+    acabam descartados pelo LRU.
+    """
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, sql_query: str, data_version: int) -> str | None:
+        """
+        Retorna o resultado guardado para a query nesta versão dos dados, ou
+        None.
+        """
+        key = (canonicalize_sql(sql_query), data_version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, sql_query: str, data_version: int, result: str):
+        """
+        Guarda o resultado, descartando os menos usados recentemente até caber
+        no limite de memória. Resultados maiores que o limite não são
+        guardados.
+        """
+        key = (canonicalize_sql(sql_query), data_version)
+        size = sys.getsizeof(result) + sys.getsizeof(key[0])
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (result, size)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def stats(self) -> dict:
+        """
+        Contadores de acertos/falhas e ocupação atual do cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+        }
@@ -0,0 +1,155 @@
+from decimal import Decimal
+
+from sqlalchemy import Connection, text
+
+from tools.tracing import add_to_current_span
+
+
+# Orçamento do resultado enviado ao result_analyst_chain: acima de qualquer
+# um dos limites, o resultado completo é trocado por um resumo.
+RESULT_MAX_ROWS = 200
+RESULT_MAX_CHARS = 20_000
+
+# Linhas buscadas do banco por vez e linhas de amostra no resumo
+RESULT_FETCH_BATCH_ROWS = 1_000
+RESULT_SAMPLE_ROWS = 10
+
+# Estatísticas do SUMMARIZE do DuckDB incluídas no resumo
+SUMMARY_STATS = ["min", "max", "approx_unique", "avg", "null_percentage"]
+
+NO_RESULTS_MESSAGE = "No results found for the query."
+
+
+class ShapedResult(str):
+    """
+    Texto do resultado enviado à LLM que também guarda as colunas e as
+    linhas completas, para a resposta montada localmente
+    (tools/answer_formatting.py). Resultados resumidos não têm linhas.
+    """
+
+    def __new__(cls, text: str, columns: list[str], rows: list[tuple] | None):
+        shaped = super().__new__(cls, text)
+        shaped.columns = tuple(columns)
+        shaped.rows = tuple(rows) if rows is not None else None
+        return shaped
+
+    def __sizeof__(self):
+        # As linhas ocupam aproximadamente o mesmo que o texto (que é o repr
+        # delas), o que conta no limite de memória do cache de resultados
+        return 2 * super().__sizeof__()
+
+
+def shape_query_result(
+        connection: Connection,
+        query: str,
+        max_rows: int = RESULT_MAX_ROWS,
+        max_chars: int = RESULT_MAX_CHARS,
+        batch_rows: int = RESULT_FETCH_BATCH_ROWS,
+        sample_rows: int = RESULT_SAMPLE_ROWS
+    ) -> ShapedResult:
+    """
+    Executa a query buscando as linhas em lotes e devolve o resultado como
+    texto para a LLM, sem nunca materializar mais que o orçamento.
+
+    Resultados dentro do orçamento saem no formato de sempre (lista de
+    tuplas). Resultados maiores viram um resumo calculado pelo próprio banco:
+    quantidade de linhas, estatísticas por coluna e as primeiras linhas.
+    O texto devolvido (ShapedResult) também traz as colunas e, fora do
+    resumo, as linhas.
+
+    Args:
+    connection(Connection): Conexão do SQLAlchemy com o banco.
+    query(str): Query SQL a ser executada.
+    max_rows(int): Máximo de linhas enviadas por completo.
+    max_chars(int): Máximo de caracteres do resultado completo.
+    batch_rows(int): Linhas buscadas por lote.
+    sample_rows(int): Linhas de amostra incluídas no resumo.
+    """
+    result = connection.execute(text(query))
+    columns = list(result.keys())
+    rows, chars, oversized = [], 2, False
+
+    # Busca em lotes, parando assim que o orçamento é ultrapassado
+    try:
+        while not oversized:
+            batch = result.fetchmany(batch_rows)
+            if not batch:
+                break
+            for row in batch:
+                row = _plain_row(row)
+                rows.append(row)
+                chars += len(repr(row)) + 2
+                if len(rows) > max_rows or chars > max_chars:
+                    oversized = True
+                    break
+    finally:
+        result.close()
+
+    # Linhas e bytes (texto) buscados do banco, no span da execução
+    add_to_current_span(rows_returned=len(rows), bytes_fetched=chars)
+
+    if oversized:
+        summary = _summarize_result(connection, query, columns, rows[:sample_rows])
+        return ShapedResult(summary, columns, None)
+    if not rows:
+        return ShapedResult(NO_RESULTS_MESSAGE, columns, rows)
+    return ShapedResult(str(rows), columns, rows)
+
+
+def _plain_row(row) -> tuple:
+    """
+    Linha como tupla, com os decimais (valores monetários) como float: o
+    texto enviado à LLM fica 522.5 em vez de Decimal('522.50').
+    """
+    return tuple(
+        float(value) if isinstance(value, Decimal) else value for value in row
+    )
+
+
+def _summarize_result(
+        connection: Connection,
+        query: str,
+        columns: list[str],
+        sample: list[tuple]
+    ) -> str:
+    """
+    Resumo compacto de um resultado grande: contagem de linhas e estatísticas
+    por coluna (via SUMMARIZE, calculadas no banco) e uma amostra de linhas.
+    """
+    subquery = query.strip().rstrip(";")
+    lines = []
+
+    try:
+        row_count = connection.execute(
+            text(f"SELECT COUNT(*) FROM ({subquery}) AS _resultado")
+        ).scalar()
+        lines.append(
+            f"The result is too large to show in full: {row_count} rows and "
+            f"{len(columns)} columns ({', '.join(columns)})."
+        )
+    except Exception:
+        lines.append(
+            f"The result is too large to show in full (more than {len(sample)} "
+            f"rows, {len(columns)} columns: {', '.join(columns)})."
+        )
+
+    try:
+        summary = connection.execute(text(f"SUMMARIZE {subquery}"))
+        summary_columns = list(summary.keys())
+        lines.append("Column statistics:")
+        for summary_row in summary.fetchall():
+            values = dict(zip(summary_columns, summary_row))
+            stats = ", ".join(
+                f"{stat}={values[stat]}" for stat in SUMMARY_STATS
+                if values.get(stat) is not None
+            )
+            lines.append(
+                f"- {values['column_name']} ({values['column_type']}): {stats}"
+            )
+    except Exception:
+        # Sem estatísticas (ex.: query que o SUMMARIZE não aceita), o resumo
+        # segue apenas com a contagem e a amostra
+        pass
+
+    lines.append(f"First {len(sample)} rows: {sample}")
+    return "\n".join(lines)
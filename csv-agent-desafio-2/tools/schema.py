@@ -0,0 +1,386 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+
+# Arquivos .csv de origem de cada par (AAAAMM_NFs_Cabecalho.csv e
+# AAAAMM_NFs_Itens.csv)
+CABECALHO_FILE = "Cabecalho"
+ITENS_FILE = "Itens"
+
+# Tabelas de destino: uma linha por nota (header) e uma por item (item)
+HEADER = "header"
+ITEM = "item"
+
+# Siglas das UFs, mais EX para operações com o exterior
+UF_CODES = (
+    "AC", "AL", "AM", "AP", "BA", "CE", "DF", "ES", "GO", "MA", "MG", "MS",
+    "MT", "PA", "PB", "PE", "PI", "PR", "RJ", "RN", "RO", "RR", "RS", "SC",
+    "SE", "SP", "TO", "EX",
+)
+
+# Palavras das perguntas (sem acentos, em minúsculas) que indicam meses e
+# estados, usadas nas palavras-chave das colunas de data e de UF
+MONTH_KEYWORDS = (
+    "janeiro", "fevereiro", "marco", "abril", "maio", "junho", "julho",
+    "agosto", "setembro", "outubro", "novembro", "dezembro",
+)
+STATE_KEYWORDS = tuple(code.lower() for code in UF_CODES if code != "EX") + (
+    "acre", "alagoas", "amapa", "amazonas", "bahia", "ceara", "distrito",
+    "espirito", "goias", "maranhao", "mato", "minas", "paraiba", "parana",
+    "pernambuco", "piaui", "rio", "rondonia", "roraima", "santa", "paulo",
+    "sergipe", "tocantins",
+)
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    """
+    Contrato de uma coluna das notas fiscais: tipo no banco, arquivos de
+    origem e descrição usada no prompt do agente.
+
+    - values: domínio fechado; a coluna é gravada como ENUM e valores fora
+      dele interrompem a carga.
+    - dictionary: texto de baixa cardinalidade com domínio aberto; no banco
+      fica como VARCHAR (que o DuckDB já grava com compressão de dicionário)
+      e no pandas é lido como category.
+    - length: tamanho fixo exigido do texto (ex.: chave de acesso).
+    - derived: "load" para colunas criadas na carga, "parquet" para as que só
+      existem nas views do cache .parquet.
+    - keywords: inícios de palavras (sem acentos, em minúsculas) das perguntas
+      que tornam a coluna relevante, além das palavras do próprio nome (ver
+      tools/schema_pruning.py).
+    """
+    name: str
+    dtype: str
+    description: str
+    files: tuple[str, ...] = (CABECALHO_FILE, ITENS_FILE)
+    values: tuple[str, ...] | None = None
+    dictionary: bool = False
+    length: int | None = None
+    derived: str | None = None
+    keywords: tuple[str, ...] = ()
+
+    @property
+    def storage_type(self) -> str:
+        """
+        Tipo da coluna nas tabelas do banco.
+        """
+        if self.values:
+            return "ENUM(" + ", ".join(
+                "'" + value.replace("'", "''") + "'" for value in self.values
+            ) + ")"
+        return self.dtype
+
+    @property
+    def read_type(self) -> str:
+        """
+        Tipo de leitura do .csv. Datas e ENUMs são lidos como texto: as datas
+        são convertidas depois (formatos alternativos viram NULL) e os ENUMs
+        são validados antes da gravação.
+        """
+        if self.values or self.dtype == "TIMESTAMP":
+            return "VARCHAR"
+        return self.dtype
+
+    @property
+    def pandas_dtype(self) -> str:
+        """
+        dtype de leitura no pandas: category para baixa cardinalidade e texto
+        para o restante (a conversão de tipos é feita em SQL, sem inferência).
+        """
+        return "category" if self.values or self.dictionary else "str"
+
+    @property
+    def tables(self) -> tuple[str, ...]:
+        """
+        Tabelas que guardam a coluna.
+        """
+        if self.derived == "parquet":
+            return ()
+        if self.derived == "load" or self.name == ACCESS_KEY_COLUMN:
+            return (HEADER, ITEM)
+        if CABECALHO_FILE in self.files:
+            return (HEADER,)
+        return (ITEM,)
+
+    @property
+    def prompt_type(self) -> str:
+        """
+        Tipo mostrado no prompt (ENUMs pequenos com os valores possíveis).
+        """
+        if self.values and len(self.values) <= 5:
+            return "one of " + ", ".join(f"'{value}'" for value in self.values)
+        if self.values:
+            return "ENUM"
+        return self.dtype
+
+
+ACCESS_KEY_COLUMN = "CHAVE DE ACESSO"
+PERIOD_COLUMN = "PERÍODO"
+
+# Colunas na ordem dos arquivos: as do cabeçalho (a maioria repetida no
+# arquivo de itens) e, no fim, as exclusivas dos itens
+COLUMNS = (
+    ColumnSpec(
+        ACCESS_KEY_COLUMN, "VARCHAR",
+        "Chave de Acesso (Access Key) - The unique 44-digit identifier for the electronic invoice; acts as the primary key.",
+        keywords=("chave", "nota", "nfe"),
+        length=44,
+    ),
+    ColumnSpec(
+        "MODELO", "VARCHAR",
+        "Modelo (Invoice Model) - Identifies the type of tax document (e.g., 55 for NF-e).",
+        keywords=("modelo", "nfce", "cupom"),
+        dictionary=True,
+    ),
+    ColumnSpec(
+        "SÉRIE", "INTEGER",
+        "Série (Invoice Series) - A sub-identifier for the invoice, allowing for multiple numbering sequences.",
+        keywords=("serie",),
+    ),
+    ColumnSpec(
+        "NÚMERO", "BIGINT",
+        "Número (Invoice Number) - The sequential fiscal number of the invoice.",
+        keywords=("numero",),
+    ),
+    ColumnSpec(
+        "NATUREZA DA OPERAÇÃO", "VARCHAR",
+        "Natureza da Operação (Nature of Operation) - Descriptive text indicating the purpose of the transaction (e.g., \"Venda de mercadoria\").",
+        keywords=(
+            "natureza", "operac", "venda", "devoluc", "remessa",
+            "transferenc", "bonific",
+        ),
+    ),
+    ColumnSpec(
+        "DATA EMISSÃO", "TIMESTAMP",
+        "Data de Emissão (Issuance Date) - The date the invoice was created. Format: YYYY-MM-DD.",
+        keywords=(
+            "data", "dia", "dias", "diari", "semana", "mes",
+            "meses", "mensal", "ano", "anos", "anual", "trimestre",
+            "quando", "emitid", "emissao", "hora", "periodo",
+            *MONTH_KEYWORDS,
+        ),
+    ),
+    ColumnSpec(
+        "EVENTO MAIS RECENTE", "VARCHAR",
+        "Evento Mais Recente (Most Recent Event) - Describes the type of the last significant event related to the invoice.",
+        keywords=("evento", "cancel", "autoriz", "situac", "status", "correc"),
+        files=(CABECALHO_FILE,), dictionary=True,
+    ),
+    ColumnSpec(
+        "DATA/HORA EVENTO MAIS RECENTE", "TIMESTAMP",
+        "Data/Hora Evento Mais Recente (Most Recent Event Date/Time) - Timestamp of the last significant event related to the invoice (e.g., cancellation, correction).",
+        keywords=("evento", "cancel", "autoriz", "correc"),
+        files=(CABECALHO_FILE,),
+    ),
+    ColumnSpec(
+        "CPF/CNPJ Emitente", "VARCHAR",
+        "CPF/CNPJ do Emitente (Issuer's CPF/CNPJ) - Brazilian individual or corporate taxpayer ID of the invoice issuer.",
+        keywords=("cnpj", "cpf", "emitent", "fornecedor", "vendedor"),
+    ),
+    ColumnSpec(
+        "RAZÃO SOCIAL EMITENTE", "VARCHAR",
+        "Razão Social Emitente (Issuer's Corporate Name) - The full legal name of the company that issued the invoice.",
+        keywords=("emitent", "empresa", "fornecedor", "vendedor", "razao", "quem"),
+    ),
+    ColumnSpec(
+        "INSCRIÇÃO ESTADUAL EMITENTE", "VARCHAR",
+        "Inscrição Estadual Emitente (Issuer's State Registration Number) - Unique tax ID within the state for ICMS purposes.",
+        keywords=("inscric", "ie"),
+    ),
+    ColumnSpec(
+        "UF EMITENTE", "VARCHAR",
+        "UF Emitente (Issuer's State) - The Brazilian state (e.g., 'SC', 'PR') where the invoice was issued.",
+        keywords=("uf", "estado", "estadual", "emitent", "origem", *STATE_KEYWORDS),
+        values=UF_CODES,
+    ),
+    ColumnSpec(
+        "MUNICÍPIO EMITENTE", "VARCHAR",
+        "Município Emitente (Issuer's Municipality) - The city where the invoice was issued.",
+        keywords=("municip", "cidade", "emitent"),
+    ),
+    ColumnSpec(
+        "CNPJ DESTINATÁRIO", "VARCHAR",
+        "CNPJ do Destinatário (Recipient's CNPJ) - Brazilian corporate taxpayer ID of the invoice recipient.",
+        keywords=("cnpj", "destinat", "cliente", "comprador"),
+    ),
+    ColumnSpec(
+        "NOME DESTINATÁRIO", "VARCHAR",
+        "Nome Destinatário (Recipient's Name) - The name of the individual or company receiving the invoice.",
+        keywords=("destinat", "cliente", "comprador", "nome", "quem"),
+    ),
+    ColumnSpec(
+        "UF DESTINATÁRIO", "VARCHAR",
+        "UF Destinatário (Recipient's State) - The Brazilian state (e.g., 'SP', 'RJ') of the recipient ('EX' for abroad).",
+        keywords=("uf", "estado", "destinat", "destino", "cliente", *STATE_KEYWORDS),
+        values=UF_CODES,
+    ),
+    ColumnSpec(
+        "INDICADOR IE DESTINATÁRIO", "VARCHAR",
+        "Indicador IE Destinatário (Recipient's State Registration Indicator) - Shows if the recipient contributes ICMS and has a State Registration.",
+        keywords=("contribuint", "isent", "indicador", "icms"),
+        values=("CONTRIBUINTE ICMS", "CONTRIBUINTE ISENTO", "NÃO CONTRIBUINTE"),
+    ),
+    ColumnSpec(
+        "DESTINO DA OPERAÇÃO", "VARCHAR",
+        "Destino da Operação (Operation Destination) - Indicates if the transaction is internal (within state), inter-state, or external.",
+        keywords=("destino", "interna", "interestadu", "exterior", "export", "import"),
+        values=(
+            "1 - OPERAÇÃO INTERNA", "2 - OPERAÇÃO INTERESTADUAL",
+            "3 - OPERAÇÃO COM EXTERIOR",
+        ),
+    ),
+    ColumnSpec(
+        "CONSUMIDOR FINAL", "VARCHAR",
+        "Consumidor Final (Final Consumer) - Indicates if the recipient is the end consumer (Yes/No).",
+        keywords=("consumidor",),
+        values=("0 - NORMAL", "1 - CONSUMIDOR FINAL"),
+    ),
+    ColumnSpec(
+        "PRESENÇA DO COMPRADOR", "VARCHAR",
+        "Presença do Comprador (Buyer Presence Indicator) - Describes the buyer's presence during the transaction (e.g., in-person, internet).",
+        keywords=(
+            "presenc", "presencial", "internet", "online",
+            "telemarketing", "entrega",
+        ),
+        dictionary=True,
+    ),
+    ColumnSpec(
+        "VALOR NOTA FISCAL", "DECIMAL(18,2)",
+        "Valor Nota Fiscal (Invoice Total Value) - The overall total monetary value of the entire invoice.",
+        keywords=(
+            "valor", "total", "fatur", "receita", "gast", "ticket",
+            "caro", "maior", "montante", "reais", "dinheiro", "soma",
+        ),
+        files=(CABECALHO_FILE,),
+    ),
+    ColumnSpec(
+        "NÚMERO PRODUTO", "INTEGER",
+        "Número Produto (Product Number) - An internal code or identifier for the specific product/service item.",
+        keywords=("item", "itens", "linha"),
+        files=(ITENS_FILE,),
+    ),
+    ColumnSpec(
+        "DESCRIÇÃO DO PRODUTO/SERVIÇO", "VARCHAR",
+        "Descrição do Produto/Serviço (Product/Service Description) - Detailed description of the item or service on the invoice line.",
+        keywords=(
+            "produto", "servic", "descric", "item", "itens",
+            "mercadoria", "vendid", "comprad",
+        ),
+        files=(ITENS_FILE,),
+    ),
+    ColumnSpec(
+        "CÓDIGO NCM/SH", "VARCHAR",
+        "Código NCM/SH (NCM/SH Code) - Mercosur Common Nomenclature / Harmonized System code for products/services.",
+        keywords=("ncm", "classific", "categori", "tipo"),
+        files=(ITENS_FILE,),
+    ),
+    ColumnSpec(
+        "NCM/SH (TIPO DE PRODUTO)", "VARCHAR",
+        "NCM/SH (Tipo de Produto) - Another reference to the product classification code.",
+        keywords=("ncm", "classific", "categori", "tipo"),
+        files=(ITENS_FILE,),
+    ),
+    ColumnSpec(
+        "CFOP", "SMALLINT",
+        "Código Fiscal de Operações e Prestações (Tax Code for Operations and Services) - Indicates the nature of the transaction.",
+        keywords=("cfop", "operac"),
+        files=(ITENS_FILE,),
+    ),
+    ColumnSpec(
+        "QUANTIDADE", "DECIMAL(18,4)",
+        "Quantidade (Quantity) - The quantity of the specific product/service item sold.",
+        keywords=("quantidade", "qtd", "unidades", "volume", "vendid", "comprad"),
+        files=(ITENS_FILE,),
+    ),
+    ColumnSpec(
+        "UNIDADE", "VARCHAR",
+        "Unidade (Unit of Measure) - The unit in which the product/service quantity is measured (e.g., \"UN\" for unit, \"KG\" for kilogram).",
+        keywords=("unidade", "medida", "kg", "quilo", "litro", "metro"),
+        files=(ITENS_FILE,), dictionary=True,
+    ),
+    ColumnSpec(
+        "VALOR UNITÁRIO", "DECIMAL(18,10)",
+        "Valor Unitário (Unit Value) - The monetary value per unit of the specific product/service item.",
+        keywords=("unitari", "preco", "caro", "barato", "custo"),
+        files=(ITENS_FILE,),
+    ),
+    ColumnSpec(
+        "VALOR TOTAL", "DECIMAL(18,2)",
+        "Valor Total (Item Total Value) - The total monetary value for a specific line item (Quantity * Unit Value).",
+        keywords=(
+            "valor", "total", "fatur", "receita", "gast", "item",
+            "itens", "produto", "soma",
+        ),
+        files=(ITENS_FILE,),
+    ),
+    ColumnSpec(
+        PERIOD_COLUMN, "VARCHAR",
+        "Período (Source Period) - Year and month of the source file the invoice was loaded from, as text in the format 'YYYYMM' (e.g., '202401').",
+        keywords=("periodo", "arquivo", "carga"),
+        files=(), derived="load",
+    ),
+    ColumnSpec(
+        "ANO EMISSÃO", "INTEGER",
+        "Ano de Emissão (Issuance Year) - Year of \"DATA EMISSÃO\" as an integer. Only available in the '_parquet' tables; filtering on it skips the other years' partitions.",
+        keywords=("ano", "anos", "anual", *MONTH_KEYWORDS),
+        files=(), derived="parquet",
+    ),
+    ColumnSpec(
+        "MÊS EMISSÃO", "INTEGER",
+        "Mês de Emissão (Issuance Month) - Month (1-12) of \"DATA EMISSÃO\" as an integer. Only available in the '_parquet' tables; filtering on it skips the other months' partitions.",
+        keywords=("mes", "meses", "mensal", "trimestre", *MONTH_KEYWORDS),
+        files=(), derived="parquet",
+    ),
+)
+
+COLUMNS_BY_NAME = {column.name: column for column in COLUMNS}
+
+
+def csv_columns(file: str) -> dict[str, str]:
+    """
+    Colunas de um arquivo .csv (na ordem do arquivo) com o tipo de leitura.
+
+    Args:
+    file(str): CABECALHO_FILE ou ITENS_FILE.
+    """
+    return {
+        column.name: column.read_type for column in COLUMNS if file in column.files
+    }
+
+
+def table_columns(table: str) -> dict[str, str]:
+    """
+    Colunas de uma tabela (HEADER ou ITEM) com o tipo de gravação no banco.
+    """
+    return {
+        column.name: column.storage_type for column in COLUMNS
+        if table in column.tables
+    }
+
+
+def pandas_dtypes(file: str) -> dict[str, str]:
+    """
+    dtypes de leitura de um arquivo .csv no pandas.
+    """
+    return {
+        column.name: column.pandas_dtype for column in COLUMNS if file in column.files
+    }
+
+
+def describe_columns(names: Iterable[str] | None = None) -> str:
+    """
+    Lista das colunas para o prompt do agente, em ordem alfabética, com as
+    tabelas que as contêm e o tipo.
+
+    Args:
+    names(Iterable[str] | None): Colunas incluídas (padrão: todas).
+    """
+    selected = COLUMNS if names is None else [COLUMNS_BY_NAME[name] for name in names]
+    lines = []
+    for column in sorted(selected, key=lambda column: column.name):
+        tags = ", ".join(column.tables) if column.tables else "parquet only"
+        lines.append(
+            f'- "{column.name}" [{tags}] ({column.prompt_type}): {column.description}'
+        )
+    return "\n".join(lines)
@@ -0,0 +1,83 @@
+import re
+
+from tools.description_index import DESCRIPTION_COLUMN
+from tools.query_cache import normalize_question
+from tools.schema import ACCESS_KEY_COLUMN, COLUMNS, MONTH_KEYWORDS, PERIOD_COLUMN
+
+
+# Colunas sempre incluídas no prompt reduzido: a chave das notas (contagens),
+# o período que liga cabeçalhos e itens e a descrição dos produtos (os nomes
+# de produtos da pergunta não têm como ser previstos em palavras-chave)
+ALWAYS_INCLUDED_COLUMNS = (ACCESS_KEY_COLUMN, PERIOD_COLUMN, DESCRIPTION_COLUMN)
+
+# Palavras-chave de até este tamanho (e os meses) precisam aparecer inteiras
+# na pergunta ("uf", "mes", "sp", mas "maio" não casa com "maiores"); as
+# demais valem como início de palavra ("emitent" casa com "emitentes")
+EXACT_MATCH_MAX_LENGTH = 3
+EXACT_MATCH_KEYWORDS = set(MONTH_KEYWORDS)
+
+# Palavras do nome das colunas que não as identificam
+NAME_STOPWORDS = {"de", "do", "da", "dos", "das", "mais", "recente"}
+
+# Anos citados na pergunta (ex.: "em 2024") tornam as colunas de data
+# relevantes
+YEAR_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b")
+DATE_COLUMNS = ("DATA EMISSÃO", "ANO EMISSÃO", "MÊS EMISSÃO")
+
+
+def _column_keywords() -> dict[str, set[str]]:
+    """
+    Palavras-chave de cada coluna: as do contrato de colunas e as palavras do
+    próprio nome, sem acentos e em minúsculas.
+    """
+    keywords = {}
+    for column in COLUMNS:
+        name_words = {
+            word for word in re.findall(r"[a-z0-9]+", normalize_question(column.name))
+            if word not in NAME_STOPWORDS
+        }
+        keywords[column.name] = name_words | set(column.keywords)
+    return keywords
+
+
+COLUMN_KEYWORDS = _column_keywords()
+
+
+def select_relevant_columns(question: str) -> list[str] | None:
+    """
+    Seleciona as colunas relevantes para a pergunta (palavras-chave e
+    sinônimos de cada coluna, sem serviço externo), para que o prompt de
+    geração de SQL descreva só essas colunas.
+
+    Devolve None quando nenhuma palavra da pergunta indica uma coluna: nesse
+    caso, o prompt usa o esquema completo.
+
+    Ex.: "Qual o valor total por UF emitente?" -> CHAVE DE ACESSO, PERÍODO,
+    UF EMITENTE, VALOR NOTA FISCAL, VALOR TOTAL, ...
+
+    Args:
+    question(str): Pergunta em linguagem natural.
+    """
+    words = set(re.findall(r"[a-z0-9]+", normalize_question(question)))
+
+    selected = set()
+    for column_name, keywords in COLUMN_KEYWORDS.items():
+        if any(_matches(keyword, words) for keyword in keywords):
+            selected.add(column_name)
+    if any(YEAR_PATTERN.fullmatch(word) for word in words):
+        selected.update(DATE_COLUMNS)
+
+    if not selected:
+        return None
+    selected.update(ALWAYS_INCLUDED_COLUMNS)
+    return [column.name for column in COLUMNS if column.name in selected]
+
+
+def _matches(keyword: str, words: set[str]) -> bool:
+    """
+    Verifica se a palavra-chave aparece na pergunta (inteira, se for curta,
+    ou como início de uma palavra).
+    """
+    if len(keyword) <= EXACT_MATCH_MAX_LENGTH or keyword in EXACT_MATCH_KEYWORDS:
+        return keyword in words
+    return any(word.startswith(keyword) for word in words)
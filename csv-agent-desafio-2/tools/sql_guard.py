@@ -0,0 +1,279 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import duckdb
+
+from tools.description_index import SEARCH_MACRO
+
+
+# Estimativa máxima de linhas em qualquer etapa do plano (EXPLAIN). Acima
+# disso a query é recusada.
+PREFLIGHT_MAX_ESTIMATED_ROWS = 50_000_000
+
+# Produtos cartesianos (CROSS JOIN ou junções sem igualdade) são recusados
+# acima desta estimativa de linhas
+PREFLIGHT_MAX_CROSS_PRODUCT_ROWS = 1_000_000
+
+# Queries sem LIMIT que devolveriam mais linhas que isto recebem um LIMIT
+PREFLIGHT_AUTO_LIMIT_ROWS = 100_000
+
+# Tempo máximo de execução de uma query (em segundos)
+QUERY_TIMEOUT_SECONDS = 30
+
+# Limites de memória e de threads do DuckDB durante as queries do agente
+QUERY_MEMORY_LIMIT = "2GB"
+QUERY_THREADS = max(1, (os.cpu_count() or 2) // 2)
+
+# Funções de tabela permitidas (as demais, como read_csv e read_parquet, leem
+# arquivos do disco), incluindo a macro de busca nas descrições de produtos
+ALLOWED_TABLE_FUNCTIONS = {"range", "generate_series", "unnest", SEARCH_MACRO}
+
+# Caracteres que indicam um caminho de arquivo no lugar do nome de uma tabela
+# (ex.: FROM '/etc/passwd' ou FROM 'dados.csv', lidos pelo DuckDB como
+# arquivos)
+FILE_PATH_CHARACTERS = ("/", "\\", ".")
+
+# Operadores do plano que combinam todas as linhas de um lado com todas as do
+# outro
+CROSS_PRODUCT_OPERATORS = {
+    "CROSS_PRODUCT", "NESTED_LOOP_JOIN", "BLOCKWISE_NL_JOIN",
+    "PIECEWISE_MERGE_JOIN",
+}
+
+
+class QueryRejected(Exception):
+    """
+    Query recusada na verificação prévia (não é somente leitura, é cara
+    demais ou excedeu o tempo limite).
+    """
+
+
+def preflight_query(
+        conn: duckdb.DuckDBPyConnection,
+        sql_query: str,
+        max_estimated_rows: int = PREFLIGHT_MAX_ESTIMATED_ROWS,
+        max_cross_product_rows: int = PREFLIGHT_MAX_CROSS_PRODUCT_ROWS,
+        auto_limit_rows: int = PREFLIGHT_AUTO_LIMIT_ROWS
+    ) -> tuple[str, str | None]:
+    """
+    Verifica a query antes da execução:
+
+    1. Só aceita um único SELECT (o DuckDB só serializa SELECTs, então
+       qualquer escrita, PRAGMA, COPY ou ATTACH é recusado), sem funções de
+       tabela que leiam arquivos (read_csv, read_parquet...) e só com tabelas
+       e views do banco (um caminho no FROM, como '/etc/passwd', também é
+       lido como arquivo pelo DuckDB).
+    2. Estima o custo com EXPLAIN: recusa planos com etapas grandes demais ou
+       produtos cartesianos caros, e acrescenta um LIMIT a queries sem LIMIT
+       que devolveriam linhas demais.
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    sql_query(str): Query a ser verificada.
+    max_estimated_rows(int): Maior estimativa de linhas aceita em uma etapa.
+    max_cross_product_rows(int): Maior produto cartesiano aceito.
+    auto_limit_rows(int): LIMIT aplicado a resultados grandes sem LIMIT.
+
+    Returns:
+    tuple[str, str | None]: A query a executar (com LIMIT, se aplicado) e um
+    aviso para acompanhar o resultado (ou None).
+    """
+    parsed = json.loads(
+        conn.execute("SELECT json_serialize_sql(?)", [sql_query]).fetchone()[0]
+    )
+    if parsed.get("error"):
+        raise QueryRejected(
+            f"Only read-only SELECT queries are allowed ({parsed.get('error_message')})"
+        )
+    if len(parsed["statements"]) != 1:
+        raise QueryRejected("Only a single SELECT statement is allowed per query")
+    if _contains_file_access(parsed):
+        raise QueryRejected("Table functions (e.g. read_csv) are not allowed")
+    unknown_relation = _find_unknown_relation(parsed, _catalog_relations(conn))
+    if unknown_relation is not None:
+        raise QueryRejected(
+            f"Only the database tables and views can be queried "
+            f"(not files): {unknown_relation}"
+        )
+
+    plan = json.loads(
+        conn.execute(f"EXPLAIN (FORMAT JSON) {sql_query}").fetchone()[1]
+    )
+    estimates = [_estimate_plan(node) for node in plan]
+    largest_step = max((estimate[1] for estimate in estimates), default=0)
+    largest_cross_product = max((estimate[2] for estimate in estimates), default=0)
+
+    if largest_cross_product > max_cross_product_rows:
+        raise QueryRejected(
+            f"The query combines every row of one table with every row of another "
+            f"(about {largest_cross_product:,} rows). Add a join condition."
+        )
+    if largest_step > max_estimated_rows:
+        raise QueryRejected(
+            f"The query is too expensive (about {largest_step:,} rows in one step). "
+            f"Add filters or aggregate the data."
+        )
+
+    result_rows = estimates[0][0] if estimates else 0
+    node = parsed["statements"][0]["node"]
+    has_limit = any(
+        modifier.get("type") == "LIMIT_MODIFIER"
+        for modifier in node.get("modifiers", [])
+    )
+    if result_rows > auto_limit_rows and not has_limit:
+        limit = json.loads(conn.execute(
+            "SELECT json_serialize_sql(?)", [f"SELECT 1 LIMIT {int(auto_limit_rows)}"]
+        ).fetchone()[0])["statements"][0]["node"]["modifiers"][0]
+        node.setdefault("modifiers", []).append(limit)
+        limited_query = conn.execute(
+            "SELECT json_deserialize_sql(?)", [json.dumps(parsed)]
+        ).fetchone()[0]
+        return limited_query, (
+            f"Note: the query would return about {result_rows:,} rows and was "
+            f"automatically limited to the first {auto_limit_rows:,}."
+        )
+
+    return sql_query, None
+
+
+def apply_resource_limits(
+        conn: duckdb.DuckDBPyConnection,
+        memory_limit: str = QUERY_MEMORY_LIMIT,
+        threads: int = QUERY_THREADS
+    ):
+    """
+    Limita a memória e as threads usadas pelo DuckDB. Essas configurações
+    valem para o banco inteiro (o DuckDB não tem limites por query), então
+    devem ser aplicadas depois da carga dos dados, que usa todos os núcleos.
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    memory_limit(str): Limite de memória (ex.: "2GB").
+    threads(int): Quantidade máxima de threads.
+    """
+    conn.execute(f"SET memory_limit = '{memory_limit}'")
+    conn.execute(f"SET threads = {int(threads)}")
+
+
+@contextmanager
+def query_timeout(conn: duckdb.DuckDBPyConnection, seconds: float = QUERY_TIMEOUT_SECONDS):
+    """
+    Interrompe a query em andamento na conexão se ela passar do tempo limite.
+    A interrupção vira um QueryRejected.
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão que executa a query.
+    seconds(float): Tempo limite em segundos.
+    """
+    interrupted = threading.Event()
+
+    def interrupt():
+        interrupted.set()
+        conn.interrupt()
+
+    timer = threading.Timer(seconds, interrupt)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    except Exception as e:
+        if interrupted.is_set():
+            raise QueryRejected(
+                f"The query was cancelled after {seconds:g}s. "
+                f"Add filters or aggregate the data."
+            ) from e
+        raise
+    finally:
+        timer.cancel()
+
+
+def _contains_file_access(value) -> bool:
+    """
+    Procura funções de tabela fora de ALLOWED_TABLE_FUNCTIONS (read_csv,
+    read_parquet, glob...) na árvore da query.
+    """
+    if isinstance(value, dict):
+        if value.get("type") == "TABLE_FUNCTION":
+            function_name = value.get("function", {}).get("function_name", "")
+            if function_name.lower() not in ALLOWED_TABLE_FUNCTIONS:
+                return True
+        return any(_contains_file_access(child) for child in value.values())
+    if isinstance(value, list):
+        return any(_contains_file_access(child) for child in value)
+    return False
+
+
+def _catalog_relations(conn: duckdb.DuckDBPyConnection) -> set[str]:
+    """
+    Nomes (em minúsculas) das tabelas e views do banco.
+    """
+    rows = conn.execute("""
+        SELECT table_name FROM duckdb_tables()
+        UNION SELECT view_name FROM duckdb_views()
+    """).fetchall()
+    return {name.lower() for name, in rows}
+
+
+def _find_unknown_relation(value, relations: set[str]) -> str | None:
+    """
+    Procura na árvore da query uma tabela (BASE_TABLE) que não seja uma
+    tabela/view do banco nem uma CTE da própria query, ou cujo nome pareça um
+    caminho de arquivo (com /, \\ ou extensão). Devolve o nome encontrado ou
+    None.
+    """
+    if isinstance(value, dict):
+        cte_names = {
+            entry["key"].lower()
+            for entry in (value.get("cte_map") or {}).get("map", [])
+        }
+        if cte_names:
+            relations = relations | cte_names
+        if value.get("type") == "BASE_TABLE":
+            table_name = value.get("table_name", "")
+            if (
+                any(character in table_name for character in FILE_PATH_CHARACTERS)
+                or table_name.lower() not in relations
+            ):
+                return table_name
+        children = value.values()
+    elif isinstance(value, list):
+        children = value
+    else:
+        return None
+    for child in children:
+        found = _find_unknown_relation(child, relations)
+        if found is not None:
+            return found
+    return None
+
+
+def _estimate_plan(node: dict) -> tuple[int, int, int]:
+    """
+    Estimativas de um nó do plano: linhas que ele produz, maior etapa da
+    subárvore e maior produto cartesiano da subárvore.
+    """
+    children = [_estimate_plan(child) for child in node.get("children", [])]
+    estimate = node.get("extra_info", {}).get("Estimated Cardinality")
+    rows = int(estimate) if str(estimate or "").isdigit() else None
+
+    cross_product = 0
+    if node.get("name", "").strip() in CROSS_PRODUCT_OPERATORS and children:
+        cross_product = 1
+        for child in children:
+            cross_product *= child[0]
+        if rows is None:
+            rows = cross_product
+
+    if rows is None:
+        # Agregação sem GROUP BY devolve uma linha; nos demais operadores sem
+        # estimativa, vale a maior entrada
+        if node.get("name", "").strip() == "UNGROUPED_AGGREGATE":
+            rows = 1
+        else:
+            rows = max((child[0] for child in children), default=0)
+
+    largest_step = max([rows, *(child[1] for child in children)])
+    largest_cross_product = max([cross_product, *(child[2] for child in children)])
+    return rows, largest_step, largest_cross_product
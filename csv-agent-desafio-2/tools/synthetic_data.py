@@ -0,0 +1,296 @@
+import io
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tools.load_and_treat_data import CABECALHO_COLUMNS, ITENS_COLUMNS
+
+
+# Volume do único mês real (data/202401_NFs.zip): 100 notas e 565 itens
+REAL_INVOICES_PER_MONTH = 100
+REAL_ITEMS_PER_INVOICE = 5.65
+
+# Código IBGE e capital de cada UF (usados na chave de acesso e no município)
+UFS = {
+    "RO": (11, "PORTO VELHO"), "AC": (12, "RIO BRANCO"), "AM": (13, "MANAUS"),
+    "RR": (14, "BOA VISTA"), "PA": (15, "BELEM"), "AP": (16, "MACAPA"),
+    "TO": (17, "PALMAS"), "MA": (21, "SAO LUIS"), "PI": (22, "TERESINA"),
+    "CE": (23, "FORTALEZA"), "RN": (24, "NATAL"), "PB": (25, "JOAO PESSOA"),
+    "PE": (26, "RECIFE"), "AL": (27, "MACEIO"), "SE": (28, "ARACAJU"),
+    "BA": (29, "SALVADOR"), "MG": (31, "BELO HORIZONTE"), "ES": (32, "VITORIA"),
+    "RJ": (33, "RIO DE JANEIRO"), "SP": (35, "SAO PAULO"), "PR": (41, "CURITIBA"),
+    "SC": (42, "FLORIANOPOLIS"), "RS": (43, "PORTO ALEGRE"),
+    "MS": (50, "CAMPO GRANDE"), "MT": (51, "CUIABA"), "GO": (52, "GOIANIA"),
+    "DF": (53, "BRASILIA"),
+}
+
+# Peso de cada UF entre os emitentes (mais notas no Sul/Sudeste)
+UF_WEIGHTS = {"SP": 8, "PR": 5, "SC": 4, "RS": 4, "MG": 4, "RJ": 3, "GO": 2, "DF": 2}
+
+MODELO = "55 - NF-E EMITIDA EM SUBSTITUIÇÃO AO MODELO 1 OU 1A"
+EVENTO = "Autorização de Uso"
+
+SERIES = ([1, 0, 2, 4, 890, 100], [0.7, 0.08, 0.07, 0.05, 0.05, 0.05])
+
+NATUREZAS = [
+    "VENDA", "Venda", "VENDA DE MERCADORIA", "Venda de mercadoria",
+    "Venda de mercadoria adquirida ou recebida de terceiros",
+    "Venda Fora do Estado", "RETORNO DE MATERIAL DEPOSITADO EM ARMAZEM GERAL",
+    "5102 Venda Interna Normal", "Outras Entradas - Dev Remessa Escola",
+]
+
+INDICADORES_IE = (
+    ["NÃO CONTRIBUINTE", "CONTRIBUINTE ISENTO", "CONTRIBUINTE ICMS"],
+    [0.83, 0.11, 0.06],
+)
+
+CONSUMIDOR_FINAL = (["1 - CONSUMIDOR FINAL", "0 - NORMAL"], [0.91, 0.09])
+
+PRESENCAS = (
+    [
+        "0 - NÃO SE APLICA", "9 - OPERAÇÃO NÃO PRESENCIAL, OUTROS",
+        "1 - OPERAÇÃO PRESENCIAL", "2 - OPERAÇÃO NÃO PRESENCIAL, PELA INTERNET",
+        "3 - OPERAÇÃO NÃO PRESENCIAL, TELEATENDIMENTO",
+    ],
+    [0.41, 0.25, 0.25, 0.08, 0.01],
+)
+
+# Final do CFOP (o primeiro dígito é 5 em operações internas e 6 nas
+# interestaduais)
+CFOP_SUFFIXES = ([906, 102, 117, 114, 949, 917], [0.45, 0.2, 0.12, 0.1, 0.08, 0.05])
+
+# Catálogo de produtos: descrição, código NCM, descrição do NCM, unidade e
+# preço unitário de referência
+PRODUCTS = [
+    ("COLECAO SPE EF1 4ANO VOL 1 AL", "49019900", "Outros livros, brochuras e impressos semelhantes", "UNIDAD", 522.5),
+    ("LANTERNA TATERAL CARRETA LED", "85122021", "Luzes fixas para automóveis e outros ciclos", "UNIDAD", 39.9),
+    ("PARAFUSO SEXTAVADO ACO 1/2", "73181500", "Outros parafusos e pinos ou pernos, roscados", "PEÇA", 2.35),
+    ("CIMENTO CP II 50KG", "25232910", "Cimento Portland comum", "KG", 38.9),
+    ("OLEO LUBRIFICANTE 15W40", "27101932", "Óleos lubrificantes", "LITRO", 29.5),
+    ("CABO FLEXIVEL 2,5MM", "85444900", "Outros condutores elétricos", "CDA", 219.0),
+    ("PAPEL A4 500 FOLHAS", "48025610", "Papel de peso entre 40 e 150 g/m2", "PCT", 27.9),
+    ("CAFE TORRADO MOIDO 500G", "09012100", "Café torrado, não descafeinado", "KG", 18.5),
+    ("NOTEBOOK 15 POL I5 8GB", "84713012", "Máquinas portáteis de processamento de dados", "UNIDAD", 3899.0),
+    ("MEDICAMENTO DIPIRONA 500MG", "30049099", "Outros medicamentos em doses", "UNIDAD", 7.8),
+    ("PNEU 295/80 R22.5", "40112090", "Pneus novos para ônibus ou caminhões", "UNIDAD", 2150.0),
+    ("KIT FERRAMENTAS 110 PECAS", "82060000", "Ferramentas apresentadas em sortidos", "KT", 349.9),
+    ("AGUA SANITARIA 1L", "28289011", "Hipoclorito de sódio", "LITRO", 4.5),
+    ("UNIFORME CAMISETA ALGODAO", "61091000", "Camisetas de malha de algodão", "UNIDAD", 35.0),
+    ("ARROZ TIPO 1 5KG", "10063021", "Arroz semibranqueado ou branqueado", "KG", 27.9),
+]
+
+
+def generate_synthetic_nfes(
+        output_dir: Path,
+        invoices_per_month: int = REAL_INVOICES_PER_MONTH,
+        items_per_invoice: float = REAL_ITEMS_PER_INVOICE,
+        months: int = 1,
+        start_period: str = "202401",
+        seed: int = 42,
+        compress: bool = True
+    ) -> list[Path]:
+    """
+    Gera notas fiscais sintéticas com o mesmo conjunto de colunas dos
+    arquivos reais, um par Cabecalho/Itens por mês (AAAAMM_NFs_*.csv). O
+    valor de cada nota é a soma dos seus itens, e a chave de acesso segue o
+    formato de 44 dígitos (UF, ano/mês, CNPJ, modelo, série e número).
+
+    Args:
+    output_dir(Path): Pasta de saída.
+    invoices_per_month(int): Notas por mês.
+    items_per_invoice(float): Média de itens por nota (mínimo de 1).
+    months(int): Quantidade de meses a partir de start_period.
+    start_period(str): Primeiro mês (AAAAMM).
+    seed(int): Semente do gerador (mesma semente, mesmos dados).
+    compress(bool): True para um .zip por mês (como data/202401_NFs.zip);
+        False para os .csv's soltos (como data/unzipped_data).
+
+    Returns:
+    list[Path]: Arquivos gerados.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    first_month = pd.Period(f"{start_period[:4]}-{start_period[4:]}", freq="M")
+
+    files = []
+    for offset in range(months):
+        month = first_month + offset
+        period = month.strftime("%Y%m")
+        cabecalho, itens = _generate_month(
+            rng, month, invoices_per_month, items_per_invoice
+        )
+
+        members = {
+            f"{period}_NFs_Cabecalho.csv": cabecalho,
+            f"{period}_NFs_Itens.csv": itens,
+        }
+        if compress:
+            zip_path = output_dir / f"{period}_NFs.zip"
+            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+                for name, df in members.items():
+                    with zip_file.open(name, "w") as member:
+                        with io.TextIOWrapper(member, encoding="utf-8", newline="") as f:
+                            df.to_csv(f, index=False)
+            files.append(zip_path)
+        else:
+            for name, df in members.items():
+                df.to_csv(output_dir / name, index=False)
+                files.append(output_dir / name)
+
+    return files
+
+
+def _generate_month(
+        rng: np.random.Generator,
+        month: pd.Period,
+        invoice_count: int,
+        items_per_invoice: float
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Gera os DataFrames de cabeçalhos e itens de um mês.
+    """
+    ufs = list(UFS)
+    uf_weights = np.array([UF_WEIGHTS.get(uf, 1) for uf in ufs], dtype=float)
+    uf_weights /= uf_weights.sum()
+
+    # Emitentes e destinatários recorrentes (cerca de 20 notas por emitente)
+    issuer_count = max(5, invoice_count // 20)
+    issuer_ufs = rng.choice(ufs, issuer_count, p=uf_weights)
+    issuer_cnpjs = _digits(rng, issuer_count, 14)
+    issuer_ies = _digits(rng, issuer_count, 10)
+    recipient_count = max(5, invoice_count // 5)
+    recipient_ufs = rng.choice(ufs, recipient_count, p=uf_weights)
+    recipient_cnpjs = _digits(rng, recipient_count, 14)
+
+    issuer = rng.integers(0, issuer_count, invoice_count)
+    recipient = rng.integers(0, recipient_count, invoice_count)
+    uf_emitente = issuer_ufs[issuer]
+    uf_destinatario = recipient_ufs[recipient]
+    internal = uf_emitente == uf_destinatario
+
+    series = _weighted_choice(rng, SERIES, invoice_count)
+    numbers = rng.integers(1, 10_000_000, invoice_count)
+    seconds_in_month = month.days_in_month * 86_400
+    issued = month.start_time + pd.to_timedelta(
+        rng.integers(0, seconds_in_month, invoice_count), unit="s"
+    )
+    event = issued + pd.to_timedelta(rng.integers(1, 600, invoice_count), unit="s")
+
+    access_keys = [
+        _access_key(UFS[uf][0], month, cnpj, serie, number, code)
+        for uf, cnpj, serie, number, code in zip(
+            uf_emitente, issuer_cnpjs[issuer], series, numbers,
+            rng.integers(0, 100_000_000, invoice_count)
+        )
+    ]
+
+    header = pd.DataFrame({
+        "CHAVE DE ACESSO": access_keys,
+        "MODELO": MODELO,
+        "SÉRIE": series,
+        "NÚMERO": numbers,
+        "NATUREZA DA OPERAÇÃO": rng.choice(NATUREZAS, invoice_count),
+        "DATA EMISSÃO": issued.strftime("%Y-%m-%d %H:%M:%S"),
+        "EVENTO MAIS RECENTE": EVENTO,
+        "DATA/HORA EVENTO MAIS RECENTE": event.strftime("%Y-%m-%d %H:%M:%S"),
+        "CPF/CNPJ Emitente": issuer_cnpjs[issuer],
+        "RAZÃO SOCIAL EMITENTE": [f"EMPRESA EMITENTE {i:05d} LTDA" for i in issuer],
+        "INSCRIÇÃO ESTADUAL EMITENTE": issuer_ies[issuer],
+        "UF EMITENTE": uf_emitente,
+        "MUNICÍPIO EMITENTE": [UFS[uf][1] for uf in uf_emitente],
+        "CNPJ DESTINATÁRIO": recipient_cnpjs[recipient],
+        "NOME DESTINATÁRIO": [f"CLIENTE DESTINATARIO {i:05d}" for i in recipient],
+        "UF DESTINATÁRIO": uf_destinatario,
+        "INDICADOR IE DESTINATÁRIO": _weighted_choice(rng, INDICADORES_IE, invoice_count),
+        "DESTINO DA OPERAÇÃO": np.where(
+            internal, "1 - OPERAÇÃO INTERNA", "2 - OPERAÇÃO INTERESTADUAL"
+        ),
+        "CONSUMIDOR FINAL": _weighted_choice(rng, CONSUMIDOR_FINAL, invoice_count),
+        "PRESENÇA DO COMPRADOR": _weighted_choice(rng, PRESENCAS, invoice_count),
+    })
+
+    # Itens: cada nota tem ao menos um; as colunas de cabeçalho se repetem
+    item_counts = 1 + rng.poisson(max(items_per_invoice - 1, 0), invoice_count)
+    invoice_of_item = np.repeat(np.arange(invoice_count), item_counts)
+    item_count = len(invoice_of_item)
+    product = rng.integers(0, len(PRODUCTS), item_count)
+    descriptions, ncm_codes, ncm_names, units, prices = map(np.array, zip(*PRODUCTS))
+
+    quantity = rng.integers(1, 21, item_count).astype(float)
+    unit_value = np.round(
+        prices.astype(float)[product] * rng.lognormal(0, 0.25, item_count), 2
+    )
+    total_value = np.round(quantity * unit_value, 2)
+    cfop = np.where(internal[invoice_of_item], 5000, 6000) + _weighted_choice(
+        rng, CFOP_SUFFIXES, item_count
+    )
+
+    items = header.iloc[invoice_of_item].reset_index(drop=True)
+    items = items.drop(columns=[
+        column for column in header.columns if column not in ITENS_COLUMNS
+    ])
+    first_item = np.concatenate([[0], np.cumsum(item_counts)[:-1]])
+    items["NÚMERO PRODUTO"] = np.arange(item_count) - first_item[invoice_of_item] + 1
+    items["DESCRIÇÃO DO PRODUTO/SERVIÇO"] = descriptions[product]
+    items["CÓDIGO NCM/SH"] = ncm_codes[product]
+    items["NCM/SH (TIPO DE PRODUTO)"] = ncm_names[product]
+    items["CFOP"] = cfop
+    items["QUANTIDADE"] = quantity
+    items["UNIDADE"] = units[product]
+    items["VALOR UNITÁRIO"] = unit_value
+    items["VALOR TOTAL"] = total_value
+
+    header["VALOR NOTA FISCAL"] = np.round(
+        np.bincount(invoice_of_item, weights=total_value, minlength=invoice_count), 2
+    )
+
+    return header[list(CABECALHO_COLUMNS)], items[list(ITENS_COLUMNS)]
+
+
+def _weighted_choice(
+        rng: np.random.Generator,
+        options: tuple[list, list[float]],
+        count: int
+    ) -> np.ndarray:
+    """
+    count valores sorteados de options, uma tupla (valores, probabilidades).
+    """
+    values, weights = options
+    return rng.choice(values, count, p=weights)
+
+
+def _digits(rng: np.random.Generator, count: int, length: int) -> np.ndarray:
+    """
+    count textos de length dígitos aleatórios (com zeros à esquerda).
+    """
+    return np.array([
+        "".join(map(str, row)) for row in rng.integers(0, 10, (count, length))
+    ])
+
+
+def _access_key(
+        uf_code: int,
+        month: pd.Period,
+        cnpj: str,
+        serie: int,
+        number: int,
+        code: int
+    ) -> str:
+    """
+    Chave de acesso de 44 dígitos: UF, AAMM, CNPJ, modelo 55, série, número,
+    tipo de emissão, código numérico e dígito verificador (módulo 11).
+    """
+    key = (
+        f"{uf_code:02d}{month.strftime('%y%m')}{cnpj}55"
+        f"{serie:03d}{number:09d}1{code:08d}"
+    )
+    weights = [2, 3, 4, 5, 6, 7, 8, 9]
+    total = sum(
+        int(digit) * weights[index % 8]
+        for index, digit in enumerate(reversed(key))
+    )
+    check_digit = 11 - total % 11
+    return key + str(0 if check_digit >= 10 else check_digit)
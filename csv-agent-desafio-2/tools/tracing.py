@@ -0,0 +1,189 @@
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from threading import Lock
+
+
+# Pasta padrão dos arquivos de rastreamento (fora do controle de versão)
+LOG_DIR = Path(__file__).resolve().parent.parent / "data" / "logs"
+
+# Arquivo .jsonl com um span (etapa cronometrada) por linha e arquivo com as
+# métricas no formato texto do Prometheus. Variável vazia desativa o arquivo.
+TRACE_FILE = os.getenv("AGENT_TRACE_FILE", str(LOG_DIR / "traces.jsonl"))
+METRICS_FILE = os.getenv("AGENT_METRICS_FILE", str(LOG_DIR / "metrics.prom"))
+
+# Limites (em segundos) das faixas do histograma de duração por etapa
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+
+# Atributos numéricos dos spans somados em contadores por etapa
+# (fast_path: respostas montadas sem a LLM)
+COUNTER_ATTRIBUTES = (
+    "input_tokens", "output_tokens", "rows_returned", "bytes_fetched",
+    "cache_hits", "fast_path",
+)
+
+# Span aberto no contexto atual (cada thread/pergunta tem o seu)
+_current_span = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Cronometra as etapas do agente (spans) e acumula as métricas por etapa.
+
+    Cada span finalizado é gravado em uma linha do .jsonl (com trace_id
+    comum a todas as etapas de uma mesma pergunta) e entra no histograma de
+    duração e nos contadores exportados no formato do Prometheus.
+    """
+
+    def __init__(self, jsonl_path: str | None = TRACE_FILE):
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+        self._durations = {}
+        self._counters = {}
+        self._errors = {}
+        self._lock = Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Cronometra o bloco "with" como uma etapa chamada name. Devolve o
+        dicionário de atributos do span, que pode ser completado dentro do
+        bloco (ex.: span["cache_hits"] = 1). Um atributo "error" ou uma
+        exceção marcam o span como erro.
+
+        Args:
+        name(str): Nome da etapa (ex.: "execute_sql_query").
+        **attributes: Atributos iniciais do span.
+        """
+        parent = _current_span.get()
+        span = {
+            "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex,
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": parent["span_id"] if parent else None,
+            "name": name,
+            "start": time.time(),
+            "attributes": dict(attributes),
+        }
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            yield span["attributes"]
+        except BaseException as e:
+            status = "error"
+            span["attributes"].setdefault("error", str(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            span["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            if "error" in span["attributes"]:
+                status = "error"
+            span["status"] = status
+            self._record(span)
+
+    def traced(self, name: str | None = None):
+        """
+        Decorador que executa a função inteira dentro de um span (com o nome
+        da função, se name não for informado).
+        """
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(name or function.__name__):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def metrics_text(self) -> str:
+        """
+        Métricas acumuladas no formato texto do Prometheus: histograma de
+        duração, erros e contadores (tokens, linhas, bytes, acertos de cache)
+        por etapa.
+        """
+        with self._lock:
+            lines = [
+                "# HELP agent_stage_duration_seconds Duração de cada etapa do agente.",
+                "# TYPE agent_stage_duration_seconds histogram",
+            ]
+            for stage, (buckets, total, count) in sorted(self._durations.items()):
+                for limit, bucket_count in zip(DURATION_BUCKETS, buckets):
+                    lines.append(
+                        f'agent_stage_duration_seconds_bucket{{stage="{stage}",le="{limit}"}} {bucket_count}'
+                    )
+                lines.append(f'agent_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+                lines.append(f'agent_stage_duration_seconds_sum{{stage="{stage}"}} {total:.6f}')
+                lines.append(f'agent_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+
+            lines.append("# HELP agent_stage_errors_total Etapas que terminaram com erro.")
+            lines.append("# TYPE agent_stage_errors_total counter")
+            for stage, errors in sorted(self._errors.items()):
+                lines.append(f'agent_stage_errors_total{{stage="{stage}"}} {errors}')
+
+            for attribute in COUNTER_ATTRIBUTES:
+                lines.append(f"# TYPE agent_stage_{attribute}_total counter")
+                for (stage, counted), value in sorted(self._counters.items()):
+                    if counted == attribute:
+                        lines.append(f'agent_stage_{attribute}_total{{stage="{stage}"}} {value:g}')
+
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self, metrics_path: str | None = METRICS_FILE):
+        """
+        Grava as métricas acumuladas (formato texto do Prometheus) no arquivo.
+        """
+        if metrics_path:
+            metrics_path = Path(metrics_path)
+            metrics_path.parent.mkdir(parents=True, exist_ok=True)
+            metrics_path.write_text(self.metrics_text(), encoding="utf-8")
+
+    def _record(self, span: dict):
+        """
+        Atualiza as métricas com o span finalizado e o grava no .jsonl.
+        """
+        name = span["name"]
+        seconds = span["duration_ms"] / 1000
+        with self._lock:
+            buckets, total, count = self._durations.get(
+                name, ([0] * len(DURATION_BUCKETS), 0.0, 0)
+            )
+            for index, limit in enumerate(DURATION_BUCKETS):
+                if seconds <= limit:
+                    buckets[index] += 1
+            self._durations[name] = (buckets, total + seconds, count + 1)
+
+            if span["status"] == "error":
+                self._errors[name] = self._errors.get(name, 0) + 1
+            for attribute in COUNTER_ATTRIBUTES:
+                value = span["attributes"].get(attribute)
+                if isinstance(value, (int, float)):
+                    key = (name, attribute)
+                    self._counters[key] = self._counters.get(key, 0) + value
+
+            if self.jsonl_path is not None:
+                self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+                with self.jsonl_path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+
+
+def add_to_current_span(**values):
+    """
+    Soma valores numéricos aos atributos do span aberto no contexto atual
+    (ex.: tokens de cada chamada à LLM, linhas lidas do banco). Sem span
+    aberto, não faz nada.
+    """
+    span = _current_span.get()
+    if span is None:
+        return
+    attributes = span["attributes"]
+    for key, value in values.items():
+        attributes[key] = attributes.get(key, 0) + value
+
+
+# Tracer único do processo, usado pelo agente e pelas funções de carga
+tracer = Tracer()
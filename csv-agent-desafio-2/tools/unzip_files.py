@@ -1,19 +1,32 @@
 import zipfile
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
+from typing import Iterator
 
+import pandas as pd
 
+from tools.manifest import FileFingerprint
+from tools.tracing import tracer
+
+
+# Quantidade de linhas lidas por vez ao ler um .csv direto do .zip
+ZIP_CHUNK_ROWS = 100_000
+
+
+@tracer.traced()
 def unzip_all_files_from_data_and_export_csvs():
     """
     Descompacta todos os arquivos .zip da pasta data e exporta todos os
-    arquivos para a pasta unzipped data. Mas somente caso necessário.  
+    arquivos para a pasta unzipped data. Mas somente caso necessário.
     """
 
-    # 1) Detectando caminho de leitura dos .zip's e definindo caminho de 
-    # exportação dos .csv's. 
-     
+    # 1) Detectando caminho de leitura dos .zip's e definindo caminho de
+    # exportação dos .csv's.
+
     # Caminho da raíz do projeto:
     abs_path = (
-        Path(__file__).resolve().parent 
+        Path(__file__).resolve().parent
         if '__file__' in globals() else Path().resolve()
     )
 
@@ -23,23 +36,22 @@ def unzip_all_files_from_data_and_export_csvs():
     # Caminho para os arquivos do .zip:
     output_path = zip_path / "unzipped_data"
 
-    # 2) Verificando se já existem arquivos .csv na pasta
-    existing_csvs = list(output_path.glob("*.csv"))
+    # 2) Detectando os arquivos zip (seus caminhos) na pasta dos .zip's.
+    # E descompactando esses arquivos caso existam na pasta dos .zip's.
+    zip_files = list(zip_path.glob("*.zip"))
+    if not zip_files:
+        print("⚠️ Nenhum arquivo ZIP encontrado.")
+        return
 
-    if existing_csvs:
-        print(f"Arquivos CSV já existem em {output_path}, pulando descompactação.")
+    for zip_file in zip_files:
+        # 3) Verificando, membro a membro, se o .csv já existe na pasta
+        # (um .zip novo não é ignorado só porque já existem outros .csv's)
+        if _already_extracted(zip_file, output_path):
+            print(f"Arquivos de {zip_file.name} já existem em {output_path}, pulando descompactação.")
+            continue
 
-    else:
-    # 3) Caso não hajam arquivos .csv na pasta:
-    # Detectando os arquivos zip (seus caminhos) na pasta dos .zip's.
-    # E descompactando esses arquivos caso existam na pasta dos .zip's.
-        zip_files = list(zip_path.glob("*.zip"))
-        if not zip_files:
-            print("⚠️ Nenhum arquivo ZIP encontrado.")
-        else:
-            for zip_file in zip_files:
-                print(f"🔓 Descompactando {zip_file.name}")
-                unzip_file(zip_file, output_path)
+        print(f"🔓 Descompactando {zip_file.name}")
+        unzip_file(zip_file, output_path)
 
 
 
@@ -49,10 +61,91 @@ def unzip_file(file_path: str, output_dir: str = "unzipped"):
     desejada.
 
     Args:
-    file_path(str): Caminho do arquivo .zip. 
-    output_dir(str): Pasta onde se deseja salvar os arquivos. 
-    
+    file_path(str): Caminho do arquivo .zip.
+    output_dir(str): Pasta onde se deseja salvar os arquivos.
+
     """
     with zipfile.ZipFile(file_path, 'r') as zip_ref:
         zip_ref.extractall(output_dir)
 
+
+def _already_extracted(zip_file: Path, output_path: Path) -> bool:
+    """
+    Verifica se todos os .csv's de um .zip já foram extraídos (com o mesmo
+    tamanho) na pasta de saída.
+    """
+    for member in list_csv_members(zip_file):
+        extracted = output_path / member.filename
+        if not extracted.exists() or extracted.stat().st_size != member.file_size:
+            return False
+    return True
+
+
+def list_csv_members(zip_file: Path) -> list[zipfile.ZipInfo]:
+    """
+    Lista os membros .csv de um arquivo .zip, sem descompactá-lo.
+
+    Args:
+    zip_file(Path): Caminho do arquivo .zip.
+    """
+    with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+        return [
+            member for member in zip_ref.infolist()
+            if not member.is_dir() and member.filename.lower().endswith(".csv")
+        ]
+
+
+def member_fingerprint(zip_file: Path, member: zipfile.ZipInfo) -> FileFingerprint:
+    """
+    Impressão digital de um membro do .zip para o manifesto.
+
+    Usa os metadados do próprio .zip (tamanho descompactado, data e CRC32), de
+    modo que nenhum byte precisa ser descompactado para saber se o membro já
+    foi carregado.
+
+    Args:
+    zip_file(Path): Caminho do arquivo .zip.
+    member(zipfile.ZipInfo): Membro do .zip.
+    """
+    mtime = datetime(*member.date_time)
+    return FileFingerprint(
+        source=f"{zip_file.name}/{member.filename}",
+        size=member.file_size,
+        mtime_ns=int(mtime.timestamp() * 1_000_000_000),
+        content_hash=f"crc32:{member.CRC:08x}",
+    )
+
+
+@contextmanager
+def open_member(zip_file: Path, member: zipfile.ZipInfo | str):
+    """
+    Abre um membro do .zip como arquivo binário (descompactado sob demanda).
+
+    Args:
+    zip_file(Path): Caminho do arquivo .zip.
+    member(zipfile.ZipInfo | str): Membro (ou seu nome) a ser aberto.
+    """
+    with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+        with zip_ref.open(member) as member_file:
+            yield member_file
+
+
+def read_member_in_chunks(
+        zip_file: Path, member: zipfile.ZipInfo | str, chunk_rows: int = ZIP_CHUNK_ROWS
+    ) -> Iterator[pd.DataFrame]:
+    """
+    Lê um .csv de dentro do .zip em blocos, sem extraí-lo para o disco.
+
+    Todas as colunas são lidas como texto; a conversão de tipos fica a cargo
+    do banco. Campos vazios viram nulos, como no leitor do DuckDB.
+
+    Args:
+    zip_file(Path): Caminho do arquivo .zip.
+    member(zipfile.ZipInfo | str): Membro (ou seu nome) .csv a ser lido.
+    chunk_rows(int): Quantidade de linhas por bloco.
+    """
+    with open_member(zip_file, member) as csv_file:
+        yield from pd.read_csv(
+            csv_file, sep=',', dtype=str, keep_default_na=False,
+            na_values=[""], chunksize=chunk_rows
+        )
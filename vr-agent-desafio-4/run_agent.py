@@ -112,6 +112,7 @@ sql_prompt = ChatPromptTemplate.from_messages([
      "Uma coluna vazia deve ser gerada no final de todas, com o nome OBS GERAL"
      "Lembre-se: no **DuckDB/Postgres**, se sua coluna tem espaços ou acentos, você precisa **usar aspas duplas** para a coluna na query, lembrar que matrícula vai sempre com as aspas\n"
      "Se solicitarem a tabela de um profissional específico, não filtrar a coluna TÍTULO DO CARGO diretamente, mas ver se a coluna contém a palavra chave da profissão descrita em caixa alta\n"
+     "A tabela guarda todas as competências já calculadas. Filtre sempre pela coluna \"Competência\": use a competência {competencia} quando o usuário não pedir outra(s)\n"
      "Gere a query SQL crua, sem usar ```sql"
     ),
     ("human", "{input}")
@@ -119,87 +120,94 @@ sql_prompt = ChatPromptTemplate.from_messages([
 
 sql_chain = sql_prompt | llm | StrOutputParser()
 
-def gerar_query(texto: str) -> str:
-    raw = sql_chain.invoke({"input": texto})
+def gerar_query(texto: str, competencia: str) -> str:
+    raw = sql_chain.invoke({"input": texto, "competencia": competencia})
     return raw.strip()
 
 # --- Execução do sistema ---
-print("Bem-vindo ao sistema gerador do arquivo de compra do Vale Refeição!")
-entrada = input(
-    "Como deseja proceder? (ex.: 'gere o arquivo para agosto 2024', 'não quero rodar agora'):\n"
-    "(obs: Evite especificar o mês de análise como 'mês atual', 'mês passado' etc. O modelo vai puxar a data mais recente de seu último treinamento).\n"
-    ">"
-)
-
-decisao = interpretar_decisao(entrada)
-
-print(f"{decisao}")
-
-if decisao["trigger"]:
-    mes, ano = decisao["mes"], decisao["ano"]
-    print(f"-> Gerando tabela para competência {mes}/{ano}")
-    tabela_final = read_treat_and_aggregate_data(mes, ano)
-
-    # extrair meses/anos distintos
-    admissao_meses = (
-        tabela_final["DATA_DE_ADMISSAO"].dropna().dt.strftime("%m/%Y").unique()
-    )
-    demissao_meses = (
-        tabela_final["DATA DEMISSÃO"].dropna().dt.strftime("%m/%Y").unique()
+def main():
+    # (função chamada só pela execução direta: as leituras das planilhas em
+    # paralelo iniciam novos processos, que importam este arquivo)
+    print("Bem-vindo ao sistema gerador do arquivo de compra do Vale Refeição!")
+    entrada = input(
+        "Como deseja proceder? (ex.: 'gere o arquivo para agosto 2024', 'não quero rodar agora'):\n"
+        "(obs: Evite especificar o mês de análise como 'mês atual', 'mês passado' etc. O modelo vai puxar a data mais recente de seu último treinamento).\n"
+        ">"
     )
 
-    # ordenar para melhor leitura
-    admissao_meses = sorted(admissao_meses)
-    demissao_meses = sorted(demissao_meses)
-    mes_de_análise = f"{decisao['mes']}/{decisao['ano']}"
-
-    mensagem = f"""
-        Após unir a tabela, foi observado que:
-
-        - A coluna DATA_DE_ADMISSAO contém registros no mes/ano: {admissao_meses}
-        - A coluna DATA DEMISSAO contém registros no mes/ano: {demissao_meses}
-        - O mês/ano de análise é {mes_de_análise}
-
-        Deseja proceder com o envio da tabela agregada para o banco de dados? (sim/não)
-        """
-    print(mensagem)
-
-    resposta_usuario = input("> ")
-    confirmacao = interpretar_confirmacao(resposta_usuario)
-
-    if confirmacao["confirmar"]:
-        print("✅ Enviando a tabela agregada para o banco de dados...")
-        # Utiliza uma das conexões da pool de conexões para carregar os arquivos 
-        with engine.connect() as connection:
-            # Obtém a conexão DBAPI (duckdb.DuckDBPyConnection) esperada pela função
-            raw_duckdb_conn = connection.connection 
-            # Carrega os arquivos .csv da pasta unzipped_data no banco
-            load_pandas_df_into_duckdb(raw_duckdb_conn, tabela_final)
-
-            pergunta = input(
-                "\nVocê quer a tabela completa ou quer filtrar por algum estado/cargo profissional?\n"
-                ">"
-            )
-            query = gerar_query(pergunta)
-            print(f"\n📜 Query gerada:\n{query}\n")
-
-            try:
-                df_result = pd.read_sql(query, engine)
-
-                # Caminho para salvar
-                output_path = "VR MENSAL 05.2025.xlsx"
-                df_result.to_excel(output_path, index=False)
-
-                # Abrir automaticamente o Excel no sistema
-                if os.name == "nt":  # Windows
-                    os.startfile(output_path)
-                elif os.name == "posix":  # Linux/Mac
-                    os.system(f"open {output_path}")
-
-            except Exception as e:
-                print("⚠️ Erro ao executar a query:", e)
+    decisao = interpretar_decisao(entrada)
+
+    print(f"{decisao}")
+
+    if decisao["trigger"]:
+        mes, ano = decisao["mes"], decisao["ano"]
+        print(f"-> Gerando tabela para competência {mes}/{ano}")
+        tabela_final = read_treat_and_aggregate_data(mes, ano)
+
+        # extrair meses/anos distintos
+        admissao_meses = (
+            tabela_final["DATA_DE_ADMISSAO"].dropna().dt.strftime("%m/%Y").unique()
+        )
+        demissao_meses = (
+            tabela_final["DATA DEMISSÃO"].dropna().dt.strftime("%m/%Y").unique()
+        )
+
+        # ordenar para melhor leitura
+        admissao_meses = sorted(admissao_meses)
+        demissao_meses = sorted(demissao_meses)
+        mes_de_análise = f"{decisao['mes']}/{decisao['ano']}"
+
+        mensagem = f"""
+            Após unir a tabela, foi observado que:
+
+            - A coluna DATA_DE_ADMISSAO contém registros no mes/ano: {admissao_meses}
+            - A coluna DATA DEMISSAO contém registros no mes/ano: {demissao_meses}
+            - O mês/ano de análise é {mes_de_análise}
+
+            Deseja proceder com o envio da tabela agregada para o banco de dados? (sim/não)
+            """
+        print(mensagem)
+
+        resposta_usuario = input("> ")
+        confirmacao = interpretar_confirmacao(resposta_usuario)
+
+        if confirmacao["confirmar"]:
+            print("✅ Enviando a tabela agregada para o banco de dados...")
+            # Utiliza uma das conexões da pool de conexões para carregar os arquivos 
+            with engine.connect() as connection:
+                # Obtém a conexão DBAPI (duckdb.DuckDBPyConnection) esperada pela função
+                raw_duckdb_conn = connection.connection 
+                # Carrega os arquivos .csv da pasta unzipped_data no banco
+                load_pandas_df_into_duckdb(raw_duckdb_conn, tabela_final)
+
+                pergunta = input(
+                    "\nVocê quer a tabela completa ou quer filtrar por algum estado/cargo profissional?\n"
+                    ">"
+                )
+                query = gerar_query(pergunta, f"{mes:02d}/{ano}")
+                print(f"\n📜 Query gerada:\n{query}\n")
+
+                try:
+                    df_result = pd.read_sql(query, engine)
+
+                    # Caminho para salvar
+                    output_path = "VR MENSAL 05.2025.xlsx"
+                    df_result.to_excel(output_path, index=False)
+
+                    # Abrir automaticamente o Excel no sistema
+                    if os.name == "nt":  # Windows
+                        os.startfile(output_path)
+                    elif os.name == "posix":  # Linux/Mac
+                        os.system(f"open {output_path}")
+
+                except Exception as e:
+                    print("⚠️ Erro ao executar a query:", e)
+        else:
+            print("❌ Ok, não vamos enviar agora, por favor faça as correções necessárias.")
+
     else:
-        print("❌ Ok, não vamos enviar agora, por favor faça as correções necessárias.")
+        print("Ok, não vamos gerar a tabela agora. Lembre-se que é necessário informar o mês e ano de análise")
+
 
-else:
-    print("Ok, não vamos gerar a tabela agora. Lembre-se que é necessário informar o mês e ano de análise")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
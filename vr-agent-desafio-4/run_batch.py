@@ -0,0 +1,82 @@
+import argparse
+import time
+
+import duckdb
+
+from tools.build_final_db import calcular_competencias
+from tools.load_and_treat_data import load_pandas_df_into_duckdb
+
+
+# Mesmo banco usado pelo run_agent.py
+DEFAULT_DUCKDB_FILE = "base_completa_vr.duckdb"
+
+
+def parse_competencia(texto: str) -> tuple[int, int]:
+    """
+    Converte "MM/AAAA" em (mês, ano).
+
+    Ex.: "05/2025" -> (5, 2025)
+    """
+    try:
+        mes, ano = (int(parte) for parte in texto.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Competência inválida: {texto} (use MM/AAAA)")
+    if not 1 <= mes <= 12:
+        raise argparse.ArgumentTypeError(f"Mês inválido na competência: {texto}")
+    return mes, ano
+
+
+def competencias_entre(inicio: tuple[int, int], fim: tuple[int, int]) -> list[tuple[int, int]]:
+    """
+    Competências (mês, ano) de inicio até fim, inclusive.
+
+    Ex.: competencias_entre((11, 2024), (2, 2025)) -> [(11, 2024), (12, 2024), (1, 2025), (2, 2025)]
+    """
+    primeiro = inicio[1] * 12 + inicio[0] - 1
+    ultimo = fim[1] * 12 + fim[0] - 1
+    if ultimo < primeiro:
+        raise ValueError("A competência final é anterior à inicial")
+    return [(indice % 12 + 1, indice // 12) for indice in range(primeiro, ultimo + 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Calcula a tabela de compra de VR de várias competências (sem o "
+            "modo interativo) e grava cada uma em tabela_compra_vr."
+        )
+    )
+    parser.add_argument(
+        "inicio", type=parse_competencia, help="Primeira competência (MM/AAAA)."
+    )
+    parser.add_argument(
+        "fim", type=parse_competencia, nargs="?",
+        help="Última competência (MM/AAAA). Padrão: a mesma do início."
+    )
+    parser.add_argument(
+        "-p", "--processos", type=int, default=1,
+        help="Quantidade de processos para calcular as competências."
+    )
+    parser.add_argument(
+        "--banco", default=DEFAULT_DUCKDB_FILE, help="Arquivo .duckdb de destino."
+    )
+    args = parser.parse_args()
+
+    competencias = competencias_entre(args.inicio, args.fim or args.inicio)
+
+    start = time.perf_counter()
+    tabela_final = calcular_competencias(competencias, max_workers=args.processos)
+    print(
+        f"⏱️ {len(competencias)} competência(s) calculada(s) em "
+        f"{time.perf_counter() - start:.2f}s ({len(tabela_final)} linhas)"
+    )
+
+    conn = duckdb.connect(args.banco)
+    try:
+        load_pandas_df_into_duckdb(conn, tabela_final)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
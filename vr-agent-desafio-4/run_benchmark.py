@@ -0,0 +1,268 @@
+import argparse
+import gc
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from run_batch import competencias_entre, parse_competencia
+from tools.build_final_db import read_treat_and_aggregate_data
+from tools.build_final_db_sql import read_treat_and_aggregate_data_sql
+from tools.input_cache import INPUT_CACHE_DIR, load_inputs
+from tools.synthetic_data import DEFAULT_EMPLOYEES, generate_synthetic_inputs
+
+
+# Implementações comparadas: a original (pandas) e a consulta no DuckDB
+PIPELINES = {
+    "pandas": read_treat_and_aggregate_data,
+    "duckdb": read_treat_and_aggregate_data_sql,
+}
+
+# Execuções de cada implementação no benchmark (vale a mediana do tempo)
+DEFAULT_REPEATS = 3
+
+# Competências conferidas quando nenhuma é informada (o período das
+# planilhas sintéticas)
+DEFAULT_INICIO = (1, 2025)
+DEFAULT_FIM = (12, 2025)
+
+
+# Status do processo no Linux (memória atual e pico)
+PROC_STATUS = Path("/proc/self/status")
+PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+def peak_rss_mb() -> float | None:
+    """
+    Pico de memória residente (MB) do processo atual desde o início ou desde
+    o último reset_peak_rss. None onde o módulo resource não existe
+    (Windows).
+    """
+    if PROC_STATUS.exists():
+        return _proc_status_mb("VmHWM")
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em bytes no macOS e em KB no Linux
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def current_rss_mb() -> float | None:
+    """
+    Memória residente atual (MB), só no Linux.
+    """
+    return _proc_status_mb("VmRSS") if PROC_STATUS.exists() else None
+
+
+def reset_peak_rss():
+    """
+    Zera o pico de memória do processo (no Linux), para que o pico medido
+    depois seja só o do trecho seguinte. Nos outros sistemas, o pico continua
+    sendo o do processo inteiro.
+    """
+    gc.collect()
+    try:
+        PROC_CLEAR_REFS.write_text("5")
+    except OSError:
+        pass
+
+
+def _proc_status_mb(field: str) -> float | None:
+    """
+    Valor (MB) de um campo em kB do /proc/self/status.
+    """
+    for line in PROC_STATUS.read_text().splitlines():
+        if line.startswith(f"{field}:"):
+            return int(line.split()[1]) / 1024
+    return None
+
+
+def check_parity(
+        competencias: list[tuple[int, int]],
+        entradas: dict[str, pd.DataFrame]
+    ) -> list[str]:
+    """
+    Compara as tabelas finais das duas implementações em cada competência
+    (mesmas linhas, colunas, tipos e valores, com as linhas ordenadas por
+    MATRICULA). Devolve as diferenças encontradas (lista vazia: iguais).
+
+    Args:
+    competencias(list[tuple[int, int]]): Pares (mês, ano) comparados.
+    entradas(dict[str, pd.DataFrame]): Planilhas lidas por load_inputs.
+    """
+    differences = []
+    for mes, ano in competencias:
+        tabelas = {
+            name: _normalize(pipeline(mes, ano, entradas=entradas))
+            for name, pipeline in PIPELINES.items()
+        }
+        try:
+            pd.testing.assert_frame_equal(tabelas["pandas"], tabelas["duckdb"])
+        except AssertionError as e:
+            differences.append(f"{mes:02d}/{ano}: {e}")
+    return differences
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tabela final em ordem de MATRICULA, com os vazios das colunas de texto
+    como None (o pandas usa NaN e o DuckDB, None).
+    """
+    df = df.sort_values("MATRICULA", kind="stable").reset_index(drop=True)
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = df[column].where(df[column].notna(), None)
+    return df
+
+
+def _pipeline_worker(
+        name: str,
+        base_dir: str,
+        cache_dir: str,
+        mes: int,
+        ano: int,
+        repeats: int
+    ) -> dict:
+    """
+    Execuções medidas em um processo novo, para que o pico de memória seja só
+    o da implementação. As planilhas são lidas antes da medição (do cache), e
+    o acréscimo de memória é o pico durante os cálculos menos a memória após
+    a leitura.
+    """
+    entradas = load_inputs(Path(base_dir), Path(cache_dir))
+    pipeline = PIPELINES[name]
+    reset_peak_rss()
+    rss_before = current_rss_mb() or peak_rss_mb()
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        pipeline(mes, ano, entradas=entradas)
+        timings.append(time.perf_counter() - start)
+
+    rss_after = peak_rss_mb()
+    return {
+        "seconds": round(statistics.median(timings), 4),
+        "peak_rss_mb": rss_after and round(rss_after, 1),
+        "rss_growth_mb": rss_after and round(rss_after - rss_before, 1),
+    }
+
+
+def measure_pipeline(
+        name: str,
+        base_dir: Path,
+        cache_dir: Path,
+        mes: int,
+        ano: int,
+        repeats: int
+    ) -> dict:
+    """
+    Mede o tempo (mediana) e o pico de memória de uma implementação.
+
+    Args:
+    name(str): "pandas" ou "duckdb".
+    base_dir(Path): Pasta com as planilhas.
+    cache_dir(Path): Pasta do cache .parquet das planilhas.
+    mes(int): Mês da competência.
+    ano(int): Ano da competência.
+    repeats(int): Execuções medidas.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(
+            _pipeline_worker, name, str(base_dir), str(cache_dir), mes, ano, repeats
+        ).result()
+
+
+def run(
+        args: argparse.Namespace,
+        competencias: list[tuple[int, int]],
+        base_dir: Path,
+        cache_dir: Path
+    ):
+    """
+    Confere o resultado das duas implementações nas competências e mede a
+    primeira delas (sai com erro se houver diferenças).
+    """
+    # Também deixa o cache .parquet pronto para os processos do benchmark
+    entradas = load_inputs(base_dir, cache_dir)
+
+    differences = check_parity(competencias, entradas)
+    if differences:
+        print(f"⚠️ {len(differences)} competência(s) com diferenças:")
+        for difference in differences:
+            print(difference)
+        sys.exit(1)
+    print(f"✔️ Mesmo resultado nas {len(competencias)} competência(s) conferida(s)")
+
+    mes, ano = competencias[0]
+    print(f"\n⏱️ Benchmark da competência {mes:02d}/{ano}:")
+    for name in PIPELINES:
+        result = measure_pipeline(name, base_dir, cache_dir, mes, ano, args.repeticoes)
+        print(
+            f"   {name}: {result['seconds']:.3f}s, pico de memória "
+            f"{result['peak_rss_mb']} MB (+{result['rss_growth_mb']} MB no cálculo)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Confere se as implementações pandas e DuckDB da tabela final dão o "
+            "mesmo resultado e compara tempo e pico de memória."
+        )
+    )
+    parser.add_argument(
+        "inicio", type=parse_competencia, nargs="?",
+        help="Primeira competência (MM/AAAA). Padrão: 01/2025."
+    )
+    parser.add_argument(
+        "fim", type=parse_competencia, nargs="?",
+        help=(
+            "Última competência conferida (MM/AAAA). Padrão: 12/2025 (ou a "
+            "inicial). O benchmark usa a primeira."
+        )
+    )
+    parser.add_argument(
+        "--dados", type=Path,
+        help=(
+            "Pasta com as planilhas. Padrão: planilhas sintéticas geradas em "
+            "uma pasta temporária."
+        )
+    )
+    parser.add_argument(
+        "-n", "--colaboradores", type=int, default=DEFAULT_EMPLOYEES,
+        help="Colaboradores das planilhas sintéticas."
+    )
+    parser.add_argument(
+        "-r", "--repeticoes", type=int, default=DEFAULT_REPEATS,
+        help="Execuções medidas de cada implementação."
+    )
+    args = parser.parse_args()
+
+    inicio = args.inicio or DEFAULT_INICIO
+    fim = args.fim or (inicio if args.inicio else DEFAULT_FIM)
+    competencias = competencias_entre(inicio, fim)
+
+    if args.dados is not None:
+        run(args, competencias, args.dados, INPUT_CACHE_DIR)
+        return
+
+    # Sem planilhas informadas: gera as sintéticas (e o cache delas) em uma
+    # pasta temporária, removida ao final
+    with tempfile.TemporaryDirectory(prefix="vr_benchmark_") as work_dir:
+        base_dir = Path(work_dir) / "planilhas"
+        generate_synthetic_inputs(base_dir, employees=args.colaboradores)
+        print(f"📦 {args.colaboradores} colaboradores sintéticos gerados")
+        run(args, competencias, base_dir, Path(work_dir) / "cache")
+
+
+if __name__ == "__main__":
+    main()
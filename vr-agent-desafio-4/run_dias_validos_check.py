@@ -0,0 +1,155 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from workalendar.america import Brazil
+
+from run_batch import competencias_entre, parse_competencia
+from tools.build_final_db import (
+    business_days, calcular_competencia, calcular_dias_validos,
+    calcular_dias_validos_vetorizado
+)
+from tools.business_calendar import BusinessDayCalendar
+
+
+# Colaboradores por competência (o volume citado no cálculo em arrays)
+DEFAULT_LINHAS = 100_000
+
+# Competências conferidas quando nenhuma é informada
+DEFAULT_INICIO = (1, 2025)
+DEFAULT_FIM = (12, 2025)
+
+# UFs dos sindicatos (None: colaborador sem sindicato identificado)
+UFS = ["SP", "RJ", "PR", "RS", None]
+
+
+def gerar_colaboradores(linhas: int, mes: int, ano: int, seed: int = 7) -> pd.DataFrame:
+    """
+    Colaboradores sintéticos com as colunas da base unida usadas no cálculo
+    da competência, cobrindo todas as regras dos dias válidos: admitidos no
+    mês (e no mesmo mês de anos anteriores), desligados no mês antes e
+    depois do dia 15, com e sem comunicado, desligados em outros meses e
+    férias no PR.
+
+    Args:
+    linhas(int): Quantidade de colaboradores.
+    mes(int): Mês da competência.
+    ano(int): Ano da competência.
+    seed(int): Semente do gerador aleatório.
+    """
+    rng = np.random.default_rng(seed)
+    inicio_mes = pd.Timestamp(year=ano, month=mes, day=1)
+    dias_no_mes = inicio_mes.days_in_month
+
+    def datas_aleatorias(chance_no_mes: float, chance_fora: float) -> pd.Series:
+        sorteio = rng.random(linhas)
+        no_mes = inicio_mes + pd.to_timedelta(rng.integers(0, dias_no_mes, linhas), unit="D")
+        fora = inicio_mes + pd.to_timedelta(rng.integers(-800, 400, linhas), unit="D")
+        datas = pd.Series(pd.NaT, index=range(linhas), dtype="datetime64[ns]")
+        datas[sorteio < chance_no_mes] = no_mes[sorteio < chance_no_mes]
+        com_data_fora = (sorteio >= chance_no_mes) & (sorteio < chance_no_mes + chance_fora)
+        datas[com_data_fora] = fora[com_data_fora]
+        return datas
+
+    ufs = rng.choice(np.array(UFS, dtype=object), linhas)
+    return pd.DataFrame({
+        "MATRICULA": np.arange(linhas),
+        "Sindicato": [f"SINDICATO {uf} - SINTÉTICO" if uf else None for uf in ufs],
+        "TITULO DO CARGO": "ANALISTA",
+        "ESTADO_SINDICATO_SIGLA": ufs,
+        "VALOR_SINDICATO": 35.0,
+        "DIAS UTEIS": 22,
+        "DATA_DE_ADMISSAO": datas_aleatorias(0.1, 0.3),
+        "DATA DEMISSÃO": datas_aleatorias(0.1, 0.05),
+        "COMUNICADO DE DESLIGAMENTO": rng.choice(
+            np.array(["OK", "ok", "PENDENTE", np.nan], dtype=object), linhas
+        ),
+        "DIAS DE FÉRIAS": rng.choice([0.0, 0.0, 0.0, 5.0, 10.0, 22.0, 30.0], linhas),
+    })
+
+
+def comparar_competencia(linhas: int, mes: int, ano: int) -> tuple[int, float, float]:
+    """
+    Dias válidos de uma competência pelo cálculo linha a linha
+    (calcular_dias_validos, a referência, com os dias úteis do mês de
+    business_days) e pelo cálculo da competência em arrays
+    (calcular_competencia, que também calcula os dias úteis do mês), ambos
+    com o calendário nacional.
+
+    Returns:
+    tuple[int, float, float]: Linhas com resultado diferente e os tempos (s)
+    do cálculo linha a linha e em arrays.
+    """
+    cal = Brazil()
+    df_base = gerar_colaboradores(linhas, mes, ano)
+
+    df = df_base.copy()
+    df["MES_ATUAL"] = mes
+    df["ANO_ATUAL"] = ano
+    df["ADMITIDO_NO_MES_ATUAL"] = df["DATA_DE_ADMISSAO"].dt.month == mes
+    df["DIAS_UTEIS_MES_ATUAL"] = business_days(ano, mes, cal)
+
+    start = time.perf_counter()
+    referencia = df.apply(calcular_dias_validos, axis=1, cal=cal).to_numpy()
+    tempo_linhas = time.perf_counter() - start
+
+    # Calendário sem feriados estaduais e sem cache em disco, montado antes
+    # da medição (o tempo medido é só o do cálculo)
+    calendario = BusinessDayCalendar(cache_dir=None, state_holidays=False)
+    calendario.working_days_in_month(ano, mes)
+
+    start = time.perf_counter()
+    vetorizado = calcular_dias_validos_vetorizado(df, ano, mes, calendario)
+    tempo_arrays = time.perf_counter() - start
+
+    # A competência inteira, com os dias úteis do mês do próprio calendário
+    competencia = calcular_competencia(df_base, mes, ano, calendario)["DIAS_VALIDOS"]
+
+    diferentes = (referencia != vetorizado) | (referencia != competencia.to_numpy())
+    return int(diferentes.sum()), tempo_linhas, tempo_arrays
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Confere se o cálculo dos dias válidos em arrays dá o mesmo "
+            "resultado do cálculo linha a linha e compara os tempos."
+        )
+    )
+    parser.add_argument(
+        "inicio", type=parse_competencia, nargs="?",
+        help="Primeira competência (MM/AAAA). Padrão: 01/2025."
+    )
+    parser.add_argument(
+        "fim", type=parse_competencia, nargs="?",
+        help="Última competência (MM/AAAA). Padrão: 12/2025 (ou a inicial)."
+    )
+    parser.add_argument(
+        "-n", "--linhas", type=int, default=DEFAULT_LINHAS,
+        help="Colaboradores sintéticos por competência."
+    )
+    args = parser.parse_args()
+
+    inicio = args.inicio or DEFAULT_INICIO
+    fim = args.fim or (inicio if args.inicio else DEFAULT_FIM)
+
+    diferencas = 0
+    for mes, ano in competencias_entre(inicio, fim):
+        diferentes, tempo_linhas, tempo_arrays = comparar_competencia(args.linhas, mes, ano)
+        diferencas += diferentes
+        print(
+            f"{'⚠️' if diferentes else '✔️'} {mes:02d}/{ano}: {diferentes} linha(s) "
+            f"diferente(s); linha a linha {tempo_linhas:.2f}s, em arrays "
+            f"{tempo_arrays:.3f}s ({args.linhas} linhas)"
+        )
+
+    if diferencas:
+        print(f"⚠️ {diferencas} linha(s) com dias válidos diferentes da referência")
+        sys.exit(1)
+    print("✔️ Cálculo em arrays igual ao linha a linha em todas as competências")
+
+
+if __name__ == "__main__":
+    main()
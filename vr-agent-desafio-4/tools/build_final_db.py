@@ -1,26 +1,127 @@
 import pandas as pd 
+import numpy as np
 import calendar
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
 from pathlib import Path
 from workalendar.america import Brazil
 
+from tools.business_calendar import BusinessDayCalendar, default_calendar
+from tools.input_cache import load_inputs
+
 
 def read_treat_and_aggregate_data(
         current_month: int,
-        current_year: int
+        current_year: int,
+        calendario: BusinessDayCalendar | None = None,
+        entradas: dict[str, pd.DataFrame] | None = None
     ):
+    """
+    Tabela final de compra de VR de uma competência.
+
+    Args:
+    current_month(int): Mês da competência.
+    current_year(int): Ano da competência.
+    calendario(BusinessDayCalendar | None): Dias úteis por UF (None: o
+        calendário compartilhado do processo).
+    entradas(dict[str, pd.DataFrame] | None): Planilhas já lidas por
+        load_inputs (None: lê as planilhas da pasta data).
+    """
+    df_base = prepare_base_data(entradas)
+    return calcular_competencia(df_base, current_month, current_year, calendario)
+
+
+def calcular_competencias(
+        competencias: list[tuple[int, int]],
+        calendario: BusinessDayCalendar | None = None,
+        entradas: dict[str, pd.DataFrame] | None = None,
+        max_workers: int = 1
+    ) -> pd.DataFrame:
+    """
+    Tabelas finais de várias competências, com as planilhas lidas e unidas
+    uma única vez (só o cálculo dos dias válidos é feito por mês).
+
+    Com max_workers > 1, os meses são calculados em processos separados, que
+    recebem a base unida e o calendário uma vez, na inicialização.
+
+    Ex.: calcular_competencias([(mes, 2025) for mes in range(1, 13)])
+
+    Args:
+    competencias(list[tuple[int, int]]): Pares (mês, ano).
+    calendario(BusinessDayCalendar | None): Dias úteis por UF.
+    entradas(dict[str, pd.DataFrame] | None): Planilhas já lidas por
+        load_inputs (None: lê as planilhas da pasta data).
+    max_workers(int): Quantidade de processos para os meses.
+    """
+    calendario = calendario or default_calendar
+    df_base = prepare_base_data(entradas)
+
+    if max_workers > 1 and len(competencias) > 1:
+        # Carrega as tabelas de dias úteis antes de copiar o calendário para
+        # os processos (cada processo não precisa recalculá-las)
+        for uf in df_base["ESTADO_SINDICATO_SIGLA"].dropna().unique():
+            for mes, ano in competencias:
+                calendario.working_days_in_month(ano, mes, uf)
+
+        with ProcessPoolExecutor(
+            max_workers=min(max_workers, len(competencias)),
+            initializer=_init_competencia_worker,
+            initargs=(df_base, calendario),
+        ) as executor:
+            futures = [
+                executor.submit(_calcular_competencia_worker, mes, ano)
+                for mes, ano in competencias
+            ]
+            tabelas = [future.result() for future in futures]
+    else:
+        tabelas = [
+            calcular_competencia(df_base, mes, ano, calendario)
+            for mes, ano in competencias
+        ]
+
+    return pd.concat(tabelas, ignore_index=True)
+
+
+# Base unida e calendário de cada processo de calcular_competencias
+_worker_state = {}
+
+
+def _init_competencia_worker(df_base: pd.DataFrame, calendario: BusinessDayCalendar):
+    _worker_state["df_base"] = df_base
+    _worker_state["calendario"] = calendario
+
+
+def _calcular_competencia_worker(mes: int, ano: int) -> pd.DataFrame:
+    return calcular_competencia(
+        _worker_state["df_base"], mes, ano, _worker_state["calendario"]
+    )
+
 
+def prepare_base_data(entradas: dict[str, pd.DataFrame] | None = None) -> pd.DataFrame:
+    """
+    Une as planilhas de entrada e aplica as exclusões (cargos, afastados e
+    colaboradores no exterior): a parte do cálculo que não depende da
+    competência.
+
+    Args:
+    entradas(dict[str, pd.DataFrame] | None): Planilhas já lidas por
+        load_inputs (None: lê as planilhas da pasta data).
+    """
     # Caminho base relativo à localização do script
     BASE_DIR = Path(__file__).resolve().parent.parent / "data"
-    
-    # Lendo os arquivos
-    df_ativos = pd.read_excel(BASE_DIR / "ATIVOS.xlsx")
-    df_ferias = pd.read_excel(BASE_DIR / "FÉRIAS.xlsx")
-    df_desligados = pd.read_excel(BASE_DIR / "DESLIGADOS.xlsx")
-    df_admitidos_mes = pd.read_excel(BASE_DIR / "ADMISSÃO ABRIL.xlsx")
-    df_sindicato_valor = pd.read_excel(BASE_DIR / "Base sindicato x valor.xlsx")
-    df_dias_uteis_colaborador = pd.read_excel(BASE_DIR / "Base dias uteis.xlsx", skiprows=1)
-    df_exterior = pd.read_excel(BASE_DIR / "EXTERIOR.xlsx")
-    df_afastamentos = pd.read_excel(BASE_DIR / "AFASTAMENTOS.xlsx")
+
+    # Lendo os arquivos (em paralelo, com as planilhas que não mudaram
+    # servidas do cache .parquet)
+    if entradas is None:
+        entradas = load_inputs(BASE_DIR)
+    df_ativos = entradas["ATIVOS.xlsx"]
+    df_ferias = entradas["FÉRIAS.xlsx"]
+    df_desligados = entradas["DESLIGADOS.xlsx"]
+    df_admitidos_mes = entradas["ADMISSÃO ABRIL.xlsx"]
+    df_sindicato_valor = entradas["Base sindicato x valor.xlsx"]
+    df_dias_uteis_colaborador = entradas["Base dias uteis.xlsx"]
+    df_exterior = entradas["EXTERIOR.xlsx"]
+    df_afastamentos = entradas["AFASTAMENTOS.xlsx"]
 
     # Agregando tabela de col. ativos com tabela de férias
     df_final = df_ativos.merge(df_ferias, on= ["MATRICULA", "DESC. SITUACAO"], how="left")
@@ -129,34 +230,54 @@ def read_treat_and_aggregate_data(
 
     df_final = df_final[~df_final["MATRICULA"].isin(matrículas_no_exterior)].copy()
 
+    return df_final
+
+
+def calcular_competencia(
+        df_base: pd.DataFrame,
+        current_month: int,
+        current_year: int,
+        calendario: BusinessDayCalendar | None = None
+    ) -> pd.DataFrame:
+    """
+    Dias válidos e valores de VR de uma competência, a partir da base unida
+    por prepare_base_data (que não é alterada).
+
+    Args:
+    df_base(pd.DataFrame): Base unida por prepare_base_data.
+    current_month(int): Mês da competência.
+    current_year(int): Ano da competência.
+    calendario(BusinessDayCalendar | None): Dias úteis por UF.
+    """
+    df_final = df_base.copy()
+
     # Definindo variáveis que devem ser input nosso, em um primeiro momento
     df_final["MES_ATUAL"] = current_month #Será um input em linguagem natural
     df_final["ANO_ATUAL"] = current_year 
-    cal = Brazil()
+    # Calendário com os dias úteis por UF, calculado uma vez e reaproveitado
+    # entre competências (e execuções, pelo cache em disco)
+    calendario = calendario or default_calendar
 
     # Realizando cálculos para a obtenção da tabela final
-    df_final["DIAS_UTEIS_MES_ATUAL"] = df_final.apply(
-        lambda x: business_days(
-            x["ANO_ATUAL"], x["MES_ATUAL"], cal
-        ), 
-        axis=1
+    # (dias úteis do mês de acordo com a UF do sindicato, com os feriados
+    # estaduais)
+    df_final["DIAS_UTEIS_MES_ATUAL"] = df_final["ESTADO_SINDICATO_SIGLA"].map(
+        lambda uf: dias_uteis_competencia(calendario, current_year, current_month, uf)
     )
 
-    df_final["QTD_DIAS_NO_MES"] = df_final.apply(
-        lambda row: calendar.monthrange(
-            row["ANO_ATUAL"], row["MES_ATUAL"]
-            )[1], 
-            axis=1
-    )
+    df_final["QTD_DIAS_NO_MES"] = calendar.monthrange(
+        current_year, current_month
+    )[1]
 
-    df_final["ADMITIDO_NO_MES_ATUAL"] = False 
-
-    df_final.loc[
-        df_final["DATA_DE_ADMISSAO"].dt.month == df_final["MES_ATUAL"], 
-        "ADMITIDO_NO_MES_ATUAL"
-    ] = True 
+    df_final["ADMITIDO_NO_MES_ATUAL"] = (
+        df_final["DATA_DE_ADMISSAO"].dt.month == df_final["MES_ATUAL"]
+    )
 
-    df_final["DIAS_VALIDOS"] = df_final.apply(calcular_dias_validos, axis=1, cal=cal)
+    # Dias válidos de todos os colaboradores de uma vez (mesmas regras de
+    # calcular_dias_validos, em arrays)
+    df_final["DIAS_VALIDOS"] = calcular_dias_validos_vetorizado(
+        df_final, current_year, current_month, calendario
+    )
 
     df_final = df_final.drop(columns = "DIAS UTEIS")
 
@@ -184,7 +305,29 @@ def read_treat_and_aggregate_data(
 
     return df_final
 
+def dias_uteis_competencia(
+        calendario: BusinessDayCalendar,
+        ano: int,
+        mes: int,
+        uf: str | None = None
+    ) -> int:
+    """
+    Dias úteis da competência na UF, com a mesma regra dos intervalos de
+    admissão e demissão: dias úteis em (dia 1, último dia] + 1, como em
+    business_days. Assim, um colaborador admitido no dia 1 ou desligado no
+    último dia tem os mesmos dias de quem trabalhou o mês inteiro.
+    """
+    inicio_mes = date(ano, mes, 1)
+    fim_mes = date(ano, mes, calendar.monthrange(ano, mes)[1])
+    return calendario.working_days_between(inicio_mes, fim_mes, uf) + 1
+
+
 def business_days(year, month, cal):
+    """
+    Dias úteis do mês no calendário nacional, como no cálculo original.
+    Implementação de referência (ver run_dias_validos_check.py): o cálculo
+    da competência usa o BusinessDayCalendar.
+    """
     return cal.get_working_days_delta(
         pd.Timestamp(year=year, month=month, day=1),
         pd.Timestamp(
@@ -193,7 +336,87 @@ def business_days(year, month, cal):
         )
     ) + 1  # +1 porque o intervalo é exclusivo no final
 
+def calcular_dias_validos_vetorizado(
+        df: pd.DataFrame,
+        ano: int,
+        mes: int,
+        calendario: BusinessDayCalendar
+    ) -> np.ndarray:
+    """
+    Dias válidos de todos os colaboradores da competência, com as mesmas
+    regras de calcular_dias_validos, sem percorrer as linhas.
+
+    Os dias úteis de cada intervalo são contados no calendário da UF do
+    sindicato (admissões de anos anteriores contam desde a admissão, como
+    no cálculo linha a linha).
+
+    Args:
+    df(pd.DataFrame): Tabela com DIAS_UTEIS_MES_ATUAL, ADMITIDO_NO_MES_ATUAL,
+        DATA_DE_ADMISSAO, DATA DEMISSÃO, COMUNICADO DE DESLIGAMENTO,
+        ESTADO_SINDICATO_SIGLA e DIAS DE FÉRIAS.
+    ano(int): Ano da competência.
+    mes(int): Mês da competência.
+    calendario(BusinessDayCalendar): Dias úteis por UF.
+    """
+    inicio_mes = np.datetime64(f"{ano:04d}-{mes:02d}-01", "D")
+    fim_mes = np.datetime64(
+        f"{ano:04d}-{mes:02d}-{calendar.monthrange(ano, mes)[1]:02d}", "D"
+    )
+
+    dias_validos = df["DIAS_UTEIS_MES_ATUAL"].to_numpy(dtype=np.int64, copy=True)
+
+    data_adm = pd.to_datetime(df["DATA_DE_ADMISSAO"])
+    data_dem = pd.to_datetime(df["DATA DEMISSÃO"])
+
+    admitido = (
+        df["ADMITIDO_NO_MES_ATUAL"].fillna(False).to_numpy(dtype=bool)
+        & data_adm.notna().to_numpy()
+    )
+    demitido_no_mes = (
+        (data_dem.dt.month == mes) & (data_dem.dt.year == ano)
+    ).to_numpy()
+
+    ufs = df["ESTADO_SINDICATO_SIGLA"].to_numpy(dtype=object)
+
+    # --- Regras de Admissão ---
+    datas_adm = data_adm[admitido].to_numpy(dtype="datetime64[D]")
+    dias_validos[admitido] = calendario.working_days_delta(
+        datas_adm, fim_mes, ufs[admitido]
+    ) + 1
+
+    # --- Regras de Demissão ---
+    comunicado_ok = (
+        df["COMUNICADO DE DESLIGAMENTO"].astype(str).str.upper() == "OK"
+    ).to_numpy()
+    ate_dia_15 = (data_dem.dt.day <= 15).to_numpy()
+
+    # até dia 15 e comunicado OK
+    dias_validos[demitido_no_mes & ate_dia_15 & comunicado_ok] = 0
+
+    demitido_com_dias = demitido_no_mes & ~(ate_dia_15 & comunicado_ok)
+    datas_dem = data_dem[demitido_com_dias].to_numpy(dtype="datetime64[D]")
+    dias_validos[demitido_com_dias] = (
+        calendario.working_days_delta(
+            inicio_mes, datas_dem, ufs[demitido_com_dias]
+        ) + 1
+    )
+
+    # --- Regras de Férias (apenas PR) ---
+    do_pr = (df["ESTADO_SINDICATO_SIGLA"] == "PR").to_numpy()
+    dias_ferias = np.trunc(
+        df["DIAS DE FÉRIAS"].to_numpy(dtype=float)
+    ).astype(np.int64)
+    dias_validos[do_pr] -= dias_ferias[do_pr]
+
+    return np.maximum(dias_validos, 0)
+
+
 def calcular_dias_validos(row, cal: Brazil):
+    """
+    Dias válidos de um colaborador, linha a linha (cálculo original).
+    Implementação de referência para calcular_dias_validos_vetorizado,
+    conferida por run_dias_validos_check.py.
+    """
     dias_validos = row["DIAS_UTEIS_MES_ATUAL"]
 
     ano = int(row["ANO_ATUAL"])
@@ -223,8 +446,3 @@ def calcular_dias_validos(row, cal: Brazil):
         dias_validos -= int(row["DIAS DE FÉRIAS"])
 
     return max(dias_validos, 0)
-
-def all_days_in_month(year, month):
-    start = pd.Timestamp(year=year, month=month, day=1)
-    end = start + pd.offsets.MonthEnd(0)  # último dia do mês
-    return pd.date_range(start, end, freq="D")
\ No newline at end of file
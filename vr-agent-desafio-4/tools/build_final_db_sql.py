@@ -0,0 +1,323 @@
+import calendar
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from tools.build_final_db import dias_uteis_competencia
+from tools.business_calendar import BusinessDayCalendar, default_calendar
+from tools.input_cache import load_inputs
+
+
+# Coluna de estado da planilha de sindicatos (o nome vem com espaços não
+# separáveis no final)
+ESTADO_SINDICATO_COLUMN = "ESTADO" + "\xa0" * 53
+
+# Cargos que não recebem VR (procurados no título do cargo, sem diferenciar
+# maiúsculas)
+CARGOS_INDESEJADOS = ["DIRETOR", "ESTAGIÁRIO", "ESTAGIARIO", "APRENDIZ"]
+
+# Nome de cada planilha de entrada dentro da conexão
+INPUT_VIEWS = {
+    "ATIVOS.xlsx": "ativos",
+    "FÉRIAS.xlsx": "ferias",
+    "DESLIGADOS.xlsx": "desligados",
+    "ADMISSÃO ABRIL.xlsx": "admitidos",
+    "Base sindicato x valor.xlsx": "sindicato_valor",
+    "Base dias uteis.xlsx": "dias_uteis_sindicato",
+    "EXTERIOR.xlsx": "exterior",
+    "AFASTAMENTOS.xlsx": "afastamentos",
+}
+
+# Planilhas com espaços sobrando nos nomes das colunas
+STRIPPED_COLUMN_INPUTS = ("DESLIGADOS.xlsx", "Base dias uteis.xlsx")
+
+
+def read_treat_and_aggregate_data_sql(
+        current_month: int,
+        current_year: int,
+        calendario: BusinessDayCalendar | None = None,
+        entradas: dict[str, pd.DataFrame] | None = None,
+        conn: duckdb.DuckDBPyConnection | None = None
+    ) -> pd.DataFrame:
+    """
+    Mesma tabela final de read_treat_and_aggregate_data, calculada por uma
+    única consulta no DuckDB sobre as planilhas de entrada: as junções, as
+    exclusões (cargos, afastados e exterior) e as regras de dias válidos são
+    SQL, e o único DataFrame criado é o resultado (ordenado por MATRICULA).
+
+    As planilhas são lidas pelo DuckDB diretamente dos DataFrames de
+    load_inputs, sem cópias intermediárias. Os dias úteis vêm do mesmo
+    calendário por UF, como tabelas de dias úteis acumulados.
+
+    Args:
+    current_month(int): Mês da competência.
+    current_year(int): Ano da competência.
+    calendario(BusinessDayCalendar | None): Dias úteis por UF.
+    entradas(dict[str, pd.DataFrame] | None): Planilhas já lidas por
+        load_inputs (None: lê as planilhas da pasta data).
+    conn(duckdb.DuckDBPyConnection | None): Conexão usada no cálculo (None:
+        um banco em memória, fechado ao final).
+    """
+    calendario = calendario or default_calendar
+    if entradas is None:
+        entradas = load_inputs(Path(__file__).resolve().parent.parent / "data")
+
+    own_connection = conn is None
+    if own_connection:
+        conn = duckdb.connect()
+
+    try:
+        _register_inputs(conn, entradas)
+        conn.execute(f"CREATE OR REPLACE TEMP VIEW vr_base AS {_base_sql()}")
+        _register_calendar(conn, calendario, current_month, current_year)
+        return conn.execute(_competencia_sql(current_month, current_year)).df()
+    finally:
+        if own_connection:
+            conn.close()
+
+
+def _register_inputs(conn: duckdb.DuckDBPyConnection, entradas: dict[str, pd.DataFrame]):
+    """
+    Registra as planilhas na conexão (views sobre os DataFrames). Nas
+    planilhas com espaços sobrando nos nomes das colunas, a view expõe os
+    nomes sem esses espaços.
+    """
+    for file_name, view_name in INPUT_VIEWS.items():
+        df = entradas[file_name]
+        if file_name not in STRIPPED_COLUMN_INPUTS:
+            conn.register(view_name, df)
+            continue
+
+        conn.register(f"{view_name}_planilha", df)
+        columns = ", ".join(
+            f'{_quote(column)} AS {_quote(str(column).strip())}' for column in df.columns
+        )
+        conn.execute(
+            f"CREATE OR REPLACE TEMP VIEW {view_name} AS "
+            f"SELECT {columns} FROM {view_name}_planilha"
+        )
+
+
+def _base_sql() -> str:
+    """
+    Consulta da base unida (o equivalente SQL de prepare_base_data). As
+    junções usam IS NOT DISTINCT FROM porque o pandas.merge também junta
+    chaves vazias entre si.
+    """
+    cargos = "|".join(CARGOS_INDESEJADOS)
+    return f"""
+        WITH colaboradores AS (
+            SELECT
+                a.*,
+                {_uf_sql('a."Sindicato"')} AS ESTADO_SINDICATO_SIGLA
+            FROM ativos AS a
+        ),
+        colaboradores_estado AS (
+            SELECT
+                c.*,
+                CASE c.ESTADO_SINDICATO_SIGLA
+                    WHEN 'RJ' THEN 'Rio de Janeiro'
+                    WHEN 'SP' THEN 'São Paulo'
+                    WHEN 'PR' THEN 'Paraná'
+                    WHEN 'RS' THEN 'Rio Grande do Sul'
+                END AS ESTADO_SINDICATO
+            FROM colaboradores AS c
+        ),
+        dias_uteis_sindicato_sigla AS (
+            SELECT
+                {_uf_sql('"SINDICADO"')} AS ESTADO_SINDICATO_SIGLA
+            FROM dias_uteis_sindicato
+        ),
+        exterior_sem_retorno AS (
+            SELECT "Cadastro" AS MATRICULA
+            FROM exterior
+            WHERE NOT coalesce(regexp_matches("Unnamed: 2", 'retornou', 'i'), false)
+        )
+        SELECT
+            c."MATRICULA",
+            c."Sindicato",
+            c."TITULO DO CARGO",
+            c.ESTADO_SINDICATO_SIGLA,
+            coalesce(f."DIAS DE FÉRIAS", 0) AS "DIAS DE FÉRIAS",
+            d."DATA DEMISSÃO",
+            d."COMUNICADO DE DESLIGAMENTO",
+            adm."Admissão" AS DATA_DE_ADMISSAO,
+            s."VALOR" AS VALOR_SINDICATO
+        FROM colaboradores_estado AS c
+        LEFT JOIN ferias AS f
+            ON f."MATRICULA" IS NOT DISTINCT FROM c."MATRICULA"
+            AND f."DESC. SITUACAO" IS NOT DISTINCT FROM c."DESC. SITUACAO"
+        LEFT JOIN desligados AS d
+            ON d."MATRICULA" IS NOT DISTINCT FROM c."MATRICULA"
+        LEFT JOIN admitidos AS adm
+            ON adm."MATRICULA" IS NOT DISTINCT FROM c."MATRICULA"
+        LEFT JOIN sindicato_valor AS s
+            ON s.{_quote(ESTADO_SINDICATO_COLUMN)} IS NOT DISTINCT FROM c.ESTADO_SINDICATO
+        -- Só multiplica as linhas como o merge do pandas (a coluna de dias
+        -- úteis da planilha não é usada no cálculo)
+        LEFT JOIN dias_uteis_sindicato_sigla AS du
+            ON du.ESTADO_SINDICATO_SIGLA IS NOT DISTINCT FROM c.ESTADO_SINDICATO_SIGLA
+        WHERE NOT coalesce(regexp_matches(c."TITULO DO CARGO", '{cargos}', 'i'), false)
+            AND NOT EXISTS (
+                SELECT 1 FROM afastamentos AS af
+                WHERE af."MATRICULA" IS NOT DISTINCT FROM c."MATRICULA"
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM exterior_sem_retorno AS e
+                WHERE e.MATRICULA IS NOT DISTINCT FROM c."MATRICULA"
+            )
+    """
+
+
+def _register_calendar(
+        conn: duckdb.DuckDBPyConnection,
+        calendario: BusinessDayCalendar,
+        mes: int,
+        ano: int
+    ):
+    """
+    Registra as tabelas de dias úteis das UFs dos sindicatos:
+    - dias_uteis_mes: dias úteis da competência e acumulados no primeiro e no
+      último dia do mês, por UF;
+    - dias_uteis_acumulados: dias úteis acumulados em cada dia dos anos
+      usados nos intervalos (admissões de anos anteriores contam desde a
+      admissão), por UF.
+    """
+    # UFs e anos de admissão direto das planilhas (sem calcular a base)
+    uf_sindicato = _uf_sql('"Sindicato"')
+    ufs = [
+        uf for (uf,) in conn.execute(
+            f"SELECT DISTINCT {uf_sindicato} FROM ativos"
+        ).fetchall()
+    ]
+    anos_admissao = conn.execute(f"""
+        SELECT min(year("Admissão")), max(year("Admissão"))
+        FROM admitidos
+        WHERE month("Admissão") = {mes}
+    """).fetchone()
+    first_year = min(ano, anos_admissao[0] or ano)
+    last_year = max(ano, anos_admissao[1] or ano)
+
+    origin = np.datetime64(f"{first_year:04d}-01-01", "D")
+    dias = np.arange(
+        origin, np.datetime64(f"{last_year + 1:04d}-01-01", "D"), dtype="datetime64[D]"
+    )
+    inicio_mes = (np.datetime64(f"{ano:04d}-{mes:02d}-01", "D") - origin).astype(int)
+    fim_mes = inicio_mes + calendar.monthrange(ano, mes)[1] - 1
+
+    acumulados, meses = [], []
+    for uf in ufs:
+        acumulado = calendario.cumulative_working_days(first_year, last_year, uf)
+        acumulados.append(pd.DataFrame({
+            "uf": uf, "dia": dias, "acumulado": acumulado,
+        }))
+        meses.append({
+            "uf": uf,
+            "dias_uteis_mes": dias_uteis_competencia(calendario, ano, mes, uf),
+            "acumulado_inicio": acumulado[inicio_mes],
+            "acumulado_fim": acumulado[fim_mes],
+        })
+
+    # UF como texto mesmo quando só há UFs vazias (None)
+    dias_uteis_acumulados = pd.concat(
+        acumulados or [pd.DataFrame(columns=["uf", "dia", "acumulado"])],
+        ignore_index=True,
+    ).astype({"uf": "string"})
+    dias_uteis_mes = pd.DataFrame(meses, columns=[
+        "uf", "dias_uteis_mes", "acumulado_inicio", "acumulado_fim",
+    ]).astype({"uf": "string"})
+
+    conn.register("dias_uteis_acumulados", dias_uteis_acumulados)
+    conn.register("dias_uteis_mes", dias_uteis_mes)
+
+
+def _competencia_sql(mes: int, ano: int) -> str:
+    """
+    Consulta da tabela final da competência (o equivalente SQL de
+    calcular_competencia e calcular_dias_validos_vetorizado). Os dias úteis
+    de um intervalo são a diferença dos acumulados nas duas datas.
+    """
+    return f"""
+        WITH regras AS (
+            SELECT
+                b.*,
+                m.dias_uteis_mes,
+                coalesce(month(b.DATA_DE_ADMISSAO) = {mes}, false) AS admitido,
+                coalesce(
+                    month(b."DATA DEMISSÃO") = {mes} AND year(b."DATA DEMISSÃO") = {ano},
+                    false
+                ) AS demitido_no_mes,
+                coalesce(
+                    day(b."DATA DEMISSÃO") <= 15
+                    AND upper(CAST(b."COMUNICADO DE DESLIGAMENTO" AS VARCHAR)) = 'OK',
+                    false
+                ) AS desligamento_ate_dia_15,
+                abs(m.acumulado_fim - adm.acumulado) + 1 AS dias_desde_admissao,
+                abs(dem.acumulado - m.acumulado_inicio) + 1 AS dias_ate_demissao
+            FROM vr_base AS b
+            LEFT JOIN dias_uteis_mes AS m
+                ON m.uf IS NOT DISTINCT FROM b.ESTADO_SINDICATO_SIGLA
+            LEFT JOIN dias_uteis_acumulados AS adm
+                ON adm.uf IS NOT DISTINCT FROM b.ESTADO_SINDICATO_SIGLA
+                AND adm.dia = CAST(b.DATA_DE_ADMISSAO AS DATE)
+            LEFT JOIN dias_uteis_acumulados AS dem
+                ON dem.uf IS NOT DISTINCT FROM b.ESTADO_SINDICATO_SIGLA
+                AND dem.dia = CAST(b."DATA DEMISSÃO" AS DATE)
+        ),
+        dias AS (
+            SELECT
+                r.*,
+                greatest(
+                    CASE
+                        -- Regras de Demissão (até dia 15 e comunicado OK: 0)
+                        WHEN demitido_no_mes AND desligamento_ate_dia_15 THEN 0
+                        WHEN demitido_no_mes THEN dias_ate_demissao
+                        -- Regras de Admissão
+                        WHEN admitido THEN dias_desde_admissao
+                        ELSE dias_uteis_mes
+                    END
+                    -- Regras de Férias (apenas PR)
+                    - CASE
+                        WHEN ESTADO_SINDICATO_SIGLA = 'PR'
+                        THEN CAST(trunc("DIAS DE FÉRIAS") AS BIGINT)
+                        ELSE 0
+                    END,
+                    0
+                ) AS DIAS_VALIDOS
+            FROM regras AS r
+        )
+        SELECT
+            "MATRICULA",
+            "Sindicato",
+            '{mes:02d}/{ano}' AS "Competência",
+            DIAS_VALIDOS,
+            VALOR_SINDICATO,
+            DIAS_VALIDOS * VALOR_SINDICATO AS TOTAL,
+            0.8 * (DIAS_VALIDOS * VALOR_SINDICATO) AS "Custo empresa",
+            0.2 * (DIAS_VALIDOS * VALOR_SINDICATO) AS "Desconto profissional",
+            ESTADO_SINDICATO_SIGLA,
+            "DATA DEMISSÃO",
+            DATA_DE_ADMISSAO,
+            "TITULO DO CARGO"
+        FROM dias
+        ORDER BY "MATRICULA"
+    """
+
+
+def _uf_sql(column: str) -> str:
+    """
+    Expressão SQL com a sigla da UF no nome do sindicato: a segunda palavra,
+    como o .str.split().str[1] do pandas.
+
+    Ex.: "SINDPD SP - SIND.TRAB.EM PROC DADOS..." -> "SP"
+    """
+    return f"NULLIF(regexp_extract({column}, '^\\s*\\S+\\s+(\\S+)', 1), '')"
+
+
+def _quote(identifier: str) -> str:
+    """
+    Nome de coluna entre aspas duplas (aspas internas escapadas).
+    """
+    return '"' + str(identifier).replace('"', '""') + '"'
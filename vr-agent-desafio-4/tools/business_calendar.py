@@ -0,0 +1,213 @@
+import calendar
+import json
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import workalendar
+from workalendar.america import Brazil
+from workalendar.registry import registry
+
+
+# Cache em disco das tabelas de dias úteis (um .json por UF e ano)
+CALENDAR_CACHE_DIR = (
+    Path(__file__).resolve().parent.parent / "data" / "cache" / "dias_uteis"
+)
+
+# Chave usada para o calendário nacional (UF desconhecida ou sem feriados
+# estaduais)
+NATIONAL_KEY = "BR"
+
+
+class BusinessDayCalendar:
+    """
+    Dias úteis por (UF, ano, mês), calculados uma única vez.
+
+    Cada mês vira uma tabela de dias úteis (1 = útil, 0 = fim de semana ou
+    feriado nacional/estadual, segundo o workalendar). As tabelas ficam em
+    memória e em disco (CALENDAR_CACHE_DIR), então o workalendar só é
+    consultado na primeira vez que um ano de uma UF aparece. As contagens
+    entre duas datas usam somas acumuladas dessas tabelas: cada consulta é
+    uma subtração, sem percorrer os dias.
+
+    Args:
+    cache_dir(Path | None): Pasta do cache em disco (None: só em memória).
+    state_holidays(bool): Considera os feriados estaduais da UF; False usa
+        o calendário nacional para todas as UFs.
+    """
+
+    def __init__(
+            self,
+            cache_dir: Path | None = CALENDAR_CACHE_DIR,
+            state_holidays: bool = True
+        ):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.state_holidays = state_holidays
+        # (UF, ano, mês) -> dias úteis do mês (1/0 por dia)
+        self._months = {}
+        # (UF, primeiro ano, último ano) -> soma acumulada dos dias úteis
+        self._prefixes = {}
+        # UF informada -> UF usada nas tabelas
+        self._uf_keys = {}
+
+    def working_days_in_month(self, year: int, month: int, uf: str | None = None) -> int:
+        """
+        Quantidade de dias úteis do mês na UF.
+        """
+        return int(self._month_flags(self._uf_key(uf), year, month).sum())
+
+    def working_days_between(self, start, end, uf: str | None = None) -> int:
+        """
+        Dias úteis no intervalo (start, end], em qualquer ordem das datas (o
+        mesmo que o get_working_days_delta do workalendar).
+
+        Ex.: working_days_between(date(2025, 5, 1), date(2025, 5, 31), "SP")
+        """
+        return int(self.working_days_delta([start], [end], uf)[0])
+
+    def working_days_delta(self, starts, ends, ufs=None) -> np.ndarray:
+        """
+        Versão em arrays de working_days_between: dias úteis no intervalo
+        (início, fim] de cada par de datas.
+
+        Args:
+        starts(array-like): Datas de início (sem NaT).
+        ends(array-like): Datas de fim (sem NaT), do mesmo tamanho ou uma só.
+        ufs(array-like | str | None): UF de cada par ou uma só para todos
+            (None ou UF sem calendário próprio: calendário nacional).
+        """
+        starts = np.atleast_1d(np.asarray(starts, dtype="datetime64[D]"))
+        ends = np.atleast_1d(np.asarray(ends, dtype="datetime64[D]"))
+        starts, ends = np.broadcast_arrays(starts, ends)
+        first, last = np.minimum(starts, ends), np.maximum(starts, ends)
+
+        uf_keys = np.broadcast_to(
+            np.asarray(
+                [self._uf_key(uf) for uf in np.atleast_1d(np.asarray(ufs, dtype=object))],
+                dtype=object,
+            ),
+            first.shape,
+        )
+
+        delta = np.zeros(first.shape, dtype=np.int64)
+        if not first.size:
+            return delta
+
+        first_year = int(first.min().astype("datetime64[Y]").astype(int)) + 1970
+        last_year = int(last.max().astype("datetime64[Y]").astype(int)) + 1970
+        origin = np.datetime64(f"{first_year:04d}-01-01", "D")
+
+        for uf_key in set(uf_keys.tolist()):
+            rows = uf_keys == uf_key
+            prefix = self._prefix(uf_key, first_year, last_year)
+            # prefix[i] = dias úteis de origin até o dia i - 1 (inclusive)
+            start_index = (first[rows] - origin).astype(np.int64) + 1
+            end_index = (last[rows] - origin).astype(np.int64) + 1
+            delta[rows] = prefix[end_index] - prefix[start_index]
+        return delta
+
+    def cumulative_working_days(
+            self,
+            first_year: int,
+            last_year: int,
+            uf: str | None = None
+        ) -> np.ndarray:
+        """
+        Dias úteis acumulados na UF de 01/01/first_year até cada dia
+        (inclusive), um valor por dia até 31/12/last_year. A diferença entre
+        os valores de duas datas é o working_days_between delas.
+        """
+        return self._prefix(self._uf_key(uf), first_year, last_year)[1:]
+
+    def _uf_key(self, uf) -> str:
+        """
+        UF usada nas tabelas: a própria UF, se houver calendário estadual, ou
+        o calendário nacional.
+        """
+        if not self.state_holidays or not isinstance(uf, str):
+            return NATIONAL_KEY
+        if uf not in self._uf_keys:
+            code = uf.strip().upper()
+            self._uf_keys[uf] = (
+                code if registry.get(f"BR-{code}") is not None else NATIONAL_KEY
+            )
+        return self._uf_keys[uf]
+
+    def _prefix(self, uf_key: str, first_year: int, last_year: int) -> np.ndarray:
+        """
+        Soma acumulada dos dias úteis de 01/01/first_year a 31/12/last_year
+        (com um 0 no início), montada uma vez por UF e intervalo de anos.
+        """
+        key = (uf_key, first_year, last_year)
+        if key not in self._prefixes:
+            flags = np.concatenate([
+                self._month_flags(uf_key, year, month)
+                for year in range(first_year, last_year + 1)
+                for month in range(1, 13)
+            ])
+            self._prefixes[key] = np.concatenate(
+                ([0], np.cumsum(flags, dtype=np.int64))
+            )
+        return self._prefixes[key]
+
+    def _month_flags(self, uf_key: str, year: int, month: int) -> np.ndarray:
+        """
+        Dias úteis (1/0) do mês, do cache em memória, do disco ou calculados.
+        """
+        key = (uf_key, year, month)
+        if key not in self._months:
+            self._load_year(uf_key, year)
+        return self._months[key]
+
+    def _load_year(self, uf_key: str, year: int):
+        """
+        Carrega as tabelas dos 12 meses de um ano da UF: do disco, se o cache
+        for da mesma versão do workalendar, ou calculadas (e gravadas).
+        """
+        cache_file = (
+            self.cache_dir / f"{uf_key}_{year}.json" if self.cache_dir else None
+        )
+        months = None
+        if cache_file is not None and cache_file.exists():
+            cached = json.loads(cache_file.read_text(encoding="utf-8"))
+            if cached.get("workalendar") == workalendar.__version__:
+                months = cached["months"]
+
+        if months is None:
+            months = self._compute_year(uf_key, year)
+            if cache_file is not None:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                cache_file.write_text(json.dumps({
+                    "uf": uf_key, "year": year,
+                    "workalendar": workalendar.__version__, "months": months,
+                }), encoding="utf-8")
+
+        for month, flags in months.items():
+            self._months[(uf_key, year, int(month))] = (
+                np.frombuffer(flags.encode("ascii"), dtype=np.uint8) == ord("1")
+            ).astype(np.int8)
+
+    @staticmethod
+    def _compute_year(uf_key: str, year: int) -> dict[str, str]:
+        """
+        Dias úteis de cada mês do ano ("0111110...", um caractere por dia),
+        segundo o calendário da UF no workalendar.
+        """
+        calendar_class = (
+            Brazil if uf_key == NATIONAL_KEY else registry.get(f"BR-{uf_key}")
+        )
+        holidays = {day for day, _ in calendar_class().holidays(year)}
+
+        months = {}
+        for month in range(1, 13):
+            days_in_month = calendar.monthrange(year, month)[1]
+            months[str(month)] = "".join(
+                "1" if date(year, month, day).weekday() < 5
+                and date(year, month, day) not in holidays else "0"
+                for day in range(1, days_in_month + 1)
+            )
+        return months
+
+
+# Calendário compartilhado pelas execuções do mesmo processo
+default_calendar = BusinessDayCalendar()
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+
+# Pasta com as planilhas de entrada
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+# Cache em disco das planilhas já lidas (um .parquet por versão da planilha)
+INPUT_CACHE_DIR = DATA_DIR / "cache" / "entradas"
+
+# Planilhas usadas no cálculo: nome do arquivo -> argumentos do pd.read_excel
+INPUT_FILES = {
+    "ATIVOS.xlsx": {},
+    "FÉRIAS.xlsx": {},
+    "DESLIGADOS.xlsx": {},
+    "ADMISSÃO ABRIL.xlsx": {},
+    "Base sindicato x valor.xlsx": {},
+    "Base dias uteis.xlsx": {"skiprows": 1},
+    "EXTERIOR.xlsx": {},
+    "AFASTAMENTOS.xlsx": {},
+}
+
+
+def load_inputs(
+        base_dir: Path = DATA_DIR,
+        cache_dir: Path | None = INPUT_CACHE_DIR,
+        max_workers: int | None = None
+    ) -> dict[str, pd.DataFrame]:
+    """
+    Lê as planilhas de entrada (INPUT_FILES), servindo do cache .parquet as
+    que não mudaram desde a última leitura. As demais são lidas do Excel em
+    paralelo (um processo por planilha, já que o openpyxl não libera o GIL)
+    e gravadas no cache.
+
+    O cache de cada planilha é identificado pelo caminho, tamanho e data de
+    modificação do arquivo: qualquer alteração na planilha gera uma nova
+    leitura. Ao final, imprime se cada planilha veio do cache e o tempo de
+    leitura.
+
+    Ex.: load_inputs()["ATIVOS.xlsx"]
+
+    Args:
+    base_dir(Path): Pasta com as planilhas.
+    cache_dir(Path | None): Pasta do cache .parquet (None: sempre lê do Excel).
+    max_workers(int | None): Máximo de processos para as leituras do Excel.
+    """
+    start = time.perf_counter()
+    base_dir = Path(base_dir)
+
+    dataframes, report, pending = {}, {}, []
+    for file_name, read_kwargs in INPUT_FILES.items():
+        path = base_dir / file_name
+        cache_file = _cache_file(path, read_kwargs, cache_dir) if cache_dir else None
+
+        if cache_file is not None and cache_file.with_suffix(".json").exists():
+            file_start = time.perf_counter()
+            dataframes[file_name] = _read_cache(cache_file)
+            report[file_name] = ("cache", time.perf_counter() - file_start)
+        else:
+            pending.append((file_name, path, read_kwargs, cache_file))
+
+    # Planilhas novas ou alteradas: leitura do Excel em paralelo
+    if len(pending) > 1:
+        workers = min(len(pending), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_read_excel_and_cache, *item[1:]) for item in pending
+            ]
+            results = [future.result() for future in futures]
+    else:
+        results = [_read_excel_and_cache(*item[1:]) for item in pending]
+
+    for (file_name, *_), (df, origin, seconds) in zip(pending, results):
+        dataframes[file_name] = df
+        report[file_name] = (origin, seconds)
+
+    _print_report(
+        {file_name: report[file_name] for file_name in INPUT_FILES},
+        time.perf_counter() - start,
+    )
+    return {file_name: dataframes[file_name] for file_name in INPUT_FILES}
+
+
+def _cache_file(path: Path, read_kwargs: dict, cache_dir: Path) -> Path:
+    """
+    Arquivo do cache para a versão atual da planilha (caminho, tamanho, data
+    de modificação e argumentos de leitura).
+    """
+    stat = path.stat()
+    key = hashlib.sha1(
+        json.dumps(
+            [str(path.resolve()), stat.st_size, stat.st_mtime_ns, read_kwargs],
+            sort_keys=True,
+        ).encode("utf-8")
+    ).hexdigest()[:16]
+    return Path(cache_dir) / f"{path.stem}_{key}.parquet"
+
+
+def _read_excel_and_cache(
+        path: Path,
+        read_kwargs: dict,
+        cache_file: Path | None
+    ) -> tuple[pd.DataFrame, str, float]:
+    """
+    Lê a planilha do Excel e grava o .parquet no cache (executada nos
+    processos de leitura). Devolve o DataFrame, a origem para o relatório e
+    o tempo gasto.
+    """
+    start = time.perf_counter()
+    df = pd.read_excel(path, **read_kwargs)
+
+    origin = "excel"
+    if cache_file is not None:
+        if _cacheable(df):
+            _write_cache(df, path, cache_file)
+        else:
+            origin = "excel (sem cache: colunas com tipos mistos)"
+    return df, origin, time.perf_counter() - start
+
+
+def _cacheable(df: pd.DataFrame) -> bool:
+    """
+    Verifica se o DataFrame volta do .parquet igual ao lido do Excel: colunas
+    de texto (object) só podem ter textos e vazios. Colunas com números ou
+    datas misturados a textos viram texto no .parquet, então a planilha fica
+    fora do cache.
+    """
+    for column in df.select_dtypes(include="object").columns:
+        values = df[column].dropna()
+        if not values.map(lambda value: isinstance(value, str)).all():
+            return False
+    return True
+
+
+def _write_cache(df: pd.DataFrame, path: Path, cache_file: Path):
+    """
+    Grava o .parquet (pelo DuckDB) e, por último, o .json com a origem e os
+    tipos das colunas, que marca o cache como completo. Remove as versões
+    anteriores da mesma planilha.
+    """
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    source = str(path.resolve())
+
+    for old_metadata in cache_file.parent.glob(f"{path.stem}_*.json"):
+        if old_metadata.with_suffix("") == cache_file.with_suffix(""):
+            continue
+        if json.loads(old_metadata.read_text(encoding="utf-8")).get("source") == source:
+            old_metadata.unlink(missing_ok=True)
+            old_metadata.with_suffix(".parquet").unlink(missing_ok=True)
+
+    conn = duckdb.connect()
+    try:
+        conn.register("planilha", df)
+        conn.execute(
+            f"COPY (SELECT * FROM planilha) TO {_sql_path(cache_file)} "
+            "(FORMAT PARQUET)"
+        )
+    finally:
+        conn.close()
+
+    cache_file.with_suffix(".json").write_text(json.dumps({
+        "source": source,
+        "dtypes": {column: str(dtype) for column, dtype in df.dtypes.items()},
+    }), encoding="utf-8")
+
+
+def _read_cache(cache_file: Path) -> pd.DataFrame:
+    """
+    Lê o .parquet do cache, com as colunas de texto de volta como object e os
+    vazios como NaN, como no pd.read_excel (o DuckDB devolve None e, em
+    colunas só com vazios, outro tipo).
+    """
+    metadata = json.loads(cache_file.with_suffix(".json").read_text(encoding="utf-8"))
+
+    conn = duckdb.connect()
+    try:
+        df = conn.execute(
+            f"SELECT * FROM read_parquet({_sql_path(cache_file)})"
+        ).df()
+    finally:
+        conn.close()
+
+    for column, dtype in metadata["dtypes"].items():
+        if dtype == "object":
+            df[column] = df[column].astype(object).where(df[column].notna(), np.nan)
+    return df
+
+
+def _sql_path(path: Path) -> str:
+    """
+    Caminho como literal de texto SQL (aspas simples escapadas).
+    """
+    return "'" + path.as_posix().replace("'", "''") + "'"
+
+
+def _print_report(report: dict[str, tuple[str, float]], total_seconds: float):
+    """
+    Imprime a origem (cache ou Excel) e o tempo de leitura de cada planilha.
+    """
+    hits = sum(origin == "cache" for origin, _ in report.values())
+    print(f"📦 Planilhas de entrada: {hits}/{len(report)} do cache")
+    for file_name, (origin, seconds) in report.items():
+        print(f"   {file_name}: {origin} ({seconds:.2f}s)")
+    print(f"⏱️ Leitura das entradas: {total_seconds:.2f}s")
@@ -3,7 +3,21 @@ import pandas as pd
 from pathlib import Path
 
 
+# Tabela com as competências calculadas (uma "partição" por Competência)
+VR_TABLE = "tabela_compra_vr"
+
+
 def load_pandas_df_into_duckdb(conn: duckdb.DuckDBPyConnection, tabela_final):
+    """
+    Grava as competências da tabela final em tabela_compra_vr: as linhas de
+    cada competência presente em tabela_final substituem as anteriores da
+    mesma competência, e as demais competências já gravadas são mantidas.
+
+    Args:
+    conn(duckdb.DuckDBPyConnection): Conexão com o banco .duckdb.
+    tabela_final(pd.DataFrame): Tabela de read_treat_and_aggregate_data ou
+        calcular_competencias (uma ou mais competências).
+    """
 
     tabela_final = tabela_final.drop(columns= ["DATA DEMISSÃO"])
 
@@ -17,9 +31,34 @@ def load_pandas_df_into_duckdb(conn: duckdb.DuckDBPyConnection, tabela_final):
         }
     )
 
-    # Criação persistente da tabela
-    conn.execute("DROP TABLE IF EXISTS tabela_compra_vr")
-    conn.register("tabela_compra_vr", tabela_final)
-    conn.execute("CREATE TABLE tabela_compra_vr AS SELECT * FROM tabela_compra_vr")
+    # Competências em ordem cronológica ("MM/AAAA")
+    competencias = sorted(
+        tabela_final["Competência"].unique().tolist(),
+        key=lambda competencia: competencia.split("/")[::-1],
+    )
+
+    # Criação persistente da tabela (na primeira carga) e substituição só das
+    # competências recalculadas, em uma única transação
+    conn.register("tabela_final_df", tabela_final)
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {VR_TABLE} AS
+            SELECT * FROM tabela_final_df LIMIT 0
+        """)
+        conn.execute(f"""
+            DELETE FROM {VR_TABLE}
+            WHERE "Competência" IN (SELECT DISTINCT "Competência" FROM tabela_final_df)
+        """)
+        conn.execute(f"""
+            INSERT INTO {VR_TABLE} BY NAME
+            SELECT * FROM tabela_final_df ORDER BY "Competência"
+        """)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.unregister("tabela_final_df")
 
-    print("✔️ Tabela criada com sucesso!")
\ No newline at end of file
+    print(f"✔️ Tabela atualizada com sucesso! Competência(s): {', '.join(competencias)}")
\ No newline at end of file
@@ -0,0 +1,183 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+
+# Colaboradores gerados por padrão (volume próximo ao da base real)
+DEFAULT_EMPLOYEES = 1800
+
+# Período coberto pelas datas de admissão e demissão
+DEFAULT_FIRST_DATE = "2024-01-01"
+DEFAULT_LAST_DATE = "2025-12-31"
+
+# Sindicatos de cada UF, com o mesmo formato de texto das planilhas reais
+# (a UF é a segunda palavra)
+SINDICATOS = {
+    "SP": "SINDPD SP - SIND.TRAB.EM PROC DADOS E EMPR.EMPRESAS PROC DADOS ESTADO DE SP.",
+    "RJ": "SINDPD RJ - SINDICATO PROFISSIONAIS DE PROC DADOS DO RIO DE JANEIRO",
+    "PR": "SITEPD PR - SIND DOS TRAB EM EMPR PRIVADAS DE PROC DE DADOS DE CURITIBA E REGIAO METROPOLITANA",
+    "RS": "SINDPPD RS - SINDICATO DOS TRAB. EM PROC. DE DADOS RIO GRANDE DO SUL",
+}
+
+# Estado (como na planilha de valores) e valor diário do VR de cada UF
+VALORES_SINDICATO = {
+    "PR": ("Paraná", 35.0),
+    "RJ": ("Rio de Janeiro", 35.0),
+    "RS": ("Rio Grande do Sul", 35.0),
+    "SP": ("São Paulo", 37.5),
+}
+
+# Cargos e seus pesos (diretores, estagiários e aprendizes são excluídos do
+# cálculo)
+CARGOS = (
+    ["ANALISTA", "ANALISTA DE SISTEMAS", "COORDENADOR", "GERENTE", "DIRETOR",
+     "ESTAGIARIO", "APRENDIZ"],
+    [0.4, 0.27, 0.15, 0.1, 0.03, 0.03, 0.02],
+)
+
+SITUACOES = (["Trabalhando", "Férias", "Licença"], [0.85, 0.1, 0.05])
+
+# Nome da coluna de estado da planilha de valores (com os espaços não
+# separáveis da planilha real)
+COLUNA_ESTADO = "ESTADO" + "\xa0" * 53
+
+# Planilhas com colunas sem cabeçalho (lidas como "Unnamed: N")
+PLANILHAS_SEM_CABECALHO = ["ADMISSÃO ABRIL.xlsx", "EXTERIOR.xlsx", "AFASTAMENTOS.xlsx"]
+
+
+def generate_synthetic_inputs(
+        output_dir: Path,
+        employees: int = DEFAULT_EMPLOYEES,
+        first_date: str = DEFAULT_FIRST_DATE,
+        last_date: str = DEFAULT_LAST_DATE,
+        seed: int = 7
+    ) -> list[Path]:
+    """
+    Gera as 8 planilhas de entrada (INPUT_FILES) com o mesmo layout das
+    reais: mesmos nomes de colunas (com os espaços extras e as colunas sem
+    cabeçalho), sindicatos no formato "SIGLA UF - NOME" e a linha de título
+    da base de dias úteis. Admissões e demissões ficam espalhadas entre
+    first_date e last_date, com comunicados OK e pendentes, férias,
+    afastados e colaboradores no exterior.
+
+    Ex.: generate_synthetic_inputs(Path("data"), employees=10_000)
+
+    Args:
+    output_dir(Path): Pasta onde as planilhas são gravadas.
+    employees(int): Quantidade de colaboradores ativos.
+    first_date(str): Primeira data de admissão/demissão (AAAA-MM-DD).
+    last_date(str): Última data de admissão/demissão (AAAA-MM-DD).
+    seed(int): Semente do gerador aleatório.
+
+    Returns:
+    list[Path]: Planilhas geradas.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    datas = pd.date_range(first_date, last_date)
+
+    matriculas = np.arange(30000, 30000 + employees)
+    ufs = rng.choice(list(SINDICATOS), employees)
+    situacoes = rng.choice(SITUACOES[0], employees, p=SITUACOES[1])
+
+    planilhas = {
+        "ATIVOS.xlsx": pd.DataFrame({
+            "MATRICULA": matriculas,
+            "EMPRESA": 1410,
+            "TITULO DO CARGO": rng.choice(CARGOS[0], employees, p=CARGOS[1]),
+            "DESC. SITUACAO": situacoes,
+            "Sindicato": [SINDICATOS[uf] for uf in ufs],
+        }),
+    }
+
+    de_ferias = situacoes == "Férias"
+    planilhas["FÉRIAS.xlsx"] = pd.DataFrame({
+        "MATRICULA": matriculas[de_ferias],
+        "DESC. SITUACAO": situacoes[de_ferias],
+        "DIAS DE FÉRIAS": rng.choice([5, 10, 15, 20, 30], de_ferias.sum()),
+    })
+
+    desligados = rng.choice(matriculas, employees // 20, replace=False)
+    planilhas["DESLIGADOS.xlsx"] = pd.DataFrame({
+        "MATRICULA ": desligados,
+        "DATA DEMISSÃO": rng.choice(datas, len(desligados)),
+        "COMUNICADO DE DESLIGAMENTO": rng.choice(["OK", "PENDENTE"], len(desligados)),
+    })
+
+    admitidos = rng.choice(matriculas, employees // 10, replace=False)
+    planilhas["ADMISSÃO ABRIL.xlsx"] = pd.DataFrame({
+        "MATRICULA": admitidos,
+        "Admissão": rng.choice(datas, len(admitidos)),
+        "Cargo": "ANALISTA",
+        " ": rng.choice(["", "observação"], len(admitidos)),
+    })
+
+    planilhas["Base sindicato x valor.xlsx"] = pd.DataFrame({
+        COLUNA_ESTADO: [estado for estado, _ in VALORES_SINDICATO.values()],
+        "VALOR": [valor for _, valor in VALORES_SINDICATO.values()],
+    })
+
+    no_exterior = rng.choice(matriculas, min(20, employees), replace=False)
+    planilhas["EXTERIOR.xlsx"] = pd.DataFrame({
+        "Cadastro": no_exterior,
+        "Valor": 0,
+        " ": rng.choice(
+            np.array(["retornou ao Brasil em 05/05", None], dtype=object),
+            len(no_exterior),
+        ),
+    })
+
+    afastados = rng.choice(matriculas, min(30, employees), replace=False)
+    planilhas["AFASTAMENTOS.xlsx"] = pd.DataFrame({
+        "MATRICULA": afastados,
+        "EMPRESA": 1410,
+        "DESC. SITUACAO": "Licença Maternidade",
+        " ": rng.choice(
+            np.array(["retorno previsto 10/05", "", None], dtype=object),
+            len(afastados),
+        ),
+    })
+
+    paths = []
+    for file_name, df in planilhas.items():
+        df.to_excel(output_dir / file_name, index=False)
+        paths.append(output_dir / file_name)
+    paths.append(_write_dias_uteis(output_dir))
+
+    for file_name in PLANILHAS_SEM_CABECALHO:
+        _clear_blank_headers(output_dir / file_name)
+
+    return paths
+
+
+def _write_dias_uteis(output_dir: Path) -> Path:
+    """
+    Base de dias úteis por sindicato, com a linha de título da planilha real
+    antes do cabeçalho (e o espaço extra em "DIAS UTEIS ").
+    """
+    path = output_dir / "Base dias uteis.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame([["BASE DIAS UTEIS DE 15/04 a 15/05", None]]).to_excel(
+            writer, index=False, header=False
+        )
+        pd.DataFrame({
+            "SINDICADO": list(SINDICATOS.values()),
+            "DIAS UTEIS ": [22, 21, 22, 21],
+        }).to_excel(writer, index=False, startrow=1)
+    return path
+
+
+def _clear_blank_headers(path: Path):
+    """
+    Apaga os cabeçalhos " " da planilha, que o pd.read_excel passa a ler
+    como "Unnamed: N", como nas planilhas reais.
+    """
+    workbook = load_workbook(path)
+    sheet = workbook.active
+    for cell in sheet[1]:
+        if cell.value == " ":
+            cell.value = None
+    workbook.save(path)